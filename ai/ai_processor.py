@@ -9,23 +9,28 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Shared across calls so the connection to the API is kept alive between emails
+_http_session = requests.Session()
+
 class AIProcessor:
     """Class to handle AI processing of DITA XML with OpenAI API"""
     
-    def __init__(self, api_key=None, model="gpt-4o-mini"):
+    def __init__(self, api_key=None, model="gpt-4o-mini", api_url=None):
         """
         Initialize the AI processor with API key and model
         
         Args:
             api_key: OpenAI API key (if None, will use OPENAI_API_KEY env var)
             model: Model to use (default: gpt-4o-mini)
+            api_url: Chat completions endpoint (if None, will use OPENAI_API_URL env var
+                     or the OpenAI endpoint)
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key not provided and not found in environment variables")
         
         self.model = model
-        self.api_url = "https://api.openai.com/v1/chat/completions"
+        self.api_url = api_url or os.environ.get("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
@@ -175,7 +180,7 @@ Please provide ONLY the modified XML document with no additional explanation or
         }
         
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            response = _http_session.post(self.api_url, headers=self.headers, json=payload)
             response.raise_for_status()  # Raise exception for error status codes
             return response.json()
         except requests.RequestException as e:
@@ -1,38 +1,121 @@
 # automation/browser_automation.py
 
+import difflib
 import json
+import math
+import os
+import re
 from venv import logger
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.edge.service import Service
-from config.settings import EDGE_DRIVER_PATH, WAIT_TIME_PAGE_LOAD
-from selenium.common.exceptions import TimeoutException
-from datetime import datetime
-import time
-def launch_edge():
+from config.settings import CCMS_DOCUMENT_ID_PATTERN, CCMS_XML_FETCH_URL, CCMS_XML_SAVE_METHOD, CCMS_XML_SAVE_URL, EDGE_BLOCK_FONTS, EDGE_BLOCK_IMAGES, EDGE_BLOCKED_URLS, EDGE_BLOCKED_URLS_PORTAL, EDGE_DRIVER_PATH, EDGE_HEADLESS, EDGE_LEAN_MODE, EDGE_NETWORK_TRACE, EDGE_PAGE_LOAD_STRATEGY, EDGE_WINDOW_SIZE, WAIT_TIME_PAGE_LOAD
+from selenium.common.exceptions import NoAlertPresentException, TimeoutException
+from urllib.parse import urlsplit
+from automation.tracing import traced
+from automation.readiness import all_of, any_of, attribute_equals, check_in_completed, document_interactive, document_ready, dom_stable, element_present, element_stale, element_visible, ixia_page_state, network_idle, wait_until, window_count, xml_editor_present
+
+# Flags for EDGE_LEAN_MODE: nothing the automation doesn't need runs in the
+# background, and editor tabs waiting behind the portal tab are not throttled
+LEAN_FLAGS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--no-first-run",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+]
+
+FONT_URL_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+
+@traced()
+def launch_edge(profile_dir=None):
     """
     Launch Edge browser using Selenium WebDriver and return driver.
+
+    Headless mode, page load strategy, image/font blocking, the URL
+    blocklist and the lean flags come from the Browser Launch Settings.
+    With EDGE_NETWORK_TRACE the DevTools Network events are logged for
+    the network trace (see automation.network_trace).
+
+    Args:
+        profile_dir: Edge user data directory for this browser, so several
+                     browsers can run side by side with their own cookies
+                     and auth state. It persists across launches, so a
+                     relaunched browser usually comes up signed in to IXIA.
+                     None uses a throwaway profile.
     """
     options = webdriver.EdgeOptions()
-    options.add_argument("--start-maximized")
-
-    service = Service(executable_path=EDGE_DRIVER_PATH)
+    options.page_load_strategy = EDGE_PAGE_LOAD_STRATEGY
+    if EDGE_HEADLESS:
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={EDGE_WINDOW_SIZE}")
+    else:
+        options.add_argument("--start-maximized")
+    if EDGE_LEAN_MODE:
+        for flag in LEAN_FLAGS:
+            options.add_argument(flag)
+    if EDGE_BLOCK_IMAGES:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    if EDGE_NETWORK_TRACE:
+        options.set_capability("ms:loggingPrefs", {"performance": "ALL"})
+
+    service = Service(executable_path=EDGE_DRIVER_PATH) if EDGE_DRIVER_PATH else Service()
     driver = webdriver.Edge(service=service, options=options)
+    apply_network_blocking(driver, EDGE_BLOCKED_URLS_PORTAL)
 
     return driver
 
+def apply_network_blocking(driver, extra_patterns=()):
+    """
+    Block EDGE_BLOCKED_URLS (and web fonts with EDGE_BLOCK_FONTS) in the
+    current tab through the DevTools protocol. The block list is per tab,
+    so call this again after switching to a newly opened tab.
+
+    Args:
+        driver: Selenium WebDriver instance
+        extra_patterns: Patterns blocked in this kind of tab only
+                        (EDGE_BLOCKED_URLS_PORTAL or EDGE_BLOCKED_URLS_IXIA)
+    """
+    patterns = list(EDGE_BLOCKED_URLS) + list(extra_patterns)
+    if EDGE_BLOCK_FONTS:
+        patterns += FONT_URL_PATTERNS
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        print(f"⚠️ Could not set blocked URLs: {e}")
+
+@traced()
 def open_help_portal_page(driver, url):
     """
     Opens SAP Help Portal page in Edge browser.
+
+    With the "eager" or "none" page load strategy driver.get() can return
+    before the new page replaces the previous one, so wait for that and for
+    the DOM rather than for a full load.
     """
+    previous_page = driver.find_elements(By.TAG_NAME, "html")
     driver.get(url)
+    if previous_page:
+        wait_until(driver, element_stale(previous_page[0]), WAIT_TIME_PAGE_LOAD, "previous page unloaded")
+    wait_until(driver, document_interactive(), WAIT_TIME_PAGE_LOAD, "Help Portal DOM ready")
     WebDriverWait(driver, WAIT_TIME_PAGE_LOAD).until(
         EC.presence_of_element_located((By.TAG_NAME, "body"))
     )
     print("✅ SAP Help Portal page loaded.")
 
+@traced()
 def get_page_title(driver):
     """
     Gets the page title using multiple strategies.
@@ -44,31 +127,30 @@ def get_page_title(driver):
         str: The page title or browser title if not found
     """
     try:
-        # Try several strategies to find the page title
+        # Try several strategies to find the page title, all in one round trip
         title_selectors = [
-            {"type": "css", "selector": "div.left-content h1", "description": "left-content > h1"},
-            {"type": "css", "selector": "h1", "description": "any h1"},
-            {"type": "css", "selector": "div.breadcrumbs", "description": "breadcrumbs"},
-            {"type": "css", "selector": ".page-title, .title", "description": "page-title or title class"}
+            {"selector": "div.left-content h1", "description": "left-content > h1"},
+            {"selector": "h1", "description": "any h1"},
+            {"selector": "div.breadcrumbs", "description": "breadcrumbs"},
+            {"selector": ".page-title, .title", "description": "page-title or title class"}
         ]
-        
-        for strategy in title_selectors:
-            try:
-                if strategy["type"] == "css":
-                    element = driver.find_element(By.CSS_SELECTOR, strategy["selector"])
-                else:  # xpath
-                    element = driver.find_element(By.XPATH, strategy["selector"])
-                
-                title_text = element.text.strip()
-                if title_text:
-                    print(f"✅ Found page title from {strategy['description']}: {title_text}")
-                    return title_text
-            except:
-                continue
+        probe = driver.execute_script("""
+            for (const strategy of arguments[0]) {
+                const el = document.querySelector(strategy.selector);
+                // Hidden elements have no visible text, as with WebElement.text
+                const text = el && el.getClientRects().length ? el.innerText.trim() : '';
+                if (text) return {text: text, description: strategy.description, title: document.title};
+            }
+            return {text: '', description: null, title: document.title};
+        """, title_selectors)
+
+        if probe["text"]:
+            print(f"✅ Found page title from {probe['description']}: {probe['text']}")
+            return probe["text"]
                 
         # If all strategies fail, use the document title
         print("⚠️ Could not find page title element, falling back to browser title")
-        return driver.title
+        return probe["title"]
             
     except Exception as e:
         print(f"⚠️ Error getting page title: {e}")
@@ -136,6 +218,52 @@ def titles_match(title1, title2):
         
     return False
 
+def title_tokens(title):
+    """Normalized word tokens of a title (see clean_title)"""
+    return re.findall(r"[a-z0-9]+", clean_title(title))
+
+def rank_titles(expected_title, candidates):
+    """
+    Scores candidate titles against the expected one in a single pass.
+
+    Each candidate is indexed as a set of normalized tokens. Tokens are
+    weighted by inverse frequency across the candidates, so words shared by
+    every result (product names, "configuring", ...) count for little, and
+    a candidate's score is the weighted overlap (Dice coefficient) of its
+    tokens with the expected title's: 1.0 for the same words, 0.0 for none.
+
+    Args:
+        expected_title: Title the page should have
+        candidates: Candidate titles, in the order the portal ranked them
+
+    Returns:
+        list: (score, index, title) tuples, best first; ties keep the portal's order
+    """
+    expected = set(title_tokens(expected_title))
+    index = [set(title_tokens(title)) for title in candidates]
+
+    frequency = {}
+    for tokens in index:
+        for token in tokens:
+            frequency[token] = frequency.get(token, 0) + 1
+    total = len(index)
+
+    def weight(tokens):
+        return sum(math.log((total + 1) / (frequency.get(token, 0) + 1)) + 1 for token in tokens)
+
+    ranked = []
+    expected_weight = weight(expected)
+    for i, (title, tokens) in enumerate(zip(candidates, index)):
+        if clean_title(title) == clean_title(expected_title):
+            score = 1.0
+        else:
+            denominator = expected_weight + weight(tokens)
+            score = 2 * weight(expected & tokens) / denominator if denominator else 0.0
+        ranked.append((round(score, 3), i, title))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return ranked
+
+@traced()
 def handle_page_filters(driver):
     """
     When a title doesn't match, handle the filter dropdowns to ensure all content is visible.
@@ -169,7 +297,10 @@ def handle_page_filters(driver):
                     )
                     dropdown_button.click()
                     print(f"  ✅ Clicked {dropdown['name']} dropdown")
-                    time.sleep(1)  # Wait for dropdown to open
+                    # Wait for dropdown to open
+                    wait_until(driver, any_of(attribute_equals(dropdown_button, "aria-expanded", "true"),
+                                              element_visible((By.XPATH, "//*[self::button or self::label][contains(., 'Select All')]"))),
+                               3, f"{dropdown['name']} dropdown open")
                 except Exception as e:
                     print(f"  ⚠️ Could not click {dropdown['name']} dropdown: {e}")
                     continue
@@ -196,7 +327,8 @@ def handle_page_filters(driver):
                     if select_all:
                         select_all.click()
                         print("  ✅ Clicked 'Select All' option")
-                        time.sleep(1)  # Wait for checkboxes to be selected
+                        # Wait for checkboxes to be selected
+                        wait_until(driver, dom_stable(0.3), 3, "filter checkboxes selected")
                     else:
                         print("  ⚠️ 'Select All' option not found")
                         
@@ -205,14 +337,17 @@ def handle_page_filters(driver):
                 
                 # Close dropdown by clicking elsewhere
                 driver.find_element(By.TAG_NAME, "body").click()
-                time.sleep(1)  # Wait for dropdown to close
+                # Wait for dropdown to close
+                wait_until(driver, any_of(attribute_equals(dropdown_button, "aria-expanded", "false"),
+                                          dom_stable(0.3)),
+                           3, f"{dropdown['name']} dropdown closed")
                 
             except Exception as e:
                 print(f"  ⚠️ Error processing {dropdown['name']} dropdown: {e}")
                 # Continue with other dropdowns even if one fails
         
         # Wait for page to update after all filters are set
-        time.sleep(2)
+        wait_until(driver, network_idle(0.5), 10, "page update after filters")
         return True
         
     except Exception as e:
@@ -223,13 +358,16 @@ def handle_page_filters(driver):
         print(f"⚠️ Error handling page filters: {e}")
         return False
     
-def search_and_navigate_to_correct_page(driver, breadcrumb_text):
+@traced()
+def search_and_navigate_to_correct_page(driver, breadcrumb_text, expected_title=None):
     """
-    Searches for the breadcrumb text in the search box and clicks the first result.
+    Searches for the breadcrumb text in the search box and clicks the result
+    whose title best matches the expected title (see rank_titles).
     
     Args:
         driver: Selenium WebDriver instance
         breadcrumb_text: Text to search for (from email link)
+        expected_title: Title of the page we want (default: breadcrumb_text)
         
     Returns:
         bool: True if successful, False otherwise
@@ -258,13 +396,21 @@ def search_and_navigate_to_correct_page(driver, breadcrumb_text):
         )
         print("✅ Search results loaded")
         
-        # Find and click the first search result
-        first_result = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "div.title a, li.title a"))
+        # Score every result title against the expected title and click the best one
+        result_selector = "div.title a, li.title a"
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, result_selector)))
+        results = driver.find_elements(By.CSS_SELECTOR, result_selector)
+        titles = driver.execute_script(
+            "return arguments[0].map(a => a.innerText.trim());", results
         )
-        result_text = first_result.text
-        print(f"✅ Found first result: {result_text}")
-        first_result.click()
+        ranked = rank_titles(expected_title or breadcrumb_text, titles)
+        for score, i, title in ranked[:5]:
+            print(f"   {score:.3f}  #{i + 1} {title}")
+        best_score, best_index, result_text = ranked[0]
+        if best_score < 0.3:
+            print(f"⚠️ No search result is a close match (best {best_score:.3f})")
+        print(f"✅ Choosing result #{best_index + 1} of {len(results)}: {result_text} (score {best_score:.3f})")
+        results[best_index].click()
         
         # Wait dynamically for page content to load (max 15 seconds)
         wait = WebDriverWait(driver, 15)
@@ -282,7 +428,9 @@ def search_and_navigate_to_correct_page(driver, breadcrumb_text):
         print("✅ Clicked feedback button")
         
         # Wait for comments to appear
-        time.sleep(2)
+        wait_until(driver, any_of(element_present((By.CLASS_NAME, "comment-highlighted")),
+                                  all_of(element_present((By.CLASS_NAME, "comments-pane")), dom_stable(0.3))),
+                   10, "comments after search")
         
         return True
         
@@ -290,6 +438,7 @@ def search_and_navigate_to_correct_page(driver, breadcrumb_text):
         print(f"⚠️ Error in search and navigation: {e}")
         return False
     
+@traced()
 def verify_page_and_enable_comments(driver, expected_title, breadcrumb_text):
     """
     Verifies we're on the correct page, handles filters if needed,
@@ -328,7 +477,7 @@ def verify_page_and_enable_comments(driver, expected_title, breadcrumb_text):
             
             # Search for the specific page using breadcrumb text
             print(f"🔍 Searching for: {breadcrumb_text}")
-            if not search_and_navigate_to_correct_page(driver, breadcrumb_text):
+            if not search_and_navigate_to_correct_page(driver, breadcrumb_text, expected_title):
                 print("⚠️ Failed to search and navigate to correct page")
                 return False
                 
@@ -409,6 +558,7 @@ def verify_page_and_enable_comments(driver, expected_title, breadcrumb_text):
 #         print(f"⚠️ Error capturing clean comment text: {e}")
 #         return None
 
+@traced()
 def capture_comment_text(driver, email_comment_text=None):
     """
     Captures the already highlighted comment text and verifies it matches the email comment.
@@ -431,24 +581,33 @@ def capture_comment_text(driver, email_comment_text=None):
         # Click on comment box to ensure it's fully loaded/focused
         comment_box.click()
         
-        # First, expand "More" button if needed to see full content
-        try:
-            more_button = comment_box.find_element(By.CLASS_NAME, "truncation")
-            if more_button.is_displayed():
-                more_button.click()
-                print("ℹ️ 'More' button clicked inside comment.")
-                time.sleep(2)  # wait after expanding
-        except Exception:
+        # One round trip: expand the "More" button if it is shown, otherwise
+        # return the comment's text and HTML straight away
+        probe_script = """
+            const box = arguments[0];
+            const more = box.querySelector('.truncation');
+            if (arguments[1] && more && more.getClientRects().length) {
+                more.click();
+                return {expanded: true, more: more};
+            }
+            const span = box.querySelector('.comment-span');
+            if (!span) return null;
+            return {expanded: false, text: span.innerText, html: span.innerHTML};
+        """
+        probe = driver.execute_script(probe_script, comment_box, True)
+        if probe and probe["expanded"]:
+            print("ℹ️ 'More' button clicked inside comment.")
+            # wait for the comment to expand
+            wait_until(driver, any_of(element_stale(probe["more"]), dom_stable(0.3)), 5, "comment expanded")
+            probe = driver.execute_script(probe_script, comment_box, False)
+        elif probe:
             print("ℹ️ No 'More' button found — full comment already visible.")
+        if not probe:
+            raise Exception("comment-span not found in highlighted comment")
         
-        # Extract clean comment text from the highlighted comment
-        comment_span = comment_box.find_element(By.CLASS_NAME, "comment-span")
-        clean_comment_text = comment_span.text
-
-                # Get HTML content using JavaScript
-        comment_html = driver.execute_script("""
-            return arguments[0].innerHTML;
-        """, comment_span)
+        # Clean comment text and HTML from the highlighted comment
+        clean_comment_text = probe["text"]
+        comment_html = probe["html"]
         
         print(f"✅ Captured highlighted comment text: {clean_comment_text}")
         print(f"✅ Captured comment HTML: {comment_html[:100]}...")
@@ -490,6 +649,59 @@ def capture_comment_text(driver, email_comment_text=None):
         return None
     
 
+# In-page function returning the underline info of a commented-text element
+# (see capture_underlined_text); shared by the single-comment and page harvest probes
+UNDERLINE_INFO_JS = """
+    function underlineInfo(elem, contextWindow) {
+        // Parent span with data-id (NEW)
+        const span = elem.closest('[class*="commented-text"]');
+
+        // Nearest <xref> for a direct href
+        const xref = elem.closest('xref');
+
+        // conkeyref attributes, directly or in child elements
+        const hasConkeyref = elem.hasAttribute('conkeyref')
+            || Array.from(elem.querySelectorAll('*')).some(e => e.hasAttribute('conkeyref'));
+
+        // Simple parent path (up to 3 levels, with positions) to help with XML location
+        const path = [];
+        let current = elem;
+        for (let i = 0; i < 3; i++) {
+            if (!current || !current.parentElement) break;
+            current = current.parentElement;
+            const siblings = Array.from(current.parentElement?.children || []);
+            path.unshift(`${current.tagName.toLowerCase()}[${siblings.indexOf(current)}]`);
+        }
+
+        // Context - first try with element content
+        const win = elem.ownerDocument.defaultView;
+        const sel = win.getSelection();
+        sel.removeAllRanges();
+        const range = win.document.createRange();
+        range.selectNodeContents(elem);
+        let context = range.toString().trim();
+
+        // Fallback: manual slice around the element's text
+        if (!context) {
+            const txt = elem.parentNode.innerText;
+            const idx = txt.indexOf(elem.innerText);
+            context = txt.slice(Math.max(0, idx - contextWindow),
+                                idx + elem.innerText.length + contextWindow).trim();
+        }
+
+        return {
+            comment_id: span ? span.getAttribute('data-id') : null,
+            visible_text: elem.innerText.trim(),
+            href: xref ? xref.getAttribute('href') : null,
+            context: context,
+            element_type: elem.tagName.toLowerCase(),
+            has_conkeyref: hasConkeyref,
+            parent_path: path.join(' > ')
+        };
+    }
+"""
+
+@traced()
 def capture_underlined_text(driver, context_window: int = 50) -> dict | None:
     """
     Returns an enhanced dict with:
@@ -510,79 +722,16 @@ def capture_underlined_text(driver, context_window: int = 50) -> dict | None:
             EC.presence_of_element_located((By.CLASS_NAME, "commented-text-hover"))
         )
 
-        # 2) Find the parent span with data-id (NEW)
-        commented_text_span = None
-        try:
-            commented_text_span = u_elem.find_element(By.XPATH, "ancestor-or-self::*[contains(@class,'commented-text')]")
-            comment_id = commented_text_span.get_attribute("data-id")
-            print(f"✅ Found comment span with data-id: {comment_id}")
-        except Exception as e:
-            print(f"⚠️ Could not find parent span with data-id: {e}")
-            comment_id = None
-
-        # 3) Visible text (may be empty for conkeyref placeholders)
-        visible_text = u_elem.text.strip()
+        # 2-8) Every field in one round trip
+        probe = driver.execute_script(UNDERLINE_INFO_JS + """
+            return underlineInfo(arguments[0], arguments[1]);
+        """, u_elem, context_window)
 
-        # 4) Enhanced element information
-        element_type = driver.execute_script("return arguments[0].tagName.toLowerCase()", u_elem)
-        element_classes = driver.execute_script("return arguments[0].className", u_elem)
-        
-        # 5) Try to grab href from nearest <xref>
-        try:
-            xref = u_elem.find_element(By.XPATH, "./ancestor-or-self::xref[1]")
-            href = xref.get_attribute("href")
-        except Exception:
-            href = None
-            
-        # 6) Check for conkeyref attributes (directly or in child elements)
-        has_conkeyref = driver.execute_script("""
-            const elem = arguments[0];
-            if (elem.hasAttribute('conkeyref')) return true;
-            return Array.from(elem.querySelectorAll('*')).some(e => e.hasAttribute('conkeyref'));
-        """, u_elem)
-
-        # 7) Build a simple parent path to help with XML location
-        parent_path = driver.execute_script("""
-            const elem = arguments[0];
-            let path = [];
-            let current = elem;
-            
-            // Collect up to 3 levels of parent tags with their positions
-            for (let i = 0; i < 3; i++) {
-                if (!current || !current.parentElement) break;
-                current = current.parentElement;
-                
-                // Get tag and position among siblings
-                const tag = current.tagName.toLowerCase();
-                const siblings = Array.from(current.parentElement?.children || []);
-                const position = siblings.indexOf(current);
-                
-                path.unshift(`${tag}[${position}]`);
-            }
-            
-            return path.join(' > ');
-        """, u_elem)
-
-        # 8) Get context - first try with element content
-        context = driver.execute_script("""
-            const n = arguments[0];
-            const win = n.ownerDocument.defaultView;
-            const sel = win.getSelection();
-            sel.removeAllRanges();
-            const range = win.document.createRange();
-            range.selectNodeContents(n);
-            return range.toString();
-        """, u_elem).strip()
-
-        # Fallback: manual slice if the above returns the same empty text
-        if not context:
-            context = driver.execute_script(f"""
-                const node = arguments[0];
-                const txt = node.parentNode.innerText;
-                const idx = txt.indexOf(node.innerText);
-                const w = {context_window};
-                return txt.slice(Math.max(0, idx - w), idx + node.innerText.length + w);
-            """, u_elem).strip()
+        comment_id = probe["comment_id"]
+        if comment_id is not None:
+            print(f"✅ Found comment span with data-id: {comment_id}")
+        else:
+            print("⚠️ Could not find parent span with data-id")
 
         # 9) Try to infer the type of change from the comment text
         # This will be populated later by analyzing the comment
@@ -590,12 +739,12 @@ def capture_underlined_text(driver, context_window: int = 50) -> dict | None:
 
         info = {
             "comment_id": comment_id,  # NEW
-            "visible_text": visible_text,
-            "href": href,
-            "context": context,
-            "element_type": element_type,
-            "has_conkeyref": has_conkeyref,
-            "parent_path": parent_path,
+            "visible_text": probe["visible_text"],
+            "href": probe["href"],
+            "context": probe["context"],
+            "element_type": probe["element_type"],
+            "has_conkeyref": probe["has_conkeyref"],
+            "parent_path": probe["parent_path"],
             "comment_type": comment_type
         }
 
@@ -606,6 +755,77 @@ def capture_underlined_text(driver, context_window: int = 50) -> dict | None:
         print(f"⚠️ Could not capture underlined text: {e}")
         return None
     
+@traced()
+def harvest_page_comments(driver, context_window: int = 50) -> list:
+    """
+    Captures every comment thread on the current Help Portal page in one
+    visit, so the page is loaded once per topic rather than once per email.
+
+    Collapsed comments are expanded first; each thread is then read with its
+    underlined anchor (matched by data-id) in a single in-page script.
+
+    Returns:
+        list: One dict per thread with
+          comment_id      : str | None - data-id of the comment
+          text, html      : Comment text and HTML (as capture_comment_text)
+          status          : str | None - e.g. "Open", if the thread shows one
+          highlighted     : bool - Whether this is the highlighted comment
+          underlined_text : dict | None - As capture_underlined_text
+    """
+    try:
+        # Expand every collapsed comment in one go
+        expanded = driver.execute_script("""
+            const buttons = Array.from(document.querySelectorAll('.comment-span'))
+                .map(span => (span.closest('.comment-highlighted, .comment, [data-id]') || span.parentElement)
+                    .querySelector('.truncation'))
+                .filter(more => more && more.getClientRects().length);
+            buttons.forEach(more => more.click());
+            return buttons.length;
+        """)
+        if expanded:
+            print(f"ℹ️ Expanded {expanded} collapsed comment(s).")
+            wait_until(driver, dom_stable(0.3), 5, "comments expanded")
+
+        comments = driver.execute_script(UNDERLINE_INFO_JS + """
+            const threads = [];
+            const seen = new Set();
+            for (const span of document.querySelectorAll('.comment-span')) {
+                // Replies share their thread's box; the first span is the comment itself
+                const box = span.closest('.comment-highlighted, .comment, [data-id]') || span.parentElement;
+                if (seen.has(box)) continue;
+                seen.add(box);
+
+                const idHolder = box.closest('[data-id]') || box.querySelector('[data-id]');
+                const id = idHolder ? idHolder.getAttribute('data-id') : null;
+                const statusElem = box.querySelector('[class*="status"]');
+                const statusMatch = /Status:\\s*([^\\n]+)/.exec(box.innerText);
+                const anchor = id
+                    ? document.querySelector(`[class*="commented-text"][data-id="${CSS.escape(id)}"]`)
+                    : null;
+
+                threads.push({
+                    comment_id: id,
+                    text: span.innerText,
+                    html: span.innerHTML,
+                    status: statusElem ? statusElem.innerText.trim() : (statusMatch ? statusMatch[1].trim() : null),
+                    highlighted: box.classList.contains('comment-highlighted'),
+                    underlined_text: anchor ? underlineInfo(anchor, arguments[0]) : null
+                });
+            }
+            return threads;
+        """, context_window)
+
+        for comment in comments:
+            if comment["underlined_text"]:
+                comment["underlined_text"]["comment_type"] = "unknown"
+        print(f"✅ Harvested {len(comments)} comment(s) from the page")
+        return comments
+
+    except Exception as e:
+        print(f"⚠️ Could not harvest page comments: {e}")
+        return []
+
+@traced()
 def click_more_button(driver):
     """
     Clicks the 'More' button to open dropdown menu.
@@ -623,6 +843,7 @@ def click_more_button(driver):
         print(f"⚠️ Error clicking 'More' button: {e}")
 
 
+@traced()
 def click_edit_in_IXIA_dropdown(driver):
     """
     Clicks the 'Edit in IXIA CCMS Web' option inside already opened dropdown.
@@ -640,6 +861,7 @@ def click_edit_in_IXIA_dropdown(driver):
         print(f"⚠️ Error clicking 'Edit in IXIA CCMS Web': {e}")
 
 
+@traced()
 def switch_to_new_tab(driver):
     """
     Switch Selenium focus to newly opened tab.
@@ -650,6 +872,7 @@ def switch_to_new_tab(driver):
     except Exception as e:
         print(f"⚠️ Error switching tabs: {e}")
 
+@traced()
 def click_authentication_server(driver):
     """
     Clicks on the 'YOUR AUTHENTICATION SERVER' button in IXIA CCMS login page.
@@ -666,6 +889,161 @@ def click_authentication_server(driver):
     except Exception as e:
         print(f"⚠️ Error clicking authentication server: {e}")
 
+@traced()
+def ensure_ixia_authenticated(driver, timeout=80):
+    """
+    Waits for the IXIA tab to show either its login page or the document,
+    and clicks through the login page only if it is shown. With a persistent
+    Edge profile the document usually appears straight away.
+
+    Returns:
+        bool: True if the document page was reached or login was clicked
+    """
+    state = wait_until(driver, ixia_page_state(), timeout, "IXIA login or document page")
+    if state == "login":
+        print("ℹ️ IXIA login page shown - authenticating...")
+        click_authentication_server(driver)
+        return True
+    if state == "document":
+        print("✅ IXIA session already authenticated.")
+        return True
+    print("⚠️ IXIA showed neither its login page nor the document.")
+    return False
+
+@traced()
+def get_ixia_editor_url(driver):
+    """
+    Returns the URL behind the 'Edit in IXIA CCMS Web' option of the opened
+    'More' dropdown, or None if it is not a plain link.
+    """
+    try:
+        links = driver.find_elements(By.XPATH, "//a[contains(.,'Edit in IXIA CCMS Web')]")
+        href = links[0].get_attribute("href") if links else None
+        return href if href and href.startswith("http") else None
+    except Exception as e:
+        print(f"⚠️ Could not read 'Edit in IXIA CCMS Web' link: {e}")
+        return None
+
+def _ccms_url(driver, template):
+    """
+    Fill a CCMS_XML_*_URL template for the IXIA document open in the current
+    tab, or return None if the template is unset or the document id can't
+    be found in the tab's URL.
+    """
+    if not template:
+        return None
+    current_url = driver.current_url
+    match = re.search(CCMS_DOCUMENT_ID_PATTERN, current_url)
+    if not match:
+        print(f"⚠️ No CCMS document id in {current_url}")
+        return None
+    parts = urlsplit(current_url)
+    return template.format(origin=f"{parts.scheme}://{parts.netloc}", document_id=match.group(1))
+
+def _ccms_request(driver, url, method="GET", body=None, timeout=60):
+    """
+    Call a CCMS backend URL from inside the authenticated IXIA page, so the
+    request carries the page's session cookies.
+
+    Returns:
+        dict: status (0 if the request failed) and text of the response
+    """
+    # Wait for the document page itself; after a login click the tab is still navigating
+    wait_until(driver, lambda d: ixia_page_state()(d) == "document", timeout, "IXIA document page", required=True)
+    driver.set_script_timeout(timeout)
+    return driver.execute_async_script("""
+        const done = arguments[arguments.length - 1];
+        const options = {method: arguments[1], credentials: 'include',
+                         headers: {'Accept': 'application/xml, text/xml, */*'}};
+        if (arguments[2] !== null) {
+            options.body = arguments[2];
+            options.headers['Content-Type'] = 'application/xml; charset=utf-8';
+        }
+        fetch(arguments[0], options)
+            .then(r => r.text().then(text => done({status: r.status, text: text})))
+            .catch(e => done({status: 0, text: String(e)}));
+    """, url, method, body)
+
+@traced()
+def fetch_ccms_xml(driver, timeout=60):
+    """
+    Fetches the XML of the IXIA document open in the current tab straight
+    from the CCMS backend (CCMS_XML_FETCH_URL), without booting the editor.
+
+    Returns:
+        str: The XML, or None if the fast path is not configured or failed
+    """
+    url = _ccms_url(driver, CCMS_XML_FETCH_URL)
+    if not url:
+        return None
+    try:
+        response = _ccms_request(driver, url, timeout=timeout)
+        xml_text = response["text"]
+        if response["status"] != 200 or not xml_text.lstrip().startswith("<"):
+            print(f"⚠️ CCMS XML fetch returned HTTP {response['status']}: {xml_text[:100]}")
+            return None
+        print(f"✅ Fetched XML from CCMS backend ({len(xml_text.splitlines())} lines)")
+        return xml_text
+    except Exception as e:
+        print(f"⚠️ CCMS XML fetch failed: {e}")
+        return None
+
+@traced()
+def save_ccms_xml(driver, xml_text, timeout=60):
+    """
+    Stores XML for the IXIA document open in the current tab through the
+    CCMS backend (CCMS_XML_SAVE_URL), instead of applying it in the editor
+    and checking it in. The save's response alone does not show that the
+    document was stored, so the document is read back (CCMS_XML_FETCH_URL)
+    and must hold the saved XML.
+
+    Returns:
+        bool: True if the backend accepted the XML and returns it
+    """
+    url = _ccms_url(driver, CCMS_XML_SAVE_URL)
+    if not url:
+        return False
+    try:
+        response = _ccms_request(driver, url, CCMS_XML_SAVE_METHOD, xml_text, timeout)
+        if not 200 <= response["status"] < 300:
+            print(f"⚠️ CCMS XML save returned HTTP {response['status']}: {response['text'][:100]}")
+            return False
+        stored = fetch_ccms_xml(driver, timeout)
+        if stored is None or _editor_text(stored).strip() != _editor_text(xml_text).strip():
+            print("⚠️ CCMS backend accepted the XML but the document does not hold it")
+            return False
+        print("✅ Saved XML through CCMS backend and read it back")
+        return True
+    except Exception as e:
+        print(f"⚠️ CCMS XML save failed: {e}")
+        return False
+
+@traced()
+def close_tab(driver, handle, return_to=None):
+    """
+    Closes the tab with the given window handle and switches to return_to
+    (or the first remaining tab).
+    """
+    editor_locator.forget(driver, handle)
+    try:
+        driver.switch_to.window(handle)
+        driver.close()
+        try:
+            # "Leave site?" prompt when the editor still has unsaved changes
+            driver.switch_to.alert.accept()
+        except NoAlertPresentException:
+            pass
+        print("✅ Closed editor tab.")
+    except Exception as e:
+        print(f"⚠️ Error closing tab: {e}")
+    finally:
+        try:
+            handles = driver.window_handles
+            driver.switch_to.window(return_to if return_to in handles else handles[0])
+        except Exception:
+            pass
+
+@traced()
 def wait_for_homepage_load(driver):
     """
     Waits until IXIA Home Page is fully loaded (detects 'My Assignments' tile).
@@ -681,13 +1059,15 @@ def wait_for_homepage_load(driver):
     except Exception as e:
         print(f"⚠️ Error waiting for IXIA Home Page: {e}")
 
+@traced()
 def close_current_tab(driver):
     """
     Closes the current active tab and switches back to the previous one.
     """
     try:
+        remaining = len(driver.window_handles) - 1
         driver.close()
-        time.sleep(2)  # small safety wait
+        wait_until(driver, window_count(remaining), 5, "tab closed")
 
         driver.switch_to.window(driver.window_handles[-1])
         print("✅ Closed current tab and switched back to previous tab.")
@@ -696,6 +1076,7 @@ def close_current_tab(driver):
         print(f"⚠️ Error closing tab: {e}")
 
 
+@traced()
 def switch_back_to_breadcrumb_tab(driver):
     """
     Switches focus back to the SAP Help Portal tab.
@@ -710,40 +1091,20 @@ def switch_back_to_breadcrumb_tab(driver):
     except Exception as e:
         print(f"⚠️ Error switching back to SAP Help Portal tab: {e}")
 
+@traced()
 def wait_for_more_menu_ready(driver):
     """
     Waits until the 3-dot 'More' menu is fully available after switching to Edit mode.
     Handles internal DOM reloads after Edit click.
     """
     try:
-        wait = WebDriverWait(driver, 120)
-
         # Wait for document readyState to be complete
-        wait.until(
-            lambda d: d.execute_script('return document.readyState') == 'complete'
-        )
+        wait_until(driver, document_ready(), 120, "document reloaded after Edit", required=True)
         print("✅ Document reloaded after Edit.")
 
-                # Now wait for DOM stabilization
-        dom_stable = False
-        last_dom_count = 0
-        stable_count = 0
-
-        while not dom_stable:
-            current_dom_count = driver.execute_script('return document.getElementsByTagName("*").length')
-            if current_dom_count == last_dom_count:
-                stable_count += 1
-            else:
-                stable_count = 0
-                last_dom_count = current_dom_count
-
-            if stable_count >= 5:
-                dom_stable = True
-                print("✅ DOM stabilized after Edit.")
-
-            time.sleep(1)  # check every 1 second
-
-     
+        # Now wait for DOM stabilization
+        if wait_until(driver, dom_stable(1.0), 120, "DOM stable after Edit"):
+            print("✅ DOM stabilized after Edit.")
 
     except Exception as e:
         print(f"⚠️ Error waiting for 3-dot menu after Edit: {e}")
@@ -751,6 +1112,7 @@ def wait_for_more_menu_ready(driver):
 
 
 
+@traced()
 def click_edit_button(driver):
     try:
         btn = WebDriverWait(driver, 60).until(
@@ -844,6 +1206,7 @@ def click_edit_button(driver):
 #         driver.save_screenshot("edit_as_xml_error.png")
 #         print("⚠️ Error clicking 'Edit as XML':", e)
 
+@traced()
 def click_edit_as_xml(driver):
     """
     1) Switch into the Oxygen iframe
@@ -864,7 +1227,7 @@ def click_edit_as_xml(driver):
         print("✅ Switched into WebAuthor-frame iframe")
         
         # Make sure page is fully loaded
-        time.sleep(2)  # Small safety wait
+        wait_until(driver, document_ready(), 30, "WebAuthor-frame loaded")
         
         # 2) Click the toolbar's 3-dot "More..." button
         menu_locators = [
@@ -895,9 +1258,8 @@ def click_edit_as_xml(driver):
         # Take screenshot before click
         driver.save_screenshot("menu_before_click.png")
         
-        # Scroll and click
+        # Scroll and click (scrollIntoView is synchronous)
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", menu_btn)
-        time.sleep(1)  # Wait after scrolling
         
         try:
             # Try direct click
@@ -933,7 +1295,7 @@ def click_edit_as_xml(driver):
         driver.save_screenshot("dropdown_visible.png")
         
         # Allow DOM to stabilize
-        time.sleep(2)
+        wait_until(driver, dom_stable(0.3), 5, "'More...' menu populated")
         
         # 4) Try multiple ways to find and click "Edit as XML"
         xml_menu_locators = [
@@ -963,7 +1325,6 @@ def click_edit_as_xml(driver):
                                 # 1. Center the element
                                 driver.execute_script(
                                     "arguments[0].scrollIntoView({block: 'center'});", e)
-                                time.sleep(1)
                                 
                                 # 2. Try direct click
                                 e.click()
@@ -981,7 +1342,7 @@ def click_edit_as_xml(driver):
                             clicked = True
                             
                             # Wait for click effect
-                            time.sleep(3)
+                            wait_until(driver, element_stale(e), 5, "'Edit as XML' menu closed")
                             break
                     except:
                         continue
@@ -1015,7 +1376,7 @@ def click_edit_as_xml(driver):
             raise TimeoutException("Could not find or click 'Edit as XML' menu item")
         
         # Wait for XML editor to load
-        time.sleep(5)  # Give time for XML view to initialize
+        wait_until(driver, xml_editor_present(), 90, "XML view initialized")
 
     except Exception as e:
         driver.save_screenshot("click_edit_as_xml_error.png")
@@ -1028,66 +1389,103 @@ def click_edit_as_xml(driver):
         except:
             pass
 
-def capture_full_xml_source(driver, timeout=60):
+# Frame inside WebAuthor-frame that holds CodeMirror, per editor layout
+EDITOR_LAYOUT_FRAMES = {
+    "sap-inline": None,
+    "classic-iframe": "iframe[id^='text-mode-iframe']",
+    "plugin-iframe": "iframe[id^='SAP-plugin-iframe']",
+}
+
+class EditorLocator:
     """
-    After 'Edit as XML' click, return the complete XML string displayed
-    by Oxygen in IXIA CCMS Web Author by accessing the CodeMirror API.
+    Finds the frame holding the CodeMirror XML editor and remembers the
+    layout it found per browser tab.
+
+    The first visit to a tab waits for the Oxygen editor (up to 90 s) and
+    probes the known layouts; later capture/apply calls on the same tab go
+    straight to the remembered frame and only probe again if CodeMirror is
+    not there.
     """
-    def _switch(locator):
+
+    def __init__(self):
+        self._layouts = {}   # (session id, window handle) -> layout
+
+    def enter(self, driver, timeout=60):
+        """
+        Switch into the frame holding CodeMirror.
+
+        Returns:
+            str: The layout found ("unknown" if none of them matched)
+        """
+        key = (driver.session_id, driver.current_window_handle)
+        layout = self._layouts.get(key)
+        if layout:
+            try:
+                self._enter_layout(driver, layout, timeout)
+                if driver.find_elements(By.CSS_SELECTOR, "div.CodeMirror"):
+                    return layout
+            except Exception as e:
+                print(f"ℹ️ Remembered editor layout unavailable ({e})")
+            print(f"ℹ️ Editor layout '{layout}' no longer matches, probing again")
+            self._layouts.pop(key, None)
+
+        layout = self._probe(driver, timeout)
+        if layout != "unknown":
+            self._layouts[key] = layout
+        return layout
+
+    def forget(self, driver, handle):
+        """Drop what is remembered about a tab (e.g. when it is closed)"""
+        self._layouts.pop((driver.session_id, handle), None)
+
+    def _enter_layout(self, driver, layout, timeout):
+        driver.switch_to.default_content()
         WebDriverWait(driver, timeout).until(
-            EC.frame_to_be_available_and_switch_to_it(locator)
+            EC.frame_to_be_available_and_switch_to_it((By.ID, "WebAuthor-frame"))
         )
+        frame_selector = EDITOR_LAYOUT_FRAMES[layout]
+        if frame_selector:
+            driver.switch_to.frame(driver.find_element(By.CSS_SELECTOR, frame_selector))
 
-    try:
+    def _probe(self, driver, timeout):
         driver.switch_to.default_content()
 
         # Step 1: Enter WebAuthor-frame
-        _switch((By.ID, "WebAuthor-frame"))
-        wait = WebDriverWait(driver, timeout)
+        WebDriverWait(driver, timeout).until(
+            EC.frame_to_be_available_and_switch_to_it((By.ID, "WebAuthor-frame"))
+        )
         print("✅ In WebAuthor-frame")
 
         # Step 2: Wait until Oxygen XML editor is loaded
-        def oxygen_ready(drv):
-            """Return True once the XML editor is present somewhere."""
-            # a) inline CodeMirror (SAP build)
-            if drv.find_elements(By.CSS_SELECTOR, "div.CodeMirror"):
-                return True
-            # b) classic nested iframe has appeared
-            if drv.find_elements(By.CSS_SELECTOR, "iframe[id^='text-mode-iframe']"):
-                return True
-            # c) plugin iframe has appeared
-            if drv.find_elements(By.CSS_SELECTOR, "iframe[id^='SAP-plugin-iframe']"):
-                return True
-            return False
-
-        WebDriverWait(driver, 90).until(oxygen_ready)
+        wait_until(driver, xml_editor_present(), 90, "Oxygen XML editor loaded", required=True)
         print("✅ Oxygen XML editor loaded")
 
-        # Step 3: Handle different iframe layouts
-        layout = "unknown"
-        
-        # Try to locate CodeMirror in the current frame first
-        if driver.find_elements(By.CSS_SELECTOR, "div.CodeMirror"):
-            layout = "sap-inline"
-        # Try the classic nested iframe
-        elif driver.find_elements(By.CSS_SELECTOR, "iframe[id^='text-mode-iframe']"):
-            inner_iframe = wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "iframe[id^='text-mode-iframe']")
+        # Step 3: Handle different iframe layouts, CodeMirror in the current frame first
+        for layout, frame_selector in EDITOR_LAYOUT_FRAMES.items():
+            if frame_selector is None:
+                if driver.find_elements(By.CSS_SELECTOR, "div.CodeMirror"):
+                    return layout
+            elif driver.find_elements(By.CSS_SELECTOR, frame_selector):
+                inner_iframe = WebDriverWait(driver, timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, frame_selector))
                 )
-            )
-            driver.switch_to.frame(inner_iframe)
-            layout = "classic-iframe"
-        # Try the plugin iframe
-        elif driver.find_elements(By.CSS_SELECTOR, "iframe[id^='SAP-plugin-iframe']"):
-            inner_iframe = wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "iframe[id^='SAP-plugin-iframe']")
-                )
-            )
-            driver.switch_to.frame(inner_iframe)
-            layout = "plugin-iframe"
+                driver.switch_to.frame(inner_iframe)
+                return layout
+        return "unknown"
+
+# Shared by every driver of the process; entries are keyed by session and tab
+editor_locator = EditorLocator()
 
+@traced()
+def capture_full_xml_source(driver, timeout=60):
+    """
+    After 'Edit as XML' click, return the complete XML string displayed
+    by Oxygen in IXIA CCMS Web Author by accessing the CodeMirror API.
+    """
+    try:
+        # Steps 1-3: Enter the frame holding CodeMirror (layout remembered per tab)
+        layout = editor_locator.enter(driver, timeout)
+        wait = WebDriverWait(driver, timeout)
         print(f"✅ Found CodeMirror in {layout}")
         
         # Step 4: Get the full XML content through CodeMirror API
@@ -1115,7 +1513,9 @@ def capture_full_xml_source(driver, timeout=60):
             """, code_div)
             
             # Give time for scrolling to complete
-            time.sleep(1)
+            wait_until(driver, all_of(lambda d: d.execute_script("return arguments[0].scrollTop === 0;", code_div),
+                                      dom_stable(0.3)),
+                       5, "CodeMirror lines rendered")
             
             # Try to get the text now that everything is loaded
             lines = code_div.find_elements(By.CSS_SELECTOR, "pre.CodeMirror-line")
@@ -1135,78 +1535,136 @@ def capture_full_xml_source(driver, timeout=60):
     finally:
         driver.switch_to.default_content()
 
-def apply_modified_xml(driver, modified_xml, timeout=60):
+def content_hash(text):
+    """
+    FNV-1a hash of a document's UTF-16 code units plus its length, the same
+    value CONTENT_HASH_JS computes in the page for CodeMirror's getValue().
+    """
+    value = 0x811c9dc5
+    data = text.encode("utf-16-le")
+    for i in range(0, len(data), 2):
+        value ^= data[i] | (data[i + 1] << 8)
+        value = (value * 0x01000193) & 0xffffffff
+    return f"{value:x}:{len(data) // 2}"
+
+CONTENT_HASH_JS = """
+    function contentHash(s) {
+        var h = 0x811c9dc5;
+        for (var i = 0; i < s.length; i++) {
+            h ^= s.charCodeAt(i);
+            h = Math.imul(h, 0x01000193) >>> 0;
+        }
+        return h.toString(16) + ':' + s.length;
+    }
+"""
+
+def _editor_text(text):
+    """Text as CodeMirror's getValue() returns it (lines joined with \\n)"""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+def xml_edits(original_xml, modified_xml):
+    """
+    Minimal set of CodeMirror range replacements turning original_xml into
+    modified_xml: a line diff, with each changed block trimmed to the
+    characters that actually differ.
+
+    Returns:
+        list: {"from": {line, ch}, "to": {line, ch}, "text": str} dicts, last
+              edit first so each one leaves the positions of the rest valid
+    """
+    original = _editor_text(original_xml)
+    modified = _editor_text(modified_xml)
+    # Lines keep their line break, so every block is a plain slice of the document
+    old_lines = original.splitlines(keepends=True)
+    new_lines = modified.splitlines(keepends=True)
+    offsets = [0]
+    for line in old_lines:
+        offsets.append(offsets[-1] + len(line))
+
+    def position(offset):
+        before = original[:offset]
+        line_start = before.rfind("\n") + 1
+        # CodeMirror counts characters in UTF-16 code units
+        return {"line": before.count("\n"), "ch": len(before[line_start:].encode("utf-16-le")) // 2}
+
+    edits = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        start = offsets[i1]
+        old_block = "".join(old_lines[i1:i2])
+        new_block = "".join(new_lines[j1:j2])
+
+        prefix = 0
+        limit = min(len(old_block), len(new_block))
+        while prefix < limit and old_block[prefix] == new_block[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix
+               and old_block[len(old_block) - 1 - suffix] == new_block[len(new_block) - 1 - suffix]):
+            suffix += 1
+
+        edits.append({
+            "from": position(start + prefix),
+            "to": position(start + len(old_block) - suffix),
+            "text": new_block[prefix:len(new_block) - suffix],
+        })
+
+    edits.reverse()
+    return edits
+
+@traced()
+def apply_modified_xml(driver, modified_xml, timeout=60, original_xml=None):
     """
     Apply the modified XML to the CodeMirror editor in IXIA CCMS Web Author.
-    Uses the same iframe navigation logic as capture_full_xml_source.
+    Uses the same EditorLocator as capture_full_xml_source.
+
+    When the XML the editor was captured with is given, only the changed
+    ranges are sent and replaced (see xml_edits), keeping the editor's undo
+    history and re-rendering only what changed. The editor content's hash is
+    read back in the same call to confirm the result; the whole document is
+    set instead if the editor no longer holds original_xml.
     
     Args:
         driver: Selenium WebDriver instance
         modified_xml: The modified XML content to set
         timeout: Maximum wait time in seconds
+        original_xml: XML the editor holds now (as captured), or None
         
     Returns:
         bool: True if successful, False otherwise
     """
-    def _switch(locator):
-        WebDriverWait(driver, timeout).until(
-            EC.frame_to_be_available_and_switch_to_it(locator)
-        )
-
     try:
-        driver.switch_to.default_content()
-
-        # Step 1: Enter WebAuthor-frame
-        _switch((By.ID, "WebAuthor-frame"))
-        wait = WebDriverWait(driver, timeout)
-        print("✅ In WebAuthor-frame")
+        # Steps 1-3: Enter the frame holding CodeMirror (layout remembered per tab)
+        layout = editor_locator.enter(driver, timeout)
+        print(f"✅ Found CodeMirror in {layout}")
+        expected_hash = content_hash(_editor_text(modified_xml))
 
-        # Step 2: Wait until Oxygen XML editor is loaded
-        def oxygen_ready(drv):
-            """Return True once the XML editor is present somewhere."""
-            # a) inline CodeMirror (SAP build)
-            if drv.find_elements(By.CSS_SELECTOR, "div.CodeMirror"):
-                return True
-            # b) classic nested iframe has appeared
-            if drv.find_elements(By.CSS_SELECTOR, "iframe[id^='text-mode-iframe']"):
-                return True
-            # c) plugin iframe has appeared
-            if drv.find_elements(By.CSS_SELECTOR, "iframe[id^='SAP-plugin-iframe']"):
+        # Step 4a: Replace only the changed ranges, in one call
+        if original_xml is not None:
+            edits = xml_edits(original_xml, modified_xml)
+            result = driver.execute_script(CONTENT_HASH_JS + """
+                var edits = arguments[0];
+                var editor = document.querySelector('.CodeMirror').CodeMirror;
+                if (!editor) return {ok: false, reason: 'no CodeMirror instance'};
+                if (contentHash(editor.getValue()) !== arguments[1]) {
+                    return {ok: false, reason: 'editor content differs from the captured XML'};
+                }
+                editor.operation(function() {
+                    edits.forEach(function(e) { editor.replaceRange(e.text, e.from, e.to, '+input'); });
+                });
+                return {ok: true, hash: contentHash(editor.getValue())};
+            """, edits, content_hash(_editor_text(original_xml)))
+
+            if result["ok"] and result["hash"] == expected_hash:
+                sent = sum(len(edit["text"]) for edit in edits)
+                print(f"✅ Applied {len(edits)} targeted edit(s) to editor ({sent} characters sent, content hash verified)")
                 return True
-            return False
-
-        WebDriverWait(driver, 90).until(oxygen_ready)
-        print("✅ Oxygen XML editor loaded")
-
-        # Step 3: Handle different iframe layouts
-        layout = "unknown"
-        
-        # Try to locate CodeMirror in the current frame first
-        if driver.find_elements(By.CSS_SELECTOR, "div.CodeMirror"):
-            layout = "sap-inline"
-        # Try the classic nested iframe
-        elif driver.find_elements(By.CSS_SELECTOR, "iframe[id^='text-mode-iframe']"):
-            inner_iframe = wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "iframe[id^='text-mode-iframe']")
-                )
-            )
-            driver.switch_to.frame(inner_iframe)
-            layout = "classic-iframe"
-        # Try the plugin iframe
-        elif driver.find_elements(By.CSS_SELECTOR, "iframe[id^='SAP-plugin-iframe']"):
-            inner_iframe = wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "iframe[id^='SAP-plugin-iframe']")
-                )
-            )
-            driver.switch_to.frame(inner_iframe)
-            layout = "plugin-iframe"
+            print(f"⚠️ Targeted edits not applied ({result.get('reason') or 'content hash mismatch'}), setting the whole document")
 
-        print(f"✅ Found CodeMirror in {layout}")
-        
-        # Step 4: Set the full XML content through CodeMirror API
-        success = driver.execute_script("""
+        # Step 4b: Set the full XML content through CodeMirror API
+        result = driver.execute_script(CONTENT_HASH_JS + """
             try {
                 // Find the CodeMirror instance
                 var editor = document.querySelector('.CodeMirror').CodeMirror;
@@ -1218,19 +1676,22 @@ def apply_modified_xml(driver, modified_xml, timeout=60):
                     // Trigger change event to ensure the editor recognizes the change
                     editor.refresh();
                     
-                    return true;
+                    return {ok: true, hash: contentHash(editor.getValue())};
                 } else {
-                    return false;
+                    return {ok: false};
                 }
             } catch (error) {
                 console.error("Error setting XML content:", error);
-                return false;
+                return {ok: false};
             }
         """, modified_xml)
         
-        if success:
-            print("✅ Applied modified XML to editor")
+        if result["ok"] and result["hash"] == expected_hash:
+            print("✅ Applied modified XML to editor (content hash verified)")
             return True
+        elif result["ok"]:
+            print("⚠️ Editor content differs from the modified XML after applying it")
+            return False
         else:
             # Fallback if the JavaScript approach fails
             print("⚠️ Primary method failed, trying fallback...")
@@ -1270,6 +1731,7 @@ def apply_modified_xml(driver, modified_xml, timeout=60):
     finally:
         driver.switch_to.default_content()
 
+@traced()
 def get_annotation_offsets(driver, comment_id):
     """
     Use IXIA CCMS Web's IXAnnotations API to get XML offsets for a comment ID.
@@ -1307,6 +1769,7 @@ def get_annotation_offsets(driver, comment_id):
         print(f"⚠️ Error accessing IXAnnotations API: {e}")
         return None
     
+@traced()
 def wait_for_page_after_checkin(driver, timeout=90):
     """
     Wait for the page to fully load after checking in a document.
@@ -1325,12 +1788,9 @@ def wait_for_page_after_checkin(driver, timeout=90):
         wait = WebDriverWait(driver, timeout)
         
         # Wait for document ready state to be complete
-        wait.until(lambda d: d.execute_script('return document.readyState') == 'complete')
+        wait_until(driver, document_ready(), timeout, "document ready after check-in", required=True)
         print("✅ Document ready state is complete")
         
-        # Small safety wait
-        time.sleep(2)
-        
         # Wait for the WebAuthor-frame to be available (if we're returning to author view)
         try:
             wait.until(EC.presence_of_element_located((By.ID, "WebAuthor-frame")))
@@ -1352,21 +1812,8 @@ def wait_for_page_after_checkin(driver, timeout=90):
             pass
         
         # Additional wait for DOM stability
-        prev_dom_size = -1
-        stable_count = 0
-        max_checks = 10
-        
-        for _ in range(max_checks):
-            current_dom_size = driver.execute_script("return document.getElementsByTagName('*').length")
-            if current_dom_size == prev_dom_size:
-                stable_count += 1
-                if stable_count >= 3:  # 3 consecutive unchanged checks
-                    print("✅ DOM has stabilized")
-                    break
-            else:
-                stable_count = 0
-                prev_dom_size = current_dom_size
-            time.sleep(0.5)
+        if wait_until(driver, dom_stable(1.0), 5, "DOM stable after check-in"):
+            print("✅ DOM has stabilized")
         
         return True
     
@@ -1375,9 +1822,82 @@ def wait_for_page_after_checkin(driver, timeout=90):
         driver.save_screenshot("post_checkin_error.png")
         return False
     
-def click_check_in_button(driver):
+# Installed just before the check-in is confirmed. Records the outcome of
+# the check-in request in sessionStorage (which survives a reload of the
+# document page) so check_in_outcome() can read it later without waiting.
+CHECK_IN_WATCH_JS = """
+    const KEY = 'ditaAutomationCheckIn';
+    const record = (state, detail) => {
+        const current = JSON.parse(sessionStorage.getItem(KEY) || 'null');
+        if (current && current.state !== 'submitted') return;   // First outcome wins
+        sessionStorage.setItem(KEY, JSON.stringify({state: state, detail: detail || '', at: Date.now()}));
+    };
+    sessionStorage.removeItem(KEY);
+    record('submitted');
+    const watch = (url, status) => {
+        if (!/check.?in/i.test(String(url))) return;
+        if (status >= 200 && status < 400) record('completed', 'HTTP ' + status);
+        else record('failed', status ? 'HTTP ' + status : 'request failed');
+    };
+    if (!window.__ditaCheckInWatch) {
+        window.__ditaCheckInWatch = true;
+        const fetchOriginal = window.fetch;
+        window.fetch = function (input, init) {
+            const url = input && input.url ? input.url : input;
+            return fetchOriginal.apply(this, arguments).then(
+                r => { watch(url, r.status); return r; },
+                e => { watch(url, 0); throw e; });
+        };
+        const openOriginal = XMLHttpRequest.prototype.open;
+        XMLHttpRequest.prototype.open = function (method, url) {
+            this.addEventListener('loadend', () => watch(url, this.status));
+            return openOriginal.apply(this, arguments);
+        };
+    }
+"""
+
+# Reads the outcome recorded by CHECK_IN_WATCH_JS, falling back to the
+# editor's UI: the dialog is gone and the document has left edit mode
+# (same test as readiness.check_in_completed()).
+CHECK_IN_OUTCOME_JS = """
+    const stored = JSON.parse(sessionStorage.getItem('ditaAutomationCheckIn') || 'null');
+    if (stored && stored.state !== 'submitted') return stored;
+    const has = xpath => document.evaluate(xpath, document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    const shown = el => el && el.offsetParent !== null;
+    const dialogGone = !Array.from(document.querySelectorAll('div.MuiDialogActions-root')).some(shown);
+    const checkInButton = has("//button[starts-with(@id, 'btn-btn-chkin-')]");
+    const done = dialogGone && (has("//button[starts-with(@id, 'btn-btn-edit-')]") || !shown(checkInButton));
+    return {state: done ? 'completed' : 'submitted', detail: done ? 'editor left edit mode' : ''};
+"""
+
+@traced()
+def check_in_outcome(driver):
+    """
+    Non-blocking check on a check-in submitted with
+    click_check_in_button(driver, wait_for_completion=False). The driver
+    must be on the document's tab.
+
+    Returns:
+        tuple: (state, detail) - state is "completed", "failed" or "submitted" (still running)
+    """
+    driver.switch_to.default_content()
+    outcome = driver.execute_script(CHECK_IN_OUTCOME_JS) or {}
+    return outcome.get("state", "submitted"), outcome.get("detail", "")
+
+@traced()
+def click_check_in_button(driver, wait_for_completion=True):
     """
     Clicks on the 'Check In' button in the IXIA CCMS Web Editor and handles the confirmation dialog.
+
+    Args:
+        driver: Selenium WebDriver instance
+        wait_for_completion: Wait for the editor to leave edit mode. When False,
+                             return as soon as the check-in is submitted and
+                             confirm it later with check_in_outcome().
+
+    Returns:
+        bool: True if the check-in was submitted (and completed, when waiting)
     """
     try:
         # Step 1: Click the main Check In button
@@ -1397,10 +1917,16 @@ def click_check_in_button(driver):
         confirm_btn = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.ID, "check-in-confirm-button"))
         )
+        driver.execute_script(CHECK_IN_WATCH_JS)
         confirm_btn.click()
         print("✅ Confirmed check-in in dialog.")
         
-        time.sleep(3)  # Wait for the check-in process to complete
+        if not wait_for_completion:
+            return True
+
+        # Wait for the check-in process to complete
+        if not wait_until(driver, check_in_completed(), 30, "check-in completed"):
+            print("⚠️ Check-in confirmed but the editor did not leave edit mode within 30 seconds")
         
         return True
     except Exception as e:
@@ -0,0 +1,115 @@
+# automation/job_journal.py
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from config.settings import JOURNAL_PATH
+
+logger = logging.getLogger(__name__)
+
+# Stages recorded for every email, in the order they complete. The XML
+# source is not among them: the apply stage needs the editor open anyway,
+# and the document may have changed since, so it is always captured again.
+STAGE_EXTRACTED = "extracted"            # breadcrumb link, link text and comment from the email
+STAGE_COMMENT_CAPTURED = "comment_captured"  # comment and underline info from the Help Portal
+STAGE_AI_OUTPUT = "ai_output"            # modified XML and explanation from the AI
+STAGE_APPLIED = "applied"                # modified XML applied in the editor
+STAGE_CHECKED_IN = "checked_in"          # document checked in (email is done)
+
+STAGES = [
+    STAGE_EXTRACTED,
+    STAGE_COMMENT_CAPTURED,
+    STAGE_AI_OUTPUT,
+    STAGE_APPLIED,
+    STAGE_CHECKED_IN,
+]
+
+
+class JobJournal:
+    """
+    Durable record of the stages each notification email has completed.
+
+    Rows are keyed by Outlook EntryID and Help Portal comment_id and hold the
+    artifact each stage produced (as JSON), so a restarted run can skip
+    emails that were already checked in and resume the others from their
+    last completed stage instead of redoing browser and LLM work.
+
+    The journal is shared by the pipeline threads; all access goes through
+    one connection guarded by a lock.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS stages (
+                    entry_id     TEXT NOT NULL,
+                    comment_id   TEXT NOT NULL,
+                    stage        TEXT NOT NULL,
+                    artifact     TEXT,
+                    completed_at TEXT NOT NULL,
+                    PRIMARY KEY (entry_id, comment_id, stage)
+                )
+            """)
+        logger.info(f"Job journal: {path}")
+
+    def record(self, entry_id, comment_id, stage, artifact=None):
+        """
+        Record that an email completed a stage.
+
+        Args:
+            entry_id: Outlook EntryID of the notification email
+            comment_id: Help Portal comment id (empty string if unknown)
+            stage: One of STAGES
+            artifact: JSON-serializable output of the stage
+        """
+        if not entry_id:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO stages (entry_id, comment_id, stage, artifact, completed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (entry_id, comment_id or "", stage, json.dumps(artifact),
+                     datetime.now().isoformat(timespec="seconds")),
+                )
+        except Exception as e:
+            # The journal only speeds up restarts; never fail an email over it
+            logger.error(f"⚠️ Could not record stage '{stage}' in job journal: {e}")
+
+    def load(self, entry_id):
+        """
+        Load every stage an email has completed.
+
+        Returns:
+            dict: stage -> artifact (empty if the email is unknown)
+        """
+        if not entry_id:
+            return {}
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT stage, artifact FROM stages WHERE entry_id = ?", (entry_id,)
+                ).fetchall()
+        except Exception as e:
+            logger.error(f"⚠️ Could not read job journal: {e}")
+            return {}
+        return {stage: json.loads(artifact) if artifact else None for stage, artifact in rows}
+
+    def last_stage(self, entry_id):
+        """Return the furthest stage an email has completed, or None"""
+        completed = self.load(entry_id)
+        for stage in reversed(STAGES):
+            if stage in completed:
+                return stage
+        return None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,355 @@
+# automation/mail_source.py
+
+import logging
+import mailbox
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+import os
+import threading
+from datetime import datetime, time, timedelta
+from email import policy
+from email.parser import BytesParser
+
+from automation.outlook_email_reader import connect_outlook, get_new_sap_notification_emails, get_unread_sap_notification_emails, get_unread_sap_notification_emails_in_range, mark_read_by_id
+from config.settings import MAIL_SOURCE, MAIL_SOURCE_PATH, OUTLOOK_EMAIL_SUBJECT_FILTER
+
+logger = logging.getLogger(__name__)
+
+
+class MailSource(ABC):
+    """
+    Where notification emails come from.
+
+    Items yielded by a source expose the Outlook MailItem properties the
+    pipeline reads - Subject, SenderName, ReceivedTime, HTMLBody, EntryID,
+    Unread - and Save(), which persists a change to Unread.
+    """
+
+    @abstractmethod
+    def unread_notifications(self, target_date):
+        """
+        Returns:
+            iterable: Unread notification emails received on target_date, oldest first
+        """
+
+    @abstractmethod
+    def unread_notifications_in_range(self, start_date=None, end_date=None):
+        """
+        Args:
+            start_date: First day to include, or None for no lower bound
+            end_date: Last day to include, or None for no upper bound
+
+        Returns:
+            iterable: Unread notification emails received in the range, oldest first
+        """
+
+    @abstractmethod
+    def new_notifications(self, since):
+        """
+        Returns:
+            iterable: Unread notification emails received after `since`
+                      (naive local datetime), oldest first
+        """
+
+    @abstractmethod
+    def open_writer(self):
+        """
+        Open a connection for updating read state from the calling thread
+        (see MailStateWriter).
+
+        Returns:
+            object: With mark_read(entry_id) and close()
+        """
+
+
+class OutlookMailSource(MailSource):
+    """The Outlook Inbox, read over COM (Windows only)"""
+
+    def __init__(self):
+        logger.info("Connecting to Outlook...")
+        self.outlook = connect_outlook()
+
+    def unread_notifications(self, target_date):
+        emails = get_unread_sap_notification_emails(self.outlook, target_date)
+        emails.reverse()  # Outlook returns newest first
+        return emails
+
+    def unread_notifications_in_range(self, start_date=None, end_date=None):
+        emails = get_unread_sap_notification_emails_in_range(self.outlook, start_date, end_date)
+        emails.reverse()
+        return emails
+
+    def new_notifications(self, since):
+        return get_new_sap_notification_emails(self.outlook, since)
+
+    def open_writer(self):
+        return OutlookMailWriter()
+
+
+class OutlookMailWriter:
+    """
+    Marks Outlook emails read by EntryID. COM objects can't be shared
+    between threads, so each writer initializes COM and connects to Outlook
+    on the thread that creates it, and must be used and closed there.
+    """
+
+    def __init__(self):
+        import pythoncom
+        pythoncom.CoInitialize()
+        self.outlook = connect_outlook()
+
+    def mark_read(self, entry_id):
+        mark_read_by_id(self.outlook, entry_id)
+
+    def close(self):
+        import pythoncom
+        self.outlook = None
+        pythoncom.CoUninitialize()
+
+
+class LocalMailItem:
+    """
+    A saved notification email standing in for an Outlook MailItem.
+
+    Only the headers are kept; HTMLBody is read from disk each time it is
+    accessed, so a long backlog of items costs little memory.
+    """
+
+    def __init__(self, source, entry_id, subject, sender, received_time, load_body):
+        self._source = source
+        self._load_body = load_body
+        self.EntryID = entry_id
+        self.Subject = subject
+        self.SenderName = sender
+        self.ReceivedTime = received_time
+        self.Unread = not source.is_read(entry_id)
+
+    @property
+    def HTMLBody(self):
+        return self._load_body()
+
+    def Save(self):
+        if not self.Unread:
+            self._source.mark_read(self.EntryID)
+
+
+class LocalMailSource(MailSource):
+    """
+    Saved SAP Help Portal notifications: a directory of .eml/.msg files or a
+    single mbox file.
+
+    Headers are indexed once per file (re-read only when a file changes) and
+    kept sorted by received time; items are yielded lazily from that index,
+    bodies being loaded on demand. Read state
+    lives in a sidecar "<path>.read" file (one EntryID per line), so a
+    replayed backlog is not processed twice.
+
+    .msg files need the optional extract_msg package; without it they are
+    skipped.
+
+    Args:
+        path: Directory of .eml/.msg files, or an mbox file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.read_state_path = path.rstrip("/\\") + ".read"
+        self._lock = threading.Lock()
+        self._index = {}   # file path or mbox key -> (mtime, header entry or None)
+        self._sorted = []     # Header entries of the index, oldest first
+        self._received = []   # Their received times, for bisecting
+        self._read_ids = set()
+        if os.path.exists(self.read_state_path):
+            with open(self.read_state_path, encoding="utf-8") as f:
+                self._read_ids = {line.strip() for line in f if line.strip()}
+        logger.info(f"Local mail source: {path} ({len(self._read_ids)} already read)")
+
+    def is_read(self, entry_id):
+        with self._lock:
+            return entry_id in self._read_ids
+
+    def mark_read(self, entry_id):
+        with self._lock:
+            if entry_id in self._read_ids:
+                return
+            self._read_ids.add(entry_id)
+            with open(self.read_state_path, "a", encoding="utf-8") as f:
+                f.write(entry_id + "\n")
+
+    def open_writer(self):
+        # Read state is a thread-safe file append; the source is its own writer
+        return self
+
+    def close(self):
+        pass
+
+    def unread_notifications(self, target_date):
+        start = datetime.combine(target_date, time())
+        return self._notifications(start, start + timedelta(days=1), inclusive=True)
+
+    def unread_notifications_in_range(self, start_date=None, end_date=None):
+        start = datetime.combine(start_date, time()) if start_date else datetime.min
+        end = datetime.combine(end_date + timedelta(days=1), time()) if end_date else None
+        return self._notifications(start, end, inclusive=True)
+
+    def new_notifications(self, since):
+        return self._notifications(since, None, inclusive=False)
+
+    def _notifications(self, start, end, inclusive):
+        self._refresh()
+        entries = self._sorted
+        first = (bisect_left if inclusive else bisect_right)(self._received, start)
+        count = 0
+        for i in range(first, len(entries)):
+            entry = entries[i]
+            if end is not None and entry["received"] >= end:
+                break
+            if self.is_read(entry["entry_id"]):
+                continue
+            count += 1
+            yield LocalMailItem(self, entry["entry_id"], entry["subject"], entry["sender"],
+                                entry["received"], entry["load_body"])
+        logger.info(f"✅ Listed {count} unread SAP notification emails from {self.path}")
+
+    def _refresh(self):
+        """Re-index files that are new or changed and re-sort the index if anything changed"""
+        changed = False
+        seen = set()
+        for key, mtime, read_headers in self._scan():
+            seen.add(key)
+            cached = self._index.get(key)
+            if cached and cached[0] == mtime:
+                continue
+            self._index[key] = (mtime, self._read_entry(key, read_headers))
+            changed = True
+        for key in [key for key in self._index if key not in seen]:
+            del self._index[key]
+            changed = True
+
+        if changed:
+            self._sorted = sorted((entry for _, entry in self._index.values() if entry),
+                                  key=lambda entry: entry["received"])
+            self._received = [entry["received"] for entry in self._sorted]
+
+    def _scan(self):
+        """(index key, mtime, header reader) of every email file or mbox message in the source"""
+        if os.path.isdir(self.path):
+            for name in sorted(os.listdir(self.path)):
+                file_path = os.path.join(self.path, name)
+                if name.lower().endswith((".eml", ".msg")):
+                    yield file_path, os.path.getmtime(file_path), self._read_file_headers
+        else:
+            box = mailbox.mbox(self.path, create=False)
+            mtime = os.path.getmtime(self.path)
+            for key in box.iterkeys():
+                yield (self.path, key), mtime, lambda k: self._read_mbox_headers(box, k[1])
+
+    def _read_entry(self, key, read_headers):
+        """Header entry of a notification email, or None for other or unreadable emails"""
+        try:
+            entry = read_headers(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read saved email {key}: {e}")
+            return None
+        if entry and OUTLOOK_EMAIL_SUBJECT_FILTER not in (entry["subject"] or ""):
+            return None
+        return entry
+
+    def _read_file_headers(self, file_path):
+        if file_path.lower().endswith(".msg"):
+            return _msg_headers(file_path)
+        with open(file_path, "rb") as f:
+            message = BytesParser(policy=policy.default).parse(f, headersonly=True)
+        return _entry(message, file_path, lambda: _eml_body(file_path))
+
+    def _read_mbox_headers(self, box, key):
+        message = BytesParser(policy=policy.default).parsebytes(box.get_bytes(key), headersonly=True)
+        mbox_path = self.path
+        return _entry(message, f"{mbox_path}#{key}", lambda: _mbox_body(mbox_path, key))
+
+
+def _local_time(value):
+    """Aware or naive datetime as a naive local datetime"""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _entry(message, fallback_id, load_body):
+    sender = message["From"]
+    addresses = getattr(sender, "addresses", ())
+    return {
+        "entry_id": str(message["Message-ID"] or fallback_id).strip(),
+        "subject": str(message["Subject"] or ""),
+        "sender": addresses[0].display_name or addresses[0].addr_spec if addresses else str(sender or ""),
+        "received": _local_time(message["Date"].datetime) if message["Date"] else datetime.min,
+        "load_body": load_body,
+    }
+
+
+def _html_body(message):
+    part = message.get_body(preferencelist=("html", "plain"))
+    return part.get_content() if part is not None else ""
+
+
+def _eml_body(file_path):
+    with open(file_path, "rb") as f:
+        return _html_body(BytesParser(policy=policy.default).parse(f))
+
+
+def _mbox_body(mbox_path, key):
+    box = mailbox.mbox(mbox_path, create=False)
+    return _html_body(BytesParser(policy=policy.default).parsebytes(box.get_bytes(key)))
+
+
+def _msg_headers(file_path):
+    try:
+        import extract_msg
+    except ImportError:
+        logger.warning(f"⚠️ Skipping {file_path}: reading .msg files needs the extract_msg package")
+        return None
+
+    message = extract_msg.Message(file_path)
+    try:
+        received = message.date
+        if isinstance(received, str):
+            from email.utils import parsedate_to_datetime
+            received = parsedate_to_datetime(received)
+        return {
+            "entry_id": (message.messageId or file_path).strip(),
+            "subject": message.subject or "",
+            "sender": message.sender or "",
+            "received": _local_time(received) if received else datetime.min,
+            "load_body": lambda: _msg_body(file_path),
+        }
+    finally:
+        message.close()
+
+
+def _msg_body(file_path):
+    import extract_msg
+
+    message = extract_msg.Message(file_path)
+    try:
+        body = message.htmlBody
+        return body.decode("utf-8", errors="replace") if isinstance(body, bytes) else (body or "")
+    finally:
+        message.close()
+
+
+def open_mail_source(kind=MAIL_SOURCE, path=MAIL_SOURCE_PATH):
+    """
+    Create the configured mail source.
+
+    Args:
+        kind: "outlook" or "local"
+        path: Directory or mbox file for the local source
+
+    Returns:
+        MailSource
+    """
+    if kind == "local":
+        if not path:
+            raise ValueError("MAIL_SOURCE_PATH must be set for the local mail source")
+        return LocalMailSource(path)
+    return OutlookMailSource()
@@ -0,0 +1,144 @@
+# automation/mail_state_writer.py
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from config.settings import MAIL_UPDATE_BATCH_SIZE, MAIL_UPDATE_FLUSH_SECONDS, MAIL_UPDATE_MAX_ATTEMPTS, MAIL_UPDATE_QUEUE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class MailStateWriter:
+    """
+    Marks processed notification emails as read on a dedicated thread.
+
+    Emails are queued by EntryID in a small SQLite table and applied in
+    batches through the mail source's writer (see MailSource.open_writer),
+    which owns its own Outlook connection. Browser work never waits on
+    Outlook, and failed updates are retried on the next flush. Updates a
+    crashed run left in the table are replayed when the writer starts.
+
+    Args:
+        mail_source: MailSource the emails came from
+        path: SQLite file holding the pending updates
+        batch_size: Updates applied per flush; a full batch flushes early
+        flush_seconds: Seconds between flushes
+        max_attempts: Attempts before an update is given up on
+    """
+
+    def __init__(self, mail_source, path=MAIL_UPDATE_QUEUE_PATH, batch_size=MAIL_UPDATE_BATCH_SIZE,
+                 flush_seconds=MAIL_UPDATE_FLUSH_SECONDS, max_attempts=MAIL_UPDATE_MAX_ATTEMPTS):
+        self.mail_source = mail_source
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_updates (
+                    entry_id  TEXT PRIMARY KEY,
+                    queued_at TEXT NOT NULL,
+                    attempts  INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+        replay = self.pending_count()
+        if replay:
+            logger.info(f"↩️ Replaying {replay} mailbox update(s) left by an earlier run")
+        self.thread = threading.Thread(target=self._run, name="mail-writer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def mark_read(self, entry_id):
+        """Queue an email to be marked as read. Returns once the update is persisted."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pending_updates (entry_id, queued_at) VALUES (?, ?)",
+                (entry_id, datetime.now().isoformat(timespec="seconds")),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM pending_updates").fetchone()[0]
+        if count >= self.batch_size:
+            self._wake.set()
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending_updates").fetchone()[0]
+
+    def close(self, timeout=30):
+        """Apply what is still queued and stop. Updates that still fail stay queued for the next run."""
+        self._stopping.set()
+        self._wake.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+        left = self.pending_count()
+        if left:
+            logger.warning(f"⚠️ {left} mailbox update(s) not applied yet; they will be replayed on the next start")
+        with self._lock:
+            self._conn.close()
+
+    def _pending(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT entry_id, attempts FROM pending_updates ORDER BY queued_at LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+
+    def _run(self):
+        try:
+            # The writer's connection belongs to this thread (COM apartment)
+            writer = self.mail_source.open_writer()
+        except Exception as e:
+            logger.error(f"⚠️ Mail writer could not connect; updates stay queued for the next run: {e}")
+            return
+
+        try:
+            while True:
+                self._wake.wait(self.flush_seconds)
+                self._wake.clear()
+                stopping = self._stopping.is_set()
+                # Keep flushing while full batches are waiting (or everything, when stopping)
+                while self._flush(writer) and (stopping or self.pending_count() >= self.batch_size):
+                    pass
+                if stopping:
+                    return
+        finally:
+            writer.close()
+
+    def _flush(self, writer):
+        """
+        Apply one batch of queued updates.
+
+        Returns:
+            bool: True if every update of a non-empty batch was applied
+        """
+        batch = self._pending()
+        applied = []
+        done = []      # applied or given up on
+        failed = []
+        for entry_id, attempts in batch:
+            try:
+                writer.mark_read(entry_id)
+                applied.append(entry_id)
+                done.append(entry_id)
+            except Exception as e:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    logger.error(f"⚠️ Giving up marking email {entry_id} as read after {attempts} attempts: {e}")
+                    done.append(entry_id)
+                else:
+                    logger.warning(f"⚠️ Could not mark email {entry_id} as read (attempt {attempts}), will retry: {e}")
+                    failed.append((attempts, entry_id))
+
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM pending_updates WHERE entry_id = ?",
+                                   [(entry_id,) for entry_id in done])
+            self._conn.executemany("UPDATE pending_updates SET attempts = ? WHERE entry_id = ?", failed)
+        if applied:
+            logger.info(f"✅ Marked {len(applied)} email(s) as Read")
+        return bool(batch) and not failed
@@ -0,0 +1,213 @@
+# automation/network_trace.py
+
+import json
+import logging
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from automation.tracing import record_span
+from config.settings import EDGE_NETWORK_TRACE, NETWORK_REPORT_TOP, SAP_HELP_PORTAL_BASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Requests still open after this long (long polling, sockets) are dropped
+STALE_REQUEST_SECONDS = 300
+
+PORTAL_HOST = urlsplit(SAP_HELP_PORTAL_BASE_URL).netloc
+
+
+def page_type(document_url):
+    """
+    Kind of page a request was made for: "Help Portal", "IXIA editor" (the
+    Oxygen Web Author frame) or the host name of any other page (the IXIA
+    document page, the sign-in server, ...).
+    """
+    parts = urlsplit(document_url or "")
+    if parts.netloc == PORTAL_HOST:
+        return "Help Portal"
+    if "webauthor" in parts.path.lower() or "oxygen" in parts.path.lower():
+        return "IXIA editor"
+    return parts.netloc or "unknown"
+
+
+def _resource_key(url):
+    """URL without query and fragment, so reloads of one resource add up"""
+    parts = urlsplit(url)
+    if parts.scheme == "data":
+        return "data: URL"
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def _initiator(initiator):
+    """'type' or 'type url' of a request's DevTools initiator"""
+    url = initiator.get("url")
+    frames = (initiator.get("stack") or {}).get("callFrames") or []
+    if not url and frames:
+        url = frames[0].get("url")
+    return f"{initiator.get('type', 'other')} {url}" if url else initiator.get("type", "other")
+
+
+class NetworkRecorder:
+    """
+    Per-request network instrumentation for Edge sessions (opt-in with
+    EDGE_NETWORK_TRACE).
+
+    launch_edge turns on the driver's performance log, which carries the
+    DevTools Network events of every tab. collect() drains it after each
+    pipeline stage and writes one "net:<resource type>" span per finished
+    request to the trace file: URL, page type, stage, status, transferred
+    bytes, time to first byte, initiator, and whether it came from the
+    cache or was blocked. Totals per page type and resource feed
+    network_report().
+
+    Args:
+        enabled: Record anything at all
+    """
+
+    def __init__(self, enabled=EDGE_NETWORK_TRACE):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._open = {}        # driver id -> {requestId: request being loaded}
+        self._pages = {}       # page type -> {"requests", "bytes", "blocked", "cached"}
+        self._resources = {}   # (page type, resource key) -> totals for the report
+        self._warned = False
+
+    def collect(self, driver, stage):
+        """
+        Record the requests that finished since the last call for this
+        driver, attributing them to stage.
+        """
+        if not self.enabled or driver is None:
+            return
+        try:
+            entries = driver.get_log("performance")
+        except Exception as e:
+            if not self._warned:
+                self._warned = True
+                logger.warning(f"⚠️ Network trace unavailable (performance log not enabled?): {e}")
+            return
+
+        # Each driver is collected from its own worker thread only
+        with self._lock:
+            open_requests = self._open.setdefault(id(driver), {})
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method", "")
+            if method.startswith("Network."):
+                self._handle(open_requests, method, message.get("params", {}), stage)
+
+        cutoff = time.monotonic() - STALE_REQUEST_SECONDS
+        for key in [key for key, request in open_requests.items() if request["seen"] < cutoff]:
+            del open_requests[key]
+
+    def _handle(self, open_requests, method, params, stage):
+        key = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            request = params.get("request", {})
+            if params.get("redirectResponse") and key in open_requests:
+                # The redirect hop is finished; the same requestId continues
+                self._finish(open_requests.pop(key), params["timestamp"], stage)
+            open_requests[key] = {
+                "url": request.get("url", ""),
+                "page": page_type(params.get("documentURL")),
+                "type": params.get("type", "Other"),
+                "initiator": _initiator(params.get("initiator", {})),
+                "start": params.get("timestamp", 0.0),
+                "wall": params.get("wallTime") or time.time(),
+                "seen": time.monotonic(),
+                "status": None,
+                "bytes": 0,
+                "ttfb_ms": None,
+                "cached": False,
+                "blocked": None,
+            }
+        elif key not in open_requests:
+            return
+        elif method == "Network.responseReceived":
+            request = open_requests[key]
+            response = params.get("response", {})
+            timing = response.get("timing") or {}
+            request["status"] = response.get("status")
+            request["cached"] = bool(response.get("fromDiskCache") or response.get("fromServiceWorker")
+                                     or response.get("fromPrefetchCache"))
+            if "receiveHeadersEnd" in timing and "sendEnd" in timing:
+                request["ttfb_ms"] = round(timing["receiveHeadersEnd"] - timing["sendEnd"], 1)
+            if params.get("type"):
+                request["type"] = params["type"]
+        elif method == "Network.dataReceived":
+            open_requests[key]["bytes"] += params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFinished":
+            request = open_requests.pop(key)
+            # encodedDataLength here includes the headers; prefer it when given
+            request["bytes"] = max(request["bytes"], params.get("encodedDataLength", 0))
+            self._finish(request, params.get("timestamp", request["start"]), stage)
+        elif method == "Network.loadingFailed":
+            request = open_requests.pop(key)
+            request["blocked"] = params.get("blockedReason") or None
+            request["error"] = params.get("errorText")
+            self._finish(request, params.get("timestamp", request["start"]), stage)
+
+    def _finish(self, request, end, stage):
+        duration = max(0.0, end - request["start"])
+        record_span(
+            f"net:{request['type'].lower()}", request["wall"], duration, aggregate=False,
+            stage=stage, page=request["page"], url=request["url"], status=request["status"],
+            bytes=request["bytes"], ttfb_ms=request["ttfb_ms"], initiator=request["initiator"],
+            cached=request["cached"], blocked=request["blocked"], failed=request.get("error"),
+        )
+
+        with self._lock:
+            page = self._pages.setdefault(request["page"], {"requests": 0, "bytes": 0, "blocked": 0, "cached": 0})
+            page["requests"] += 1
+            page["bytes"] += request["bytes"]
+            page["blocked"] += request["blocked"] is not None
+            page["cached"] += request["cached"]
+            if request["blocked"] is not None:
+                return
+            resource = self._resources.setdefault((request["page"], _resource_key(request["url"])), {
+                "type": request["type"], "initiator": request["initiator"],
+                "count": 0, "bytes": 0, "seconds": 0.0, "max": 0.0,
+            })
+            resource["count"] += 1
+            resource["bytes"] += request["bytes"]
+            resource["seconds"] += duration
+            resource["max"] = max(resource["max"], duration)
+
+    def report(self, top=NETWORK_REPORT_TOP):
+        """
+        Network lines for the run summary: per page type the request and
+        byte totals, then its heaviest resources (total bytes transferred)
+        and slowest resources (average load time).
+
+        Returns:
+            list: Formatted lines, empty if nothing was recorded
+        """
+        with self._lock:
+            pages = {name: dict(totals) for name, totals in self._pages.items()}
+            resources = {key: dict(totals) for key, totals in self._resources.items()}
+
+        lines = []
+        for name, totals in sorted(pages.items(), key=lambda item: -item[1]["bytes"]):
+            lines.append(f"{name}: {totals['requests']} requests, {totals['bytes'] / 1e6:.2f} MB, "
+                         f"{totals['cached']} from cache, {totals['blocked']} blocked")
+            own = [(url, r) for (page, url), r in resources.items() if page == name]
+            for url, r in sorted(own, key=lambda item: -item[1]["bytes"])[:top]:
+                lines.append(f"{name} heaviest: {r['bytes'] / 1e3:.0f} kB in {r['count']}x {r['type']} "
+                             f"{url} (initiator: {r['initiator']})")
+            for url, r in sorted(own, key=lambda item: -item[1]["seconds"] / item[1]["count"])[:top]:
+                lines.append(f"{name} slowest: {r['seconds'] / r['count']:.2f}s avg, {r['max']:.2f}s max "
+                             f"in {r['count']}x {r['type']} {url}")
+        return lines
+
+
+# Shared by every browser session of the process
+network_recorder = NetworkRecorder()
+
+
+def network_report(top=NETWORK_REPORT_TOP):
+    """Lines for the run summary (see NetworkRecorder.report)"""
+    return network_recorder.report(top)
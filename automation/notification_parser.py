@@ -0,0 +1,158 @@
+# automation/notification_parser.py
+
+import logging
+import re
+import threading
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # Fall back to BeautifulSoup via extract_breadcrumb_link
+    lxml_html = None
+
+from automation.outlook_email_reader import extract_breadcrumb_link
+
+logger = logging.getLogger(__name__)
+
+# Paragraphs of the comment cell that are metadata, not comment text
+METADATA_MARKERS = ("Status:", "(Modified)", "UTC")
+
+# lxml refuses str input that starts with an encoding declaration
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+_cache_lock = threading.Lock()
+_cache = {}   # EntryID -> NotificationRecord
+
+
+class NotificationRecord:
+    """Everything the pipeline needs from one notification email, read once"""
+
+    __slots__ = (
+        "entry_id",
+        "subject",
+        "sender",
+        "received_time",      # naive local datetime
+        "breadcrumb_url",
+        "link_text",
+        "comment_text",
+        "status",             # e.g. "Open", from the "Status: ..." line
+        "comment_id",         # comment_id query parameter of the breadcrumb URL
+        "comment_timestamp",  # comment date line as shown in the email (UTC)
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def to_dict(self):
+        """JSON-serializable form, as stored in the job journal"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.received_time is not None:
+            data["received_time"] = self.received_time.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        fields = dict(data)
+        if fields.get("received_time"):
+            fields["received_time"] = datetime.fromisoformat(fields["received_time"])
+        return cls(**fields)
+
+
+def comment_id_from_url(url):
+    """Return the comment_id query parameter of a breadcrumb URL, or None"""
+    if not url:
+        return None
+    values = parse_qs(urlsplit(url).query).get("comment_id")
+    return values[0] if values else None
+
+
+def parse_notification(email, stored=None):
+    """
+    Read an email's metadata and parse its HTML body in one pass.
+
+    Records are cached by EntryID for the life of the process, and a record
+    stored by an earlier run (the job journal's "extracted" artifact) is
+    used instead of the email when given, so an email is parsed at most once.
+
+    Args:
+        email: Notification email (Outlook MailItem or compatible)
+        stored: NotificationRecord.to_dict() output from an earlier run, or None
+
+    Returns:
+        NotificationRecord: breadcrumb_url is None if the body could not be parsed
+    """
+    entry_id = getattr(email, "EntryID", None)
+    if entry_id:
+        with _cache_lock:
+            record = _cache.get(entry_id)
+        if record is not None:
+            return record
+
+    # Journal entries written before the record existed only hold the link
+    # fields; those emails are parsed again once
+    if stored and "entry_id" in stored:
+        record = NotificationRecord.from_dict(stored)
+    else:
+        received_time = email.ReceivedTime
+        record = NotificationRecord(
+            entry_id=entry_id,
+            subject=email.Subject,
+            sender=email.SenderName,
+            received_time=received_time.replace(tzinfo=None) if received_time else None,
+        )
+        _parse_body(email, record)
+
+    if entry_id and record.breadcrumb_url:
+        with _cache_lock:
+            _cache[entry_id] = record
+    return record
+
+
+def _parse_body(email, record):
+    """Fill the link and comment fields of record from the email's HTML body"""
+    doc = None
+    if lxml_html is not None:
+        try:
+            doc = lxml_html.fromstring(XML_DECLARATION.sub("", email.HTMLBody, count=1))
+        except Exception as e:
+            logger.warning(f"⚠️ lxml could not parse notification email body, falling back to BeautifulSoup: {e}")
+
+    if doc is None:
+        record.breadcrumb_url, record.link_text, record.comment_text = extract_breadcrumb_link(email)
+        record.comment_id = comment_id_from_url(record.breadcrumb_url)
+        return
+
+    # Breadcrumb link is the 2nd <a> tag
+    links = doc.xpath("//a")
+    if len(links) < 2:
+        logger.warning("⚠️ Less than 2 links found in email.")
+        return
+    record.breadcrumb_url = links[1].get("href")
+    record.link_text = links[1].text_content().strip()
+    record.comment_id = comment_id_from_url(record.breadcrumb_url)
+
+    # Comment text and metadata live in the padded table cells
+    for cell in doc.xpath("//td[contains(@style, 'padding: 16px')]"):
+        paragraphs = [p.text_content().strip() for p in cell.iter("p")]
+        for text in paragraphs:
+            if record.status is None and "Status:" in text:
+                record.status = text.split("Status:", 1)[1].strip()
+            elif record.comment_timestamp is None and "UTC" in text:
+                record.comment_timestamp = text
+
+        if record.comment_text is not None:
+            continue
+        # Skip cells that are just headers
+        cell_text = cell.text_content()
+        if "Status:" in cell_text and len(cell_text) < 100:
+            continue
+        if paragraphs:
+            record.comment_text = " ".join(
+                text for text in paragraphs if not any(marker in text for marker in METADATA_MARKERS)
+            )
+
+    logger.info(f"✅ Parsed notification: {record.link_text} -> {record.breadcrumb_url}")
+    if not record.comment_text:
+        logger.warning("⚠️ Could not extract comment text from email.")
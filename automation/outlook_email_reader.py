@@ -1,45 +1,162 @@
 # automation/outlook_email_reader.py
 
-import win32com.client
 import time
 from bs4 import BeautifulSoup
 import webbrowser
 import datetime
 
+from config.settings import OUTLOOK_EMAIL_SUBJECT_FILTER
+
 def connect_outlook():
     """
     Connects to the Outlook application using pywin32.
     Returns the Outlook namespace object.
     """
+    # Imported here so the rest of the module works on machines without Outlook
+    import win32com.client
     outlook = win32com.client.Dispatch("Outlook.Application").GetNamespace("MAPI")
     return outlook
 
 def get_unread_sap_notification_emails(outlook, target_date):
     """
     Gets unread SAP Help Portal Notification emails received on target_date.
-    Returns a list of email items.
+    Returns a list of email items, newest first.
+    """
+    start = datetime.datetime.combine(target_date, datetime.time())
+    matches = find_sap_notification_emails(outlook, start, start + datetime.timedelta(days=1))
+    unread_sap_emails = [message for _, message in matches]
+
+    print(f"✅ Found {len(unread_sap_emails)} unread SAP notification emails on {target_date}.")
+    return unread_sap_emails
+
+def get_unread_sap_notification_emails_in_range(outlook, start_date=None, end_date=None):
+    """
+    Gets unread SAP Help Portal Notification emails received from start_date
+    through end_date (both inclusive) in a single scan, for working through
+    a backlog of several days at once. Either bound may be None.
+
+    Returns:
+        list: Email items, newest first
+    """
+    start = datetime.datetime.combine(start_date, datetime.time()) if start_date else None
+    end = datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time()) if end_date else None
+    matches = find_sap_notification_emails(outlook, start, end)
+    unread_sap_emails = [message for _, message in matches]
+
+    print(f"✅ Found {len(unread_sap_emails)} unread SAP notification emails "
+          f"from {start_date or 'the beginning'} to {end_date or 'today'}.")
+    return unread_sap_emails
+
+def get_new_sap_notification_emails(outlook, since):
+    """
+    Gets unread SAP Help Portal Notification emails received after `since`,
+    so each poll only touches mail that arrived since the last one.
+
+    Args:
+        outlook: Outlook namespace object
+        since: Naive local datetime high-water mark
+
+    Returns:
+        list: Email items, oldest first
+    """
+    matches = find_sap_notification_emails(outlook, since)
+    new_sap_emails = [message for received, message in matches if received > since]
+
+    new_sap_emails.reverse()
+    return new_sap_emails
+
+def find_sap_notification_emails(outlook, start, end=None):
+    """
+    Finds unread SAP notification emails received in [start, end) with the
+    filtering done by Outlook: a DASL restriction on read state, subject and
+    received time, read back through a Table holding only the EntryID and
+    ReceivedTime columns. Only matching items are ever opened, so the scan
+    time depends on the number of matches rather than the mailbox size.
+
+    Falls back to Items.Restrict with the same filter if the Table can't
+    be used.
+
+    Args:
+        outlook: Outlook namespace object
+        start: Naive local datetime, inclusive (None = no lower bound)
+        end: Naive local datetime, exclusive (None = no upper bound)
+
+    Returns:
+        list: (received_time, email item) tuples, newest first
     """
     inbox = outlook.GetDefaultFolder(6)  # 6 = Inbox
+    dasl = _notification_filter(start, end)
 
-    messages = inbox.Items
-    messages.Sort("[ReceivedTime]", True)  # newest first
+    matches = []
+    try:
+        table = inbox.GetTable(dasl)
+        table.Columns.RemoveAll()
+        table.Columns.Add("EntryID")
+        table.Columns.Add("ReceivedTime")
+        table.Sort("[ReceivedTime]", True)  # newest first
+
+        while not table.EndOfTable:
+            entry_id, received = table.GetNextRow().GetValues()
+            received = received.replace(tzinfo=None)
+            # The restriction works at minute precision; trim to the exact range
+            if (start and received < start) or (end and received >= end):
+                continue
+            try:
+                matches.append((received, outlook.GetItemFromID(entry_id)))
+            except Exception as e:
+                print(f"⚠️ Error while opening email: {e}")
+        return matches
 
-    unread_sap_emails = []
+    except Exception as e:
+        print(f"⚠️ Outlook table scan failed ({e}), falling back to a restricted item scan")
 
+    messages = inbox.Items.Restrict(dasl)
+    messages.Sort("[ReceivedTime]", True)  # newest first
+    matches = []
     for message in messages:
         try:
-            if message.Unread and "SAP Help Portal: Comment Notification" in message.Subject:
-                email_date = message.ReceivedTime.date()
-
-                if email_date == target_date:
-                    unread_sap_emails.append(message)
-
+            received = received_time(message)
+            if not (start and received < start) and not (end and received >= end):
+                matches.append((received, message))
         except Exception as e:
             print(f"⚠️ Error while processing email: {e}")
             continue
+    return matches
+
+def _notification_filter(start, end=None):
+    """DASL filter for unread notification emails received in [start, end); None = unbounded"""
+    subject = OUTLOOK_EMAIL_SUBJECT_FILTER.replace("'", "''")
+    conditions = [
+        '"urn:schemas:httpmail:read" = 0',
+        f'"urn:schemas:httpmail:subject" LIKE \'%{subject}%\'',
+    ]
+    if start:
+        conditions.append(f'"urn:schemas:httpmail:datereceived" >= \'{_dasl_time(start)}\'')
+    if end:
+        conditions.append(f'"urn:schemas:httpmail:datereceived" < \'{_dasl_time(end)}\'')
+    return "@SQL=" + " AND ".join(conditions)
+
+def _dasl_time(local_time):
+    """Naive local datetime as a DASL date literal; DASL compares dates in UTC"""
+    utc = local_time.astimezone(datetime.timezone.utc)
+    return utc.strftime("%m/%d/%Y %H:%M")
+
+def received_time(email_item):
+    """Email's ReceivedTime as a naive local datetime (COM returns a timezone-aware one)"""
+    return email_item.ReceivedTime.replace(tzinfo=None)
+
+def mark_read_by_id(outlook, entry_id):
+    """
+    Marks the email with the given EntryID as read.
 
-    print(f"✅ Found {len(unread_sap_emails)} unread SAP notification emails on {target_date}.")
-    return unread_sap_emails
+    Args:
+        outlook: Outlook namespace object owned by the calling thread
+        entry_id: EntryID of the email
+    """
+    email_item = outlook.GetItemFromID(entry_id)
+    if email_item.Unread:
+        email_item.Unread = False
+        email_item.Save()
 
 def extract_breadcrumb_link(email_item):
     """
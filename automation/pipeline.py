@@ -0,0 +1,1403 @@
+# automation/pipeline.py
+
+import functools
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+from automation.network_trace import network_recorder
+from automation.notification_parser import parse_notification
+from automation.job_journal import STAGE_AI_OUTPUT, STAGE_APPLIED, STAGE_CHECKED_IN, STAGE_COMMENT_CAPTURED, STAGE_EXTRACTED, STAGES
+from automation.browser_automation import apply_modified_xml, capture_comment_text, check_in_outcome, capture_full_xml_source, capture_underlined_text, click_check_in_button, click_edit_as_xml, click_edit_button, click_edit_in_IXIA_dropdown, click_more_button, apply_network_blocking, clean_title, close_tab, ensure_ixia_authenticated, fetch_ccms_xml, get_ixia_editor_url, get_page_title, harvest_page_comments, launch_edge, open_help_portal_page, save_ccms_xml, titles_match, verify_page_and_enable_comments
+from automation.tracing import record_span, span, trace_context
+from automation.topic_url_cache import topic_url_cache
+from automation.readiness import CHECK_IN_BUTTON, comments_highlighted, element_clickable, wait_until, window_count
+from ai.ai_processor import process_dita_comment
+from config.settings import AI_WORKERS, BROWSER_WORKERS, CCMS_XML_SAVE_URL, EDGE_BLOCKED_URLS_IXIA, EDGE_PROFILE_ROOT, PIPELINE_INGEST_CHUNK, PIPELINE_MAX_IN_FLIGHT, PIPELINE_QUEUE_SIZE, WAIT_TIME_CHECK_IN_CONFIRM
+
+logger = logging.getLogger(__name__)
+
+# How long idle stages block on a queue before re-checking for shutdown
+QUEUE_POLL_SECONDS = 0.5
+
+# How often submitted check-ins are checked on (see BrowserSession.verify_check_ins)
+CHECK_IN_POLL_SECONDS = 1.0
+
+# Restart the browser after this many consecutive failed emails
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+def ordinal(n):
+    """Return n with its English ordinal suffix (1st, 2nd, 3rd, 4th, ...)"""
+    return "%d%s" % (n, "tsnrhtdd"[(n // 10 % 10 != 1) * (n % 10 < 4) * n % 10::4])
+
+
+def topic_key(url):
+    """
+    Reduce a breadcrumb URL to the Help Portal topic it points at.
+
+    Notification links carry per-comment query parameters (comment_id,
+    show_comments, ...), so two comments on the same topic have different
+    URLs. The scheme, host and path identify the topic itself.
+    """
+    if not url:
+        return None
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip("/"), "", ""))
+
+
+def is_driver_responsive(driver):
+    """Check if the WebDriver is still responsive"""
+    try:
+        # Try a simple command to check if driver is responsive
+        driver.current_url
+        return True
+    except Exception:
+        logger.error("WebDriver is no longer responsive")
+        return False
+
+
+class EmailJob:
+    """State of one notification email as it moves through the pipeline stages"""
+
+    def __init__(self, email, position, position_info, target_date):
+        self.email = email
+        self.position = position
+        self.position_info = position_info
+        self.target_date = target_date
+
+        # Filled in by ingest_email
+        self.subject = None
+        self.sender = None
+        self.received_time = None
+        self.breadcrumb_url = None
+        self.link_text = None
+        self.email_comment_text = None
+        self.topic = None
+        self.entry_id = None
+        self.comment_id = None
+        self.record = None         # NotificationRecord the fields above come from
+
+        # Stages completed in an earlier run (stage -> artifact), see JobJournal
+        self.journal = None
+        self.resume = {}
+
+        # Filled in by the browser and AI stages
+        self.comment_data = None
+        self.underlined_text = None
+        self.full_xml = None       # XML the AI was given for this comment
+        self.modified_xml = None
+        self.explanation = None
+
+        self.already_implemented = False
+        self.check_in = None           # "submitted", then "completed", "failed" or "unconfirmed"
+        self.check_in_detail = None
+        self.check_in_seconds = None   # Submission to confirmation
+        self.success = False
+        self.error = None
+        self.superseded_by = None  # Newer notification of the same comment, see coalesce_jobs
+
+
+class TopicBatch:
+    """
+    All queued emails for one Help Portal topic, handled in a single editor
+    session: the XML is captured once, every comment is applied in received
+    order to the in-memory XML, and the document is checked in once.
+    """
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.jobs = []             # Oldest-first
+        self.active_jobs = []      # Jobs whose comment was captured on the portal
+        self.worker = None         # BrowserWorker the topic is pinned to
+
+        self.editor_handle = None
+        self.full_xml = None       # XML as captured from the editor (or the CCMS backend)
+        self.direct_xml = False    # full_xml was fetched without booting the editor
+        self.final_xml = None      # XML after every comment has been applied
+        self.success = False
+
+    @property
+    def check_in_pending(self):
+        return any(job.check_in == "submitted" for job in self.jobs)
+
+    @property
+    def position_info(self):
+        positions = ", ".join(f"#{job.position}" for job in self.jobs)
+        return f"topic '{self.jobs[0].link_text}' ({len(self.jobs)} email(s): {positions})"
+
+
+class BrowserSession:
+    """
+    One Edge driver plus the per-session state the browser stages depend on.
+
+    The session owns the browser's tabs: one portal tab that every topic is
+    opened in, one editor tab per topic in flight, and at most one idle
+    editor tab kept from a finished topic for the next one to reuse.
+    Failed topics' editor tabs are closed, so long runs don't pile up tabs.
+
+    Check-ins are only submitted by the apply stage; the session keeps the
+    submitted topics and confirms them later (see verify_check_ins), so the
+    browser can move on to the next topic right away.
+    """
+
+    def __init__(self, driver=None, authentication_done=False, profile_dir=None):
+        self.driver = driver
+        self.authentication_done = authentication_done
+        self.profile_dir = profile_dir
+        self.portal_handle = None
+        self.idle_editor_handle = None
+        self.pending_check_ins = []   # (batch, submitted monotonic, submitted wall clock)
+        self._next_check_in_poll = 0.0
+
+    def ensure_driver(self):
+        """Return a responsive driver, launching a new browser if needed"""
+        if self.driver is None or not is_driver_responsive(self.driver):
+            if self.driver is not None:
+                logger.warning("⚠️ Browser appears to be unresponsive. Restarting browser...")
+            self.restart()
+        if self.portal_handle is None:
+            self.portal_handle = self.driver.current_window_handle
+        return self.driver
+
+    def restart(self):
+        """Quit the current browser (if any) and launch a fresh one"""
+        self.quit()
+        self.driver = launch_edge(profile_dir=self.profile_dir)
+        self.authentication_done = False  # Reset authentication flag for new browser
+        self.portal_handle = self.driver.current_window_handle
+        logger.info("✅ Launched new browser instance")
+
+    def quit(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+                logger.info("✅ Closed browser instance")
+            except Exception:
+                logger.error("⚠️ Error closing browser instance")
+        self.driver = None
+        self.portal_handle = None
+        self.idle_editor_handle = None
+
+    def open_editor_tab(self):
+        """
+        Open the portal tab's topic in IXIA CCMS Web (the 'More' dropdown must
+        already be open) and switch to its tab. The idle editor tab is
+        navigated to the topic when the dropdown option is a plain link;
+        otherwise the option is clicked and opens a new tab.
+
+        Returns:
+            str: Window handle of the editor tab
+        """
+        driver = self.driver
+        url = get_ixia_editor_url(driver) if self.idle_editor_handle else None
+        if url:
+            handle, self.idle_editor_handle = self.idle_editor_handle, None
+            try:
+                driver.switch_to.window(handle)
+                driver.get(url)
+                logger.info("♻️ Reusing idle editor tab")
+                return handle
+            except Exception as e:
+                logger.warning(f"⚠️ Could not reuse idle editor tab: {e}")
+                driver.switch_to.window(self.portal_handle)
+
+        before = set(driver.window_handles)
+        click_edit_in_IXIA_dropdown(driver)
+        wait_until(driver, window_count(len(before) + 1), 15, "IXIA tab opened")
+        opened = [h for h in driver.window_handles if h not in before]
+        driver.switch_to.window(opened[-1] if opened else driver.window_handles[-1])
+        apply_network_blocking(driver, EDGE_BLOCKED_URLS_IXIA)
+        return driver.current_window_handle
+
+    def submit_check_in(self, batch):
+        """Track a batch whose check-in was submitted until it is confirmed"""
+        self.pending_check_ins.append((batch, time.monotonic(), time.time()))
+
+    def verify_check_ins(self, wait=False, timeout=WAIT_TIME_CHECK_IN_CONFIRM):
+        """
+        Check on the submitted check-ins. Without wait, each editor tab is
+        looked at once (at most every CHECK_IN_POLL_SECONDS) and whatever is
+        still running is left for the next call; with wait, this returns
+        once every check-in has settled. The current tab is restored.
+
+        A check-in is settled when the page reports it completed or failed,
+        or after timeout seconds as "unconfirmed". Only emails of a completed
+        check-in keep their success and are journaled as checked in; the
+        others stay unread for a later run. Settled editor tabs are not
+        released; that is up to the caller.
+
+        Returns:
+            list: Batches whose check-in settled
+        """
+        settled = []
+        while self.pending_check_ins:
+            now = time.monotonic()
+            if not wait and now < self._next_check_in_poll:
+                break
+            self._next_check_in_poll = now + CHECK_IN_POLL_SECONDS
+
+            current = self._current_handle()
+            still_pending = []
+            for entry in self.pending_check_ins:
+                batch, submitted, submitted_wall = entry
+                state, detail = self._check_in_state(batch)
+                elapsed = time.monotonic() - submitted
+                if state == "submitted":
+                    if elapsed < timeout:
+                        still_pending.append(entry)
+                        continue
+                    state, detail = "unconfirmed", f"no confirmation after {timeout}s"
+                _settle_check_in(batch, state, detail, elapsed, submitted_wall)
+                settled.append(batch)
+            self.pending_check_ins = still_pending
+            if current and self.driver is not None:
+                try:
+                    self.driver.switch_to.window(current)
+                except Exception:
+                    pass
+
+            if not wait:
+                break
+            if still_pending:
+                time.sleep(CHECK_IN_POLL_SECONDS)
+        return settled
+
+    def _current_handle(self):
+        try:
+            return self.driver.current_window_handle if self.driver is not None else None
+        except Exception:
+            return None
+
+    def _check_in_state(self, batch):
+        if self.driver is None:
+            return "unconfirmed", "browser closed before confirmation"
+        try:
+            self.driver.switch_to.window(batch.editor_handle)
+            return check_in_outcome(self.driver)
+        except Exception as e:
+            return "unconfirmed", f"could not read check-in state: {e}"
+
+    def release_editor_tab(self, handle, reusable):
+        """
+        Done with a topic's editor tab: keep it as the idle tab if the topic
+        was checked in and no tab is idle yet, close it otherwise.
+        """
+        if not handle or self.driver is None:
+            return
+        if reusable and self.idle_editor_handle is None:
+            self.idle_editor_handle = handle
+            return
+        close_tab(self.driver, handle, self.portal_handle)
+
+    def close_idle_editor_tab(self):
+        """Close the idle editor tab, e.g. before the session is discarded"""
+        if self.idle_editor_handle and self.driver is not None:
+            close_tab(self.driver, self.idle_editor_handle, self.portal_handle)
+        self.idle_editor_handle = None
+
+
+def _trace_for(target):
+    """Tag spans with the email (EmailJob) or topic (TopicBatch) being worked on"""
+    if isinstance(target, TopicBatch):
+        return trace_context(topic=target.topic,
+                             emails=[job.entry_id or job.position for job in target.active_jobs or target.jobs])
+    return trace_context(email=target.entry_id or target.position, comment_id=target.comment_id,
+                         topic=target.topic)
+
+
+def _stage(name):
+    """
+    Decorator running a stage function in a 'stage:<name>' span tagged with
+    its email/topic. For browser stages the network trace (if enabled) is
+    collected before and after, so requests are attributed to the stage.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = next(a for a in args if isinstance(a, (EmailJob, TopicBatch)))
+            session = next((a for a in args if isinstance(a, BrowserSession)), None)
+            if session is not None:
+                network_recorder.collect(session.driver, "between stages")
+            with _trace_for(target):
+                try:
+                    with span(f"stage:{name}"):
+                        return func(*args, **kwargs)
+                finally:
+                    if session is not None:
+                        network_recorder.collect(session.driver, name)
+        return wrapper
+    return decorator
+
+
+def _fail(job, message):
+    """Record a stage failure on the job and log it"""
+    job.error = message
+    logger.warning(f"⚠️ {message}. Skipping email {job.position_info}.")
+    return False
+
+
+def _fail_batch(batch, message):
+    """Record a topic-level failure on every email of the batch"""
+    for job in batch.active_jobs:
+        job.error = message
+    logger.warning(f"⚠️ {message}. Skipping {batch.position_info}.")
+    return False
+
+
+def _log_stage_error(job, stage, e, driver=None):
+    """Log an unexpected stage exception and save an error screenshot"""
+    job.error = f"{stage}: {e}"
+    logger.error(f"⚠️ Error processing email {job.position_info} during {stage}: {e}")
+    logger.error(traceback.format_exc())
+    _save_error_screenshot(driver)
+
+
+def _save_error_screenshot(driver):
+    """Take screenshot if driver is available"""
+    if driver:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        screenshot_file = f"error_{timestamp}.png"
+        try:
+            driver.save_screenshot(screenshot_file)
+            logger.info(f"✅ Error screenshot saved as {screenshot_file}")
+        except Exception:
+            logger.error("⚠️ Failed to save error screenshot")
+
+
+def _checkpoint(job, stage, artifact=None):
+    """Record a completed stage in the job journal (if journaling is enabled)"""
+    if job.journal is not None:
+        job.journal.record(job.entry_id, job.comment_id, stage, artifact)
+
+
+@_stage("mail_ingestion")
+def ingest_email(job, journal=None):
+    """
+    Stage 1 (mail ingestion): read the email metadata and extract the
+    breadcrumb link, link text and comment text (see parse_notification).
+
+    Runs on the thread that owns the Outlook COM objects. With a journal,
+    emails checked in by an earlier run are finished here (job.success is
+    set) and the others pick up the stages they already completed.
+
+    Returns:
+        bool: True if the job can continue to the browser stages
+    """
+    try:
+        email = job.email
+        job.journal = journal
+        job.entry_id = getattr(email, "EntryID", None)
+        if journal is not None:
+            job.resume = journal.load(job.entry_id)
+            if job.resume:
+                last = [stage for stage in STAGES if stage in job.resume][-1]
+                logger.info(f"↩️ Job journal: {job.position_info} last completed stage '{last}'")
+
+        # Metadata and body are read once; the journal's copy spares the re-parse
+        stored = job.resume.get(STAGE_EXTRACTED)
+        record = parse_notification(email, stored)
+        job.record = record
+        job.subject = record.subject
+        job.sender = record.sender
+        job.received_time = record.received_time
+
+        logger.info(f"\nIngesting email: {job.position_info}")
+        logger.info(f"Subject: {job.subject}")
+        logger.info(f"From: {job.sender}")
+        logger.info(f"Time: {job.received_time.strftime('%H:%M:%S')}")
+
+        if STAGE_CHECKED_IN in job.resume:
+            logger.info(f"✅ Email {job.position_info} was already checked in by an earlier run - skipping")
+            job.already_implemented = bool((job.resume[STAGE_CHECKED_IN] or {}).get("already_implemented"))
+            job.success = True
+            return False
+
+        job.breadcrumb_url = record.breadcrumb_url
+        job.link_text = record.link_text
+        job.email_comment_text = record.comment_text
+        if not job.breadcrumb_url:
+            return _fail(job, "Could not extract breadcrumb URL")
+
+        job.topic = topic_key(job.breadcrumb_url)
+        job.comment_id = record.comment_id
+        if stored and "entry_id" in stored:
+            logger.info("↩️ Reused extracted email content from the job journal")
+        else:
+            _checkpoint(job, STAGE_EXTRACTED, record.to_dict())
+        return True
+
+    except Exception as e:
+        _log_stage_error(job, "mail ingestion", e)
+        return False
+
+
+def open_topic_page(driver, job):
+    """
+    Open the job's Help Portal topic with comments enabled.
+
+    Topics whose breadcrumb link was resolved through the portal filters and
+    search before are opened at the remembered URL (see TopicUrlCache), so
+    the filters and search only run the first time. A remembered URL whose
+    page fails the title check is dropped and the topic resolved again.
+    """
+    cached_url = topic_url_cache.lookup(job.breadcrumb_url, job.link_text)
+    if cached_url:
+        open_help_portal_page(driver, cached_url)
+        if titles_match(clean_title(get_page_title(driver)), clean_title(job.link_text)):
+            logger.info(f"⚡ Opened remembered topic URL, skipping filters and search: {cached_url}")
+            return True
+        topic_url_cache.invalidate(job.breadcrumb_url, job.link_text)
+    # Resolve the breadcrumb link as if nothing was cached
+    open_help_portal_page(driver, job.breadcrumb_url)
+
+    # Verify we're on the correct page, handle filters if needed, and search if necessary
+    verified = verify_page_and_enable_comments(driver,
+                                               expected_title=job.link_text,  # For title comparison
+                                               breadcrumb_text=job.link_text)  # For search functionality
+    # Remember where the breadcrumb link really leads when it took a search to get there
+    if verified and topic_key(driver.current_url) != topic_key(job.breadcrumb_url):
+        topic_url_cache.remember(job.breadcrumb_url, job.link_text, driver.current_url)
+    return verified
+
+
+@_stage("portal_capture")
+def capture_portal(session, job):
+    """
+    Stage 2 (portal capture): open the Help Portal page in the portal tab and
+    capture the highlighted comment and underlined text.
+
+    Returns:
+        bool: True if the comment was captured
+    """
+    driver = session.driver
+    try:
+        logger.info(f"\n🌐 Portal capture for {job.position_info}")
+
+        # Always drive the portal from its own tab so open editor tabs of
+        # topics still waiting on the AI stage are left untouched
+        driver.switch_to.window(session.portal_handle)
+        open_topic_page(driver, job)
+
+        captured = job.resume.get(STAGE_COMMENT_CAPTURED)
+        if captured:
+            # The page is still needed to reach the editor, the comment is not
+            logger.info("↩️ Reusing captured comment and underline info from the job journal")
+            job.comment_data = captured["comment_data"]
+            job.underlined_text = captured["underlined_text"]
+            return True
+
+        # Wait for dynamic comment highlighting
+        wait_until(driver, comments_highlighted(), 15, "comment highlighting")
+
+        # Capture comment text with HTML
+        comment_data = capture_comment_text(driver, job.email_comment_text)
+        if not comment_data:
+            return _fail(job, "Could not capture comment text")
+
+        logger.info("\n✅ Captured Comment Text:\n" + str(comment_data['text']))
+        logger.info("\n✅ Captured Comment HTML:\n" + str(comment_data['html']))
+        job.comment_data = comment_data
+
+        # Capture highlighted underlined text
+        _set_underlined_text(job, capture_underlined_text(driver))
+        return True
+
+    except Exception as e:
+        _log_stage_error(job, "portal capture", e, driver)
+        return False
+
+
+def _set_underlined_text(job, underlined_text):
+    """Store the job's underline info (or the new-content placeholder) and checkpoint the capture"""
+    if not underlined_text:
+        logger.info("ℹ️ No underlined text found - this might be a new content request")
+        # Create a minimal structure for underlined_text to prevent crashes
+        underlined_text = {
+            "visible_text": "",
+            "comment_id": None,
+            "context": "",
+            "element_type": "unknown",
+            "parent_path": "",
+            "has_conkeyref": False,
+            "comment_type": "new_content"  # Special flag to indicate this is a new content request
+        }
+
+    logger.info("\n✅ Captured Underlined Text:\n" + str(underlined_text))
+    job.underlined_text = underlined_text
+    _checkpoint(job, STAGE_COMMENT_CAPTURED, {
+        "comment_data": job.comment_data,
+        "underlined_text": underlined_text,
+    })
+
+
+def match_harvested_comment(job, comments):
+    """
+    Find the job's comment among those harvested from its page: by
+    comment_id, else by the email's comment text.
+
+    Returns:
+        dict: The harvested comment, or None
+    """
+    if job.comment_id:
+        for comment in comments:
+            if comment["comment_id"] == job.comment_id:
+                return comment
+
+    email_text = " ".join((job.email_comment_text or "").split())
+    if email_text:
+        for comment in comments:
+            page_text = " ".join((comment["text"] or "").split())
+            if page_text and (email_text in page_text or page_text in email_text):
+                return comment
+    return None
+
+
+@_stage("portal_harvest")
+def harvest_portal(session, batch):
+    """
+    Stage 2 for a topic with several emails: open the topic page once,
+    harvest every comment on it and hand each email its own comment.
+    Emails whose comment is not found are left for capture_portal.
+
+    Returns:
+        list: The jobs whose comment was captured
+    """
+    driver = session.driver
+    first = batch.jobs[0]
+    try:
+        logger.info(f"\n🌐 Portal harvest for {batch.position_info}")
+        driver.switch_to.window(session.portal_handle)
+        open_topic_page(driver, first)
+        wait_until(driver, comments_highlighted(), 15, "comment highlighting")
+        comments = harvest_page_comments(driver)
+    except Exception as e:
+        logger.warning(f"⚠️ Portal harvest failed for {batch.position_info}, capturing emails one by one: {e}")
+        return []
+
+    captured = []
+    for job in batch.jobs:
+        stored = job.resume.get(STAGE_COMMENT_CAPTURED)
+        if stored:
+            logger.info(f"↩️ Reusing captured comment for {job.position_info} from the job journal")
+            job.comment_data = stored["comment_data"]
+            job.underlined_text = stored["underlined_text"]
+            captured.append(job)
+            continue
+
+        comment = match_harvested_comment(job, comments)
+        if comment is None:
+            logger.info(f"ℹ️ Comment for {job.position_info} not found on the page")
+            continue
+        comments.remove(comment)  # Each comment belongs to one email
+        logger.info(f"\n✅ Harvested comment {comment['comment_id']} for {job.position_info} "
+                    f"(status: {comment['status'] or 'unknown'}):\n{comment['text']}")
+        job.comment_data = {
+            "text": comment["text"],
+            "html": comment["html"],
+            "comment_id": comment["comment_id"],
+            "status": comment["status"],
+        }
+        _set_underlined_text(job, comment["underlined_text"])
+        captured.append(job)
+    return captured
+
+
+@_stage("xml_capture")
+def capture_xml(session, batch):
+    """
+    Stage 3 (XML capture): open the topic in IXIA CCMS Web from the portal
+    tab and capture the full XML source - straight from the CCMS backend
+    when CCMS_XML_FETCH_URL is configured, otherwise by switching the
+    editor to XML mode.
+
+    Runs once per topic batch. The editor tab is left open and remembered on
+    the batch so the apply stage can return to it once the AI stage has
+    finished.
+
+    Returns:
+        bool: True if the XML source was captured
+    """
+    driver = session.driver
+    try:
+        # Navigate to XML editor
+        click_more_button(driver)
+        batch.editor_handle = session.open_editor_tab()
+
+        # The persistent profile usually keeps IXIA signed in, even across
+        # browser restarts; the login page is only clicked through when shown
+        if ensure_ixia_authenticated(driver):
+            session.authentication_done = True
+
+        full_xml = fetch_ccms_xml(driver)
+        if full_xml:
+            batch.direct_xml = True
+        else:
+            click_edit_button(driver)
+            click_edit_as_xml(driver)
+            full_xml = capture_full_xml_source(driver)
+        if not full_xml:
+            return _fail_batch(batch, "Could not capture full XML source")
+
+        logger.info(f"\n✅ Captured full XML source for {batch.position_info}")
+        batch.full_xml = full_xml
+        return True
+
+    except Exception as e:
+        for job in batch.active_jobs:
+            _log_stage_error(job, "XML capture", e)
+        _save_error_screenshot(driver)
+        return False
+
+
+@_stage("ai_processing")
+def run_ai(job, input_xml):
+    """
+    Stage 4 (AI processing): ask the model for the modified XML.
+
+    Touches no browser state, so it can run on a worker thread while the
+    browser moves on to the next topic.
+
+    Args:
+        job: The email job
+        input_xml: XML to modify - the captured source, or the output of the
+                   previous comment on the same topic
+
+    Returns:
+        bool: True if the AI returned modified XML
+    """
+    input_sha = hashlib.sha256(input_xml.encode("utf-8")).hexdigest()
+    job.full_xml = input_xml
+
+    # The AI output from an earlier run is only valid for the same input
+    ai_output = job.resume.get(STAGE_AI_OUTPUT)
+    if ai_output and ai_output.get("input_sha") == input_sha:
+        logger.info(f"↩️ Skipping AI for {job.position_info} - output restored from the job journal")
+        job.modified_xml = ai_output["modified_xml"]
+        job.explanation = ai_output["explanation"]
+        job.already_implemented = _is_already_implemented(job.explanation)
+        return True
+
+    try:
+        logger.info(f"\n🤖 Processing XML with AI for {job.position_info}...")
+        with span("process_dita_comment"):
+            modified_xml, explanation = process_dita_comment(
+                input_xml,
+                job.underlined_text,
+                job.comment_data
+            )
+
+        if not modified_xml:
+            return _fail(job, f"AI processing failed: {explanation}")
+
+        logger.info(f"\n✅ AI processing successful for {job.position_info}")
+        logger.info(f"✅ AI explanation: {explanation}")
+        job.modified_xml = modified_xml
+        job.explanation = explanation
+        job.already_implemented = _is_already_implemented(explanation)
+        _checkpoint(job, STAGE_AI_OUTPUT, {
+            "input_sha": input_sha,
+            "modified_xml": modified_xml,
+            "explanation": explanation,
+        })
+        return True
+
+    except Exception as e:
+        _log_stage_error(job, "AI processing", e)
+        return False
+
+
+def _is_already_implemented(explanation):
+    """Check if the AI determined no changes were needed"""
+    explanation = (explanation or "").lower()
+    return "already implemented" in explanation or "already exists" in explanation
+
+
+def run_ai_for_batch(batch):
+    """
+    Stage 4 for a whole topic: run the AI for each comment in received order,
+    feeding every comment the XML produced by the one before it, so all
+    comments end up in a single document.
+
+    Returns:
+        bool: True if at least one comment produced usable output
+    """
+    xml = batch.full_xml
+    for job in batch.active_jobs:
+        if run_ai(job, xml):
+            xml = job.modified_xml
+    batch.final_xml = xml
+    return any(job.modified_xml is not None for job in batch.jobs)
+
+
+@_stage("apply_check_in")
+def apply_and_check_in(session, batch):
+    """
+    Stage 5 (apply/check-in): return to the topic's editor tab, apply the
+    combined modified XML and check the document in once.
+
+    Sets job.success for every email of the batch whose AI output made it
+    into the document (or was already implemented). The check-in is only
+    submitted here and the batch handed to session.submit_check_in; until
+    it is confirmed the emails' check_in is "submitted", and they lose
+    their success again unless it completes. A document saved through the
+    CCMS backend is confirmed by save_ccms_xml reading it back instead.
+
+    Returns:
+        bool: True if the changes are in place
+    """
+    driver = session.driver
+    done = [job for job in batch.active_jobs if job.modified_xml is not None]
+    if not done:
+        return False
+
+    try:
+        driver.switch_to.window(batch.editor_handle)
+
+        if all(job.already_implemented for job in done):
+            for job in done:
+                logger.info(f"✅ AI determined change already implemented: {job.explanation}")
+                _checkpoint(job, STAGE_CHECKED_IN, {"already_implemented": True})
+                job.success = True
+            return True  # Success even though no XML was changed
+
+        # save_ccms_xml reads the document back; it only succeeds once the
+        # repository holds the new XML, so the emails are done right away
+        if batch.direct_xml and CCMS_XML_SAVE_URL and save_ccms_xml(driver, batch.final_xml):
+            logger.info(f"✅ Document saved through CCMS backend with {len(done)} comment(s)")
+            for job in done:
+                _checkpoint(job, STAGE_APPLIED)
+                _checkpoint(job, STAGE_CHECKED_IN, {"already_implemented": job.already_implemented})
+                job.success = True
+            return True
+
+        if batch.direct_xml:
+            # The XML was fetched without the editor; boot it now to apply and check in
+            click_edit_button(driver)
+            click_edit_as_xml(driver)
+
+        if not apply_modified_xml(driver, batch.final_xml, original_xml=batch.full_xml):
+            return _fail_batch(batch, "Failed to apply modified XML")
+        for job in done:
+            _checkpoint(job, STAGE_APPLIED)
+
+        # Make sure the editor has registered the change before checking in
+        wait_until(driver, element_clickable(CHECK_IN_BUTTON), 10, "check-in button after apply")
+
+        # Returns once the check-in is submitted; the session confirms it later
+        if not click_check_in_button(driver, wait_for_completion=False):
+            return _fail_batch(batch, "Failed to check in document")
+
+        logger.info(f"✅ Check-in submitted with {len(done)} comment(s)")
+
+        for job in done:
+            job.check_in = "submitted"
+            job.success = True
+        session.submit_check_in(batch)
+        return True
+
+    except Exception as e:
+        for job in done:
+            _log_stage_error(job, "apply/check-in", e)
+        _save_error_screenshot(driver)
+        return False
+
+
+def _settle_check_in(batch, state, detail, elapsed, submitted_wall):
+    """Record the outcome of a batch's submitted check-in on its emails"""
+    jobs = [job for job in batch.jobs if job.check_in == "submitted"]
+    for job in jobs:
+        job.check_in = state
+        job.check_in_detail = detail
+        job.check_in_seconds = elapsed
+        if state == "completed":
+            _checkpoint(job, STAGE_CHECKED_IN, {"already_implemented": job.already_implemented})
+        else:
+            # Left unread and not journaled as checked in, so the next run retries it
+            job.success = False
+            job.error = f"Check-in {state}: {detail}"
+    batch.success = any(job.success for job in batch.jobs)
+
+    with _trace_for(batch):
+        record_span("check_in:confirm", submitted_wall, elapsed, state=state)
+    if state == "completed":
+        logger.info(f"✅ Check-in confirmed for {batch.position_info} after {elapsed:.1f}s ({detail})")
+    elif state == "failed":
+        logger.warning(f"⚠️ Check-in failed for {batch.position_info}: {detail}")
+    else:
+        logger.warning(f"⚠️ Check-in of {batch.position_info} {state}: {detail}")
+
+
+def check_in_report(jobs):
+    """
+    Check-in confirmation lines for the run summary.
+
+    Returns:
+        list: Outcome counts and confirmation times, then one line per
+              email whose check-in was not confirmed
+    """
+    checked_in = [job for job in jobs if job.check_in]
+    if not checked_in:
+        return []
+    counts = Counter(job.check_in for job in checked_in)
+    line = ", ".join(f"{count} {state}" for state, count in sorted(counts.items()))
+    confirmed = [job.check_in_seconds for job in checked_in if job.check_in == "completed"]
+    if confirmed:
+        line += f" - confirmed after {sum(confirmed) / len(confirmed):.1f}s on average, {max(confirmed):.1f}s max"
+    return [line] + [
+        f"{job.position_info}: {job.check_in} ({job.check_in_detail})"
+        for job in checked_in if job.check_in != "completed"
+    ]
+
+
+def mark_email_read(job, mail_writer=None):
+    """
+    Mark a successfully processed email as read.
+
+    With a MailStateWriter the update is only queued and applied in the
+    background; otherwise this must run on the thread that owns the
+    Outlook COM objects.
+    """
+    try:
+        if mail_writer is not None and job.entry_id:
+            mail_writer.mark_read(job.entry_id)
+            logger.info(f"✅ Queued email {job.position_info} to be marked as Read.")
+            return
+        job.email.Unread = False
+        job.email.Save()
+        if job.already_implemented:
+            logger.info("✅ Marked email as Read after determining change was already implemented.")
+        else:
+            logger.info("✅ Marked email as Read after processing.")
+    except Exception as e:
+        logger.error(f"⚠️ Could not mark email {job.position_info} as read: {e}")
+
+
+def comment_identity(job):
+    """
+    Key identifying the comment an email notifies about: the topic plus the
+    comment_id, or plus the comment text when the link carries no id.
+    Returns None when the comment can't be identified.
+    """
+    if job.comment_id:
+        return (job.topic, "id", job.comment_id)
+    text = " ".join((job.email_comment_text or "").split())
+    if text:
+        return (job.topic, "text", text)
+    return None
+
+
+def coalesce_jobs(jobs):
+    """
+    Drop notifications superseded by a newer one about the same comment
+    (repeated and "(Modified)" notifications), keeping only the latest.
+
+    Superseded jobs get superseded_by set and are not processed; the
+    caller marks them handled.
+
+    Args:
+        jobs: Ingested jobs, oldest-first
+
+    Returns:
+        tuple: (jobs to process in their original order, superseded jobs)
+    """
+    latest = {}
+    for job in jobs:
+        key = comment_identity(job)
+        if key is None:
+            continue
+        current = latest.get(key)
+        if current is None or (job.received_time or datetime.min) >= (current.received_time or datetime.min):
+            latest[key] = job
+
+    keep = []
+    superseded = []
+    for job in jobs:
+        key = comment_identity(job)
+        if key is None or latest[key] is job:
+            keep.append(job)
+        else:
+            job.superseded_by = latest[key]
+            superseded.append(job)
+            logger.info(f"⏭️ {job.position_info} is superseded by {job.superseded_by.position_info} - skipping")
+    return keep, superseded
+
+
+def group_into_batches(jobs):
+    """
+    Group ingested jobs into one TopicBatch per topic.
+
+    Batches are ordered by their oldest email and keep their emails in the
+    order given (oldest-first), so comments are applied in received order.
+    """
+    batches = {}
+    for job in jobs:
+        if job.topic not in batches:
+            batches[job.topic] = TopicBatch(job.topic)
+        batches[job.topic].jobs.append(job)
+    return list(batches.values())
+
+
+def capture_batch(session, batch):
+    """
+    Run the portal capture for every email of the batch, then open the
+    editor once for the topic. Emails whose comment could not be captured
+    drop out of the batch.
+
+    A topic with several emails has all its comments harvested in one page
+    visit; only emails whose comment isn't found there are captured one by one.
+
+    Returns:
+        bool: True if the batch is ready for the AI stage
+    """
+    harvested = harvest_portal(session, batch) if len(batch.jobs) > 1 else []
+    for job in batch.jobs:
+        if job in harvested or capture_portal(session, job):
+            batch.active_jobs.append(job)
+    if not batch.active_jobs:
+        return False
+
+    # The portal tab is on a page of this topic, which is all the editor needs
+    return capture_xml(session, batch)
+
+
+def process_batch_sequentially(session, batch):
+    """
+    Run every browser and AI stage for one topic back to back on the
+    calling thread.
+
+    Returns:
+        bool: True if the topic was fully processed
+    """
+    try:
+        session.ensure_driver()
+    except Exception as e:
+        for job in batch.jobs:
+            _log_stage_error(job, "browser launch", e)
+        return False
+
+    batch.success = (capture_batch(session, batch)
+                     and run_ai_for_batch(batch)
+                     and apply_and_check_in(session, batch))
+    if batch.check_in_pending:
+        # Nothing else runs on this thread; wait for the confirmation
+        session.verify_check_ins(wait=True)
+    session.release_editor_tab(batch.editor_handle, batch.success)
+    return batch.success
+
+
+def process_job_sequentially(session, job, journal=None, mail_writer=None):
+    """
+    Run every stage for one job back to back on the calling thread.
+    The email is marked read through mail_writer when one is given.
+
+    Returns:
+        bool: True if the email was fully processed
+    """
+    if ingest_email(job, journal):
+        batch = TopicBatch(job.topic)
+        batch.jobs.append(job)
+        process_batch_sequentially(session, batch)
+
+    if job.success:
+        mark_email_read(job, mail_writer)
+    return job.success
+
+
+def create_worker_sessions(count=BROWSER_WORKERS, profile_root=EDGE_PROFILE_ROOT):
+    """
+    Create one browser session per pool worker. Browsers are launched lazily
+    by each worker when it picks up its first topic.
+
+    Args:
+        count: Number of browser workers
+        profile_root: Directory holding one Edge profile per worker, or None
+                      to let every launch use a throwaway profile
+
+    Returns:
+        list: BrowserSession objects, one per worker
+    """
+    return [BrowserSession(profile_dir=worker_profile_dir(i, profile_root))
+            for i in range(1, max(1, count) + 1)]
+
+
+def worker_profile_dir(worker_id, profile_root=EDGE_PROFILE_ROOT):
+    """Persistent Edge profile folder of a browser worker, or None for a throwaway profile"""
+    return os.path.join(profile_root, f"worker-{worker_id}") if profile_root else None
+
+
+class BrowserWorker:
+    """
+    One browser in the pool: its own Edge session (profile, auth state and
+    tabs) plus the capture and apply queues feeding it.
+
+    Every topic is pinned to a single worker, so check-ins on a topic are
+    serialized on one browser in received order.
+    """
+
+    def __init__(self, worker_id, session, queue_size, max_in_flight, ai_queue, done_queue):
+        self.worker_id = worker_id
+        self.session = session
+        self.max_in_flight = max(1, max_in_flight)
+        self.capture_queue = queue.Queue(maxsize=queue_size)
+        self.apply_queue = queue.Queue()
+        self.ai_queue = ai_queue
+        self.done_queue = done_queue
+
+        self.assigned = 0          # Batches routed here and not yet finished
+        self.succeeded = 0
+        self.failed = 0
+        self.first_started = None
+        self.last_finished = None
+
+        self.ingest_done = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run_traced, name=f"browser-{worker_id}", daemon=True)
+
+    @property
+    def completed(self):
+        return self.succeeded + self.failed
+
+    def throughput(self):
+        """
+        Returns:
+            tuple: (completed, succeeded, active_seconds, emails_per_hour)
+        """
+        active = 0.0
+        if self.first_started is not None and self.last_finished is not None:
+            active = self.last_finished - self.first_started
+        per_hour = self.completed * 3600 / active if active > 0 else 0.0
+        return self.completed, self.succeeded, active, per_hour
+
+    def _finish(self, batch):
+        self.session.release_editor_tab(batch.editor_handle, batch.success)
+        for job in batch.jobs:
+            if job.success:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+        self.last_finished = time.monotonic()
+        self.done_queue.put(batch)
+
+    def _run_traced(self):
+        # Tag every span from this browser with the worker id
+        with trace_context(worker=self.worker_id):
+            self._run()
+
+    def _run(self):
+        session = self.session
+        pending = deque()
+        busy_topics = set()
+        in_flight = 0
+        consecutive_failures = 0
+
+        def finish(batch):
+            nonlocal consecutive_failures
+            if any(job.success for job in batch.jobs):
+                consecutive_failures = 0
+            else:
+                consecutive_failures += 1
+            self._finish(batch)
+
+        def handle_applied(batch):
+            nonlocal in_flight
+            batch.success = apply_and_check_in(session, batch)
+            in_flight -= 1
+            if not batch.check_in_pending:
+                settle(batch)
+            # Otherwise the topic stays busy until verify_check_ins settles it
+
+        def settle(batch):
+            busy_topics.discard(batch.topic)
+            finish(batch)
+
+        def next_capture_batch():
+            # Oldest pending batch whose topic has nothing in flight
+            for batch in pending:
+                if batch.topic not in busy_topics:
+                    pending.remove(batch)
+                    return batch
+            while len(pending) < self.capture_queue.maxsize or not pending:
+                try:
+                    batch = self.capture_queue.get_nowait()
+                except queue.Empty:
+                    return None
+                if batch.topic not in busy_topics:
+                    return batch
+                pending.append(batch)
+            return None
+
+        try:
+            while True:
+                # Check-ins submitted earlier are confirmed between topics
+                for batch in session.verify_check_ins():
+                    settle(batch)
+
+                # Finish AI'd topics first: it frees an editor tab and a topic
+                try:
+                    batch = self.apply_queue.get_nowait()
+                except queue.Empty:
+                    batch = None
+                if batch is not None:
+                    handle_applied(batch)
+                    continue
+
+                if (consecutive_failures >= MAX_CONSECUTIVE_FAILURES and in_flight == 0
+                        and not session.pending_check_ins and session.driver):
+                    logger.warning(f"⚠️ Worker {self.worker_id}: {MAX_CONSECUTIVE_FAILURES} consecutive failures. Restarting browser...")
+                    session.restart()
+                    consecutive_failures = 0
+
+                batch = next_capture_batch() if in_flight < self.max_in_flight else None
+                if batch is not None:
+                    logger.info("=" * 60)
+                    logger.info(f"Worker {self.worker_id}: starting to process {batch.position_info}")
+                    logger.info("=" * 60)
+                    if self.first_started is None:
+                        self.first_started = time.monotonic()
+                    try:
+                        session.ensure_driver()
+                    except Exception as e:
+                        for job in batch.jobs:
+                            _log_stage_error(job, "browser launch", e)
+                        finish(batch)
+                        continue
+                    if capture_batch(session, batch):
+                        in_flight += 1
+                        busy_topics.add(batch.topic)
+                        self.ai_queue.put(batch)
+                    else:
+                        finish(batch)
+                    continue
+
+                if (self.ingest_done.is_set() and in_flight == 0 and not pending
+                        and self.capture_queue.empty()):
+                    if not session.pending_check_ins:
+                        return
+                    for batch in session.verify_check_ins(wait=True):
+                        settle(batch)
+                    continue
+
+                if in_flight == 0:
+                    # Nothing can come back from the AI stage: wait for the next topic
+                    try:
+                        pending.append(self.capture_queue.get(timeout=QUEUE_POLL_SECONDS))
+                    except queue.Empty:
+                        pass
+                    continue
+
+                # Nothing to start: wait for the AI stage to hand something back
+                try:
+                    handle_applied(self.apply_queue.get(timeout=QUEUE_POLL_SECONDS))
+                except queue.Empty:
+                    continue
+
+        except Exception as e:
+            logger.error(f"⚠️ Critical error in browser worker {self.worker_id}: {e}")
+            logger.error(traceback.format_exc())
+        finally:
+            self.stopped.set()
+
+
+class EmailPipeline:
+    """
+    Staged executor for a batch of notification emails.
+
+    Stages and the threads that run them:
+      1. mail ingestion          - calling thread (owns the Outlook COM objects)
+      2. portal capture          - one thread per browser worker
+      3. XML capture             - one thread per browser worker
+      4. AI processing           - pool of AI worker threads
+      5. apply / check-in        - the browser worker that captured the topic;
+                                   the check-in is confirmed between its next topics
+      6. mark as read            - calling thread, or the MailStateWriter if given
+
+    Emails are ingested PIPELINE_INGEST_CHUNK at a time. Each chunk is coalesced so
+    each comment is handled once (see coalesce_jobs) and grouped into one
+    TopicBatch per topic, so the editor is opened, captured, applied and
+    checked in once per topic no matter how many of the chunk's comments it
+    has. Its topics are dispatched before the next chunk is read, so the
+    browsers start on the first topics while the rest of the mail is still
+    being ingested. Stages are connected by bounded queues. Each
+    browser worker works on the next topic's portal and XML capture while
+    earlier topics are waiting on the AI, and returns to their editor tabs
+    once the AI output arrives.
+
+    Every topic is pinned to one worker the first time it is seen, and a
+    worker never has two batches of one topic in flight, so each topic is
+    still processed oldest-first and check-ins cannot race.
+    """
+
+    def __init__(self, sessions, queue_size=PIPELINE_QUEUE_SIZE,
+                 max_in_flight=PIPELINE_MAX_IN_FLIGHT, ai_workers=AI_WORKERS, journal=None, mail_writer=None,
+                 ingest_chunk=PIPELINE_INGEST_CHUNK):
+        self.journal = journal
+        self.ingest_chunk = max(1, ingest_chunk)
+        self.mail_writer = mail_writer
+        self.ai_workers = max(1, ai_workers)
+        self.ai_queue = queue.Queue(maxsize=queue_size)
+        self.done_queue = queue.Queue()
+        self.workers = [
+            BrowserWorker(i, session, queue_size, max_in_flight, self.ai_queue, self.done_queue)
+            for i, session in enumerate(sessions, 1)
+        ]
+        self._topic_workers = {}
+
+    def _worker_for(self, batch):
+        """Pin the batch's topic to a worker, choosing the least loaded one for new topics"""
+        worker = self._topic_workers.get(batch.topic)
+        if worker is None or worker.stopped.is_set():
+            live = [w for w in self.workers if not w.stopped.is_set()] or self.workers
+            worker = min(live, key=lambda w: w.assigned)
+            self._topic_workers[batch.topic] = worker
+        return worker
+
+    def _all_stopped(self):
+        return all(w.stopped.is_set() for w in self.workers)
+
+    def run(self, jobs):
+        """
+        Process jobs (already ordered oldest-first; any iterable, consumed
+        as it is ingested) through every stage.
+
+        Returns:
+            list: The same jobs, with success/error filled in
+        """
+        ai_threads = [
+            threading.Thread(target=self._ai_loop, name=f"ai-{i + 1}", daemon=True)
+            for i in range(self.ai_workers)
+        ]
+        for w in self.workers:
+            w.thread.start()
+        for t in ai_threads:
+            t.start()
+
+        submitted = 0
+        finished = 0
+        try:
+            # Stage 1 runs here, a chunk at a time. A topic whose emails fall
+            # in two chunks gets two batches; its worker runs them in order.
+            job_iter = iter(jobs)
+            chunks = iter(lambda: list(itertools.islice(job_iter, self.ingest_chunk)), [])
+            for chunk in chunks:
+                ingested = []
+                for job in chunk:
+                    if ingest_email(job, self.journal):
+                        ingested.append(job)
+                    elif job.success:
+                        mark_email_read(job, self.mail_writer)  # Checked in by an earlier run
+
+                # Only the latest notification of each comment needs browser and AI work
+                ingested, superseded = coalesce_jobs(ingested)
+                for job in superseded:
+                    mark_email_read(job, self.mail_writer)
+                if superseded:
+                    logger.info(f"✅ {len(superseded)} superseded notification(s) marked handled")
+
+                batches = group_into_batches(ingested)
+                logger.info(f"✅ {len(ingested)} email(s) grouped into {len(batches)} topic(s)")
+
+                # Completed topics are drained while we wait for room in a
+                # capture queue so mail updates stay on this thread (or are
+                # handed to the mail writer from it)
+                for batch in batches:
+                    worker = self._worker_for(batch)
+                    batch.worker = worker
+                    while not worker.stopped.is_set():
+                        try:
+                            worker.capture_queue.put(batch, timeout=QUEUE_POLL_SECONDS)
+                            worker.assigned += 1
+                            submitted += 1
+                            break
+                        except queue.Full:
+                            finished += self._drain_done()
+                    if self._all_stopped():
+                        break
+                    finished += self._drain_done()
+                if self._all_stopped():
+                    break
+
+            for w in self.workers:
+                w.ingest_done.set()
+
+            while finished < submitted:
+                if self._all_stopped() and self.done_queue.empty():
+                    break
+                finished += self._drain_done(timeout=QUEUE_POLL_SECONDS)
+        finally:
+            for w in self.workers:
+                w.ingest_done.set()
+            for w in self.workers:
+                w.thread.join()
+            for _ in ai_threads:
+                self.ai_queue.put(None)
+            for t in ai_threads:
+                t.join()
+            self._drain_done()
+
+        return jobs
+
+    def _drain_done(self, timeout=None):
+        """Finish topics the browser workers have completed. Returns the count."""
+        count = 0
+        while True:
+            try:
+                if timeout is not None and count == 0:
+                    batch = self.done_queue.get(timeout=timeout)
+                else:
+                    batch = self.done_queue.get_nowait()
+            except queue.Empty:
+                return count
+            batch.worker.assigned -= 1
+            for job in batch.jobs:
+                if job.success:
+                    logger.info(f"✅ Worker {batch.worker.worker_id}: successfully processed {job.position_info}")
+                    mark_email_read(job, self.mail_writer)
+                else:
+                    logger.warning(f"⚠️ Worker {batch.worker.worker_id}: failed to process {job.position_info}")
+            count += 1
+
+    def _ai_loop(self):
+        while True:
+            batch = self.ai_queue.get()
+            if batch is None:
+                return
+            run_ai_for_batch(batch)
+            batch.worker.apply_queue.put(batch)
+
+    def worker_report(self, totals=None):
+        """
+        Per-worker throughput lines for the run summary.
+
+        Args:
+            totals: Dict carried across several runs (worker id ->
+                    [completed, succeeded, active seconds]); this run's
+                    throughput is added to it and the totals are reported
+
+        Returns:
+            list: One formatted line per browser worker
+        """
+        totals = {} if totals is None else totals
+        for w in self.workers:
+            completed, succeeded, active, _ = w.throughput()
+            worker_totals = totals.setdefault(w.worker_id, [0, 0, 0.0])
+            worker_totals[0] += completed
+            worker_totals[1] += succeeded
+            worker_totals[2] += active
+
+        lines = []
+        for worker_id, (completed, succeeded, active) in sorted(totals.items()):
+            per_hour = completed * 3600 / active if active > 0 else 0.0
+            lines.append(
+                f"Worker {worker_id}: {completed} emails ({succeeded} succeeded) "
+                f"in {active / 60:.1f} min - {per_hour:.1f} emails/hour"
+            )
+        return lines
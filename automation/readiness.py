@@ -0,0 +1,264 @@
+# automation/readiness.py
+
+import logging
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from automation.tracing import record_span
+
+logger = logging.getLogger(__name__)
+
+# How often conditions are re-evaluated while waiting
+POLL_SECONDS = 0.1
+
+# Locators shared by the flow's readiness checks
+COMMENT_HIGHLIGHTED = (By.CLASS_NAME, "comment-highlighted")
+XML_EDITOR_LOCATORS = [
+    (By.CSS_SELECTOR, "div.CodeMirror"),                     # inline CodeMirror (SAP build)
+    (By.CSS_SELECTOR, "iframe[id^='text-mode-iframe']"),     # classic nested iframe
+    (By.CSS_SELECTOR, "iframe[id^='SAP-plugin-iframe']"),    # plugin iframe
+]
+CHECK_IN_BUTTON = (By.XPATH, "//button[starts-with(@id, 'btn-btn-chkin-')]")
+EDIT_BUTTON = (By.XPATH, "//button[starts-with(@id, 'btn-btn-edit-')]")
+CHECK_IN_DIALOG = (By.CSS_SELECTOR, "div.MuiDialogActions-root")
+AUTH_SERVER_BUTTON = (By.XPATH, "//button[contains(.,'YOUR AUTHENTICATION SERVER')]")
+
+_stats_lock = threading.Lock()
+_wait_stats = {}
+
+
+def wait_until(driver, condition, timeout, description, required=False):
+    """
+    Wait until a readiness condition is met and return as soon as it is.
+
+    The time actually spent waiting is logged and recorded under
+    `description` (see wait_stats).
+
+    Args:
+        driver: Selenium WebDriver instance
+        condition: Callable taking the driver, truthy once ready
+        timeout: Maximum wait time in seconds
+        description: Name of the wait for logs and stats
+        required: Raise TimeoutException instead of returning False on timeout
+
+    Returns:
+        The condition's truthy result, or False on timeout
+    """
+    start_wall = time.time()
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(condition)
+        met = True
+    except TimeoutException:
+        if required:
+            _record(description, time.monotonic() - start, met=False)
+            record_span(f"wait:{description}", start_wall, time.monotonic() - start, met=False)
+            raise
+        result = False
+        met = False
+
+    elapsed = time.monotonic() - start
+    _record(description, elapsed, met)
+    record_span(f"wait:{description}", start_wall, elapsed, met=met)
+    if met:
+        logger.info(f"✅ Ready: {description} ({elapsed:.2f}s)")
+    else:
+        logger.warning(f"⚠️ Not ready after {elapsed:.2f}s: {description}")
+    return result
+
+
+def _record(description, elapsed, met):
+    with _stats_lock:
+        stats = _wait_stats.setdefault(description, {"count": 0, "timeouts": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+        if not met:
+            stats["timeouts"] += 1
+
+
+def wait_stats():
+    """
+    Returns:
+        dict: description -> {count, timeouts, total, max} for every wait so far
+    """
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _wait_stats.items()}
+
+
+def wait_report():
+    """
+    Readiness wait lines for the run summary, longest total first.
+
+    Returns:
+        list: One formatted line per wait description
+    """
+    lines = []
+    for name, stats in sorted(wait_stats().items(), key=lambda item: -item[1]["total"]):
+        lines.append(
+            f"{name}: {stats['count']} waits, {stats['total']:.1f}s total, "
+            f"{stats['max']:.1f}s max, {stats['timeouts']} timeouts"
+        )
+    return lines
+
+
+# --- Conditions ---
+# Each returns a callable for wait_until. They run in the driver's current
+# frame, so switch frames before waiting.
+
+def all_of(*conditions):
+    """Ready once every condition is met (evaluated in order)"""
+    def check(driver):
+        return all(condition(driver) for condition in conditions)
+    return check
+
+
+def any_of(*conditions):
+    """Ready once any condition is met"""
+    def check(driver):
+        for condition in conditions:
+            result = condition(driver)
+            if result:
+                return result
+        return False
+    return check
+
+
+def document_ready():
+    """document.readyState is 'complete'"""
+    return lambda driver: driver.execute_script("return document.readyState") == "complete"
+
+
+def document_interactive():
+    """The document has been parsed (readyState 'interactive' or 'complete')"""
+    return lambda driver: driver.execute_script("return document.readyState") in ("interactive", "complete")
+
+
+def element_present(locator):
+    return EC.presence_of_element_located(locator)
+
+
+def element_visible(locator):
+    return EC.visibility_of_element_located(locator)
+
+
+def element_clickable(locator):
+    return EC.element_to_be_clickable(locator)
+
+
+def element_gone(locator):
+    """No element matching locator is displayed"""
+    def check(driver):
+        try:
+            return not any(e.is_displayed() for e in driver.find_elements(*locator))
+        except Exception:
+            return False  # Element went stale mid-check; look again
+    return check
+
+
+def element_stale(element):
+    """A previously found element has been removed or hidden"""
+    def check(driver):
+        try:
+            return not element.is_displayed()
+        except Exception:
+            return True
+    return check
+
+
+def attribute_equals(element, name, value):
+    """element's attribute `name` equals value"""
+    def check(driver):
+        try:
+            return element.get_attribute(name) == value
+        except Exception:
+            return False
+    return check
+
+
+def window_count(expected):
+    """Exactly `expected` browser windows/tabs are open"""
+    return lambda driver: len(driver.window_handles) == expected
+
+
+def dom_stable(quiet_seconds=0.5):
+    """
+    The element count of the current document has not changed for
+    quiet_seconds. Replaces fixed "let the DOM settle" sleeps.
+    """
+    state = {"count": None, "since": None}
+
+    def check(driver):
+        count = driver.execute_script("return document.getElementsByTagName('*').length")
+        now = time.monotonic()
+        if count != state["count"]:
+            state["count"] = count
+            state["since"] = now
+            return False
+        return now - state["since"] >= quiet_seconds
+    return check
+
+
+def network_idle(quiet_seconds=0.5):
+    """
+    No new resource has finished loading for quiet_seconds, according to the
+    page's Resource Timing entries, and the document itself has loaded.
+    """
+    state = {"count": None, "since": None}
+
+    def check(driver):
+        ready, count = driver.execute_script(
+            "return [document.readyState, performance.getEntriesByType('resource').length];"
+        )
+        now = time.monotonic()
+        if ready != "complete" or count != state["count"]:
+            state["count"] = count
+            state["since"] = now
+            return False
+        return now - state["since"] >= quiet_seconds
+    return check
+
+
+def comments_highlighted():
+    """The highlighted comment is rendered and the comment pane has settled"""
+    return all_of(element_present(COMMENT_HIGHLIGHTED), dom_stable(0.3))
+
+
+def xml_editor_present():
+    """The Oxygen XML editor (any of its layouts) exists in the current frame"""
+    def check(driver):
+        return any(driver.find_elements(*locator) for locator in XML_EDITOR_LOCATORS)
+    return check
+
+
+def ixia_page_state():
+    """
+    IXIA CCMS Web has shown either its login page ("login") or the document
+    page ("document"), whichever comes first.
+    """
+    def check(driver):
+        try:
+            if any(e.is_displayed() for e in driver.find_elements(*AUTH_SERVER_BUTTON)):
+                return "login"
+        except Exception:
+            return False  # Page is navigating; look again
+        if driver.find_elements(*EDIT_BUTTON) or driver.find_elements(*CHECK_IN_BUTTON):
+            return "document"
+        return False
+    return check
+
+
+def check_in_completed():
+    """
+    The check-in confirmation dialog is gone and the document has left edit
+    mode (the Edit button is back or the Check In button has disappeared).
+    """
+    return all_of(
+        element_gone(CHECK_IN_DIALOG),
+        any_of(element_present(EDIT_BUTTON), element_gone(CHECK_IN_BUTTON)),
+    )
@@ -0,0 +1,113 @@
+# automation/topic_url_cache.py
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config.settings import TOPIC_URL_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that belong to one email's comment rather than to the topic
+COMMENT_PARAMETERS = ("comment_id", "show_comments")
+
+
+class TopicUrlCache:
+    """
+    Persistent map from a notification's breadcrumb link (topic URL plus
+    link text) to the Help Portal URL that was verified to show that topic.
+
+    Breadcrumb links whose page fails the title check are only resolved
+    through the portal filters and search. Once resolved, the final URL is
+    remembered so later emails for the topic go straight there. An entry is
+    dropped as soon as its page fails the title check.
+
+    The cache is a small JSON file, loaded on first use and rewritten on
+    every change; it is shared by all browser workers.
+
+    Args:
+        path: JSON file holding the cache
+    """
+
+    def __init__(self, path=TOPIC_URL_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None   # key -> {"url": ..., "verified_at": ...}
+
+    @staticmethod
+    def key(breadcrumb_url, link_text):
+        parts = urlsplit(breadcrumb_url or "")
+        topic = urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip("/"), "", ""))
+        return f"{topic}|{' '.join((link_text or '').split()).lower()}"
+
+    def lookup(self, breadcrumb_url, link_text):
+        """
+        Returns:
+            str: Verified topic URL (with its own locale, version, ...) carrying
+                 the breadcrumb's comment parameters, or None if the topic is
+                 not cached
+        """
+        with self._lock:
+            entry = self._load().get(self.key(breadcrumb_url, link_text))
+        if not entry:
+            return None
+        comment = [(name, value) for name, value in parse_qsl(urlsplit(breadcrumb_url).query, keep_blank_values=True)
+                   if name in COMMENT_PARAMETERS]
+        return _with_query(entry["url"], comment)
+
+    def remember(self, breadcrumb_url, link_text, verified_url):
+        """Record the URL a breadcrumb link was verified to resolve to"""
+        # The comment parameters are per email; the rest of the URL is the topic's
+        topic_url = _with_query(verified_url, [])
+        key = self.key(breadcrumb_url, link_text)
+        with self._lock:
+            entries = self._load()
+            if entries.get(key, {}).get("url") == topic_url:
+                return
+            entries[key] = {"url": topic_url, "verified_at": datetime.now().isoformat(timespec="seconds")}
+            self._save()
+        logger.info(f"✅ Remembered topic URL for '{link_text}': {topic_url}")
+
+    def invalidate(self, breadcrumb_url, link_text):
+        """Drop the entry after its page failed the title check"""
+        with self._lock:
+            if self._load().pop(self.key(breadcrumb_url, link_text), None) is None:
+                return
+            self._save()
+        logger.info(f"⚠️ Cached topic URL for '{link_text}' no longer matches - dropped")
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not read topic URL cache {self.path}, starting empty: {e}")
+        return self._entries
+
+    def _save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            # The cache only saves navigation; never fail an email over it
+            logger.error(f"⚠️ Could not write topic URL cache: {e}")
+
+
+def _with_query(url, extra):
+    """url without its comment parameters and fragment, plus the extra (name, value) pairs"""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name not in COMMENT_PARAMETERS]
+    return urlunsplit(parts._replace(query=urlencode(query + list(extra)), fragment=""))
+
+
+# Shared by every browser session of the process
+topic_url_cache = TopicUrlCache()
@@ -0,0 +1,168 @@
+# automation/tracing.py
+
+import functools
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_local = threading.local()
+_trace_file = None
+_durations = {}   # span name -> list of durations in seconds
+
+
+def start_trace(path):
+    """
+    Start writing spans to a JSONL trace file (one JSON object per line).
+    Spans are aggregated for the percentile report whether or not a file
+    is open.
+    """
+    global _trace_file
+    with _lock:
+        if _trace_file:
+            _trace_file.close()
+        _trace_file = open(path, "a", encoding="utf-8")
+    logger.info(f"Trace file: {path}")
+
+
+def stop_trace():
+    global _trace_file
+    with _lock:
+        if _trace_file:
+            _trace_file.close()
+            _trace_file = None
+
+
+def _context():
+    if not hasattr(_local, "stack"):
+        _local.stack = [{}]
+    return _local.stack
+
+
+@contextmanager
+def trace_context(**attrs):
+    """
+    Attach attributes (email id, comment id, topic, worker, ...) to every
+    span started on this thread inside the block.
+    """
+    stack = _context()
+    stack.append({**stack[-1], **{k: v for k, v in attrs.items() if v is not None}})
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block of work and record it as a span.
+
+    Args:
+        name: Span name, e.g. "stage:portal_capture" or "capture_full_xml_source"
+        **attrs: Extra attributes for this span only
+    """
+    parent = getattr(_local, "current", None)
+    _local.current = name
+    start_wall = time.time()
+    start = time.monotonic()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        duration = time.monotonic() - start
+        _local.current = parent
+        record_span(name, start_wall, duration, error=error, parent=parent, **attrs)
+
+
+def record_span(name, start_wall, duration, error=None, parent=None, aggregate=True, **attrs):
+    """
+    Record an already-timed span (used by span() and for waits timed elsewhere).
+    With aggregate=False the span is only written to the trace file and left
+    out of the latency report.
+    """
+    entry = {
+        "ts": datetime.fromtimestamp(start_wall).isoformat(timespec="milliseconds"),
+        "span": name,
+        "duration_ms": round(duration * 1000, 1),
+        "ok": error is None,
+        "thread": threading.current_thread().name,
+    }
+    if parent:
+        entry["parent"] = parent
+    if error is not None:
+        entry["error"] = f"{type(error).__name__}: {error}"
+    entry.update(_context()[-1])
+    entry.update(attrs)
+
+    with _lock:
+        if aggregate:
+            _durations.setdefault(name, []).append(duration)
+        if _trace_file:
+            try:
+                _trace_file.write(json.dumps(entry, default=str) + "\n")
+                _trace_file.flush()
+            except Exception as e:
+                logger.error(f"⚠️ Could not write trace span: {e}")
+
+
+def traced(name=None):
+    """Decorator recording every call of the function as a span"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def latency_stats():
+    """
+    Returns:
+        dict: span name -> {count, p50, p95, max} in seconds
+    """
+    with _lock:
+        snapshot = {name: sorted(values) for name, values in _durations.items() if values}
+    return {
+        name: {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "max": values[-1],
+        }
+        for name, values in snapshot.items()
+    }
+
+
+def latency_report():
+    """
+    Per-span latency lines for the run summary: pipeline stages first, then
+    the browser helpers and waits, each group slowest (p95) first.
+
+    Returns:
+        list: One formatted line per span name
+    """
+    stats = latency_stats()
+    ordered = sorted(stats.items(), key=lambda item: (not item[0].startswith("stage:"), -item[1]["p95"]))
+    return [
+        f"{name}: n={s['count']} p50={s['p50']:.2f}s p95={s['p95']:.2f}s max={s['max']:.2f}s"
+        for name, s in ordered
+    ]
@@ -0,0 +1,71 @@
+# benchmark/fake_mail.py
+
+import uuid
+from datetime import datetime, time, timedelta
+from html import escape
+
+from benchmark.fake_services import topic_title
+
+SUBJECT = "SAP Help Portal: Comment Notification"
+
+
+class FakeMailItem:
+    """
+    Stand-in for an Outlook MailItem with the COM properties the pipeline
+    reads (Subject, SenderName, ReceivedTime, HTMLBody, EntryID, Unread)
+    and Save().
+    """
+
+    def __init__(self, html_body, received_time, sender="SAP Help Portal", subject=SUBJECT):
+        self.Subject = subject
+        self.SenderName = sender
+        self.ReceivedTime = received_time
+        self.HTMLBody = html_body
+        self.EntryID = uuid.uuid4().hex.upper()
+        self.Unread = True
+        self.saves = 0
+
+    def Save(self):
+        self.saves += 1
+
+
+def notification_html(breadcrumb_url, link_text, comment_text):
+    """HTML body laid out like a Help Portal comment notification"""
+    return f"""<html><body>
+<table>
+  <tr><td><a href="https://help.sap.com/">SAP Help Portal</a></td></tr>
+  <tr><td>A new comment was added to <a href="{escape(breadcrumb_url)}">{escape(link_text)}</a></td></tr>
+  <tr><td style="padding: 16px;"><p>{escape(comment_text)}</p><p>2025-05-04 10:15 UTC</p></td></tr>
+  <tr><td style="padding: 16px;"><p>Status: Open</p></td></tr>
+</table>
+</body></html>"""
+
+
+def make_notification_emails(services, count, target_date):
+    """
+    Create `count` unread notification emails spread round-robin over the
+    services' topics, and register each comment with the fake Help Portal.
+
+    Args:
+        services: Running FakeServices
+        count: Number of emails
+        target_date: Date the emails were received on
+
+    Returns:
+        list: FakeMailItem objects, newest first (like the Outlook scan)
+    """
+    topics = sorted(services.xml, key=lambda t: int(t.split("-")[-1]))
+    start = datetime.combine(target_date, time(8, 0))
+    emails = []
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        comment_id = 1000 + i
+        comment_text = f"Please clarify which sample service must be activated (benchmark comment {i + 1})."
+        services.add_comment(topic, comment_id, comment_text)
+
+        url = f"{services.base_url}/docs/{topic}?comment_id={comment_id}&show_comments=true"
+        body = notification_html(url, topic_title(topic.split("-")[-1]), comment_text)
+        emails.append(FakeMailItem(body, start + timedelta(minutes=i)))
+
+    emails.reverse()
+    return emails
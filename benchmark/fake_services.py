@@ -0,0 +1,370 @@
+# benchmark/fake_services.py
+
+import json
+import logging
+import re
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Cookie set by the fake IXIA login page
+AUTH_COOKIE = "ixia_auth=1"
+
+
+def topic_title(topic_number):
+    return f"Configuring Sample Feature {topic_number}"
+
+
+def topic_xml(topic_number, paragraphs=40):
+    """
+    Synthetic DITA task for a topic. Paragraph 1 holds the phrase every
+    comment underlines; the rest pads the document to a realistic size.
+    """
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<!DOCTYPE task PUBLIC "-//OASIS//DTD DITA Task//EN" "task.dtd">',
+        f'<task id="topic-{topic_number}" xml:lang="en-US">',
+        f'  <title>{topic_title(topic_number)}</title>',
+        '  <shortdesc>Use this procedure to configure the sample feature.</shortdesc>',
+        '  <taskbody>',
+        '    <context>',
+        '      <p>Before you start, make sure the <ph>sample service</ph> is activated in your system.</p>',
+    ]
+    for i in range(2, paragraphs + 1):
+        lines.append(f'      <p>Paragraph {i} describes step details for the sample feature configuration.</p>')
+    lines += [
+        '    </context>',
+        '  </taskbody>',
+        '</task>',
+    ]
+    return "\n".join(lines)
+
+
+class FakeServices:
+    """
+    Local stand-ins for help.sap.com, IXIA CCMS Web and the OpenAI chat
+    completions endpoint, served from one threaded HTTP server.
+
+    URLs (relative to base_url):
+        /docs/topic-<n>?comment_id=<id>&show_comments=true   Help Portal page
+        /ixia/topic-<n>                                       IXIA document page
+        /ixia/topic-<n>/author                                Web Author frame
+        /ixia/topic-<n>/checkin                               check-in (POST)
+        /v1/chat/completions                                  mock LLM (POST)
+
+    Every page carries the classes and ids the browser helpers look for, so
+    the real automation code runs against it unchanged.
+
+    Args:
+        topics: Number of topics to serve
+        llm_latency: Seconds the mock LLM takes per call
+        page_latency: Seconds added to every HTML page response
+        checkin_latency: Seconds a check-in takes to complete
+        paragraphs: Paragraphs per topic XML
+        port: Port to listen on (0 picks a free one)
+    """
+
+    def __init__(self, topics=5, llm_latency=2.0, page_latency=0.0, checkin_latency=0.5,
+                 paragraphs=40, port=0):
+        self.llm_latency = llm_latency
+        self.page_latency = page_latency
+        self.checkin_latency = checkin_latency
+        self.xml = {f"topic-{n}": topic_xml(n, paragraphs) for n in range(1, topics + 1)}
+        self.comments = {topic: [] for topic in self.xml}   # topic -> [(comment_id, text)]
+
+        self._lock = threading.Lock()
+        self.counters = {"portal_pages": 0, "editor_opens": 0, "login_pages": 0, "llm_calls": 0, "check_ins": 0}
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_comment(self, topic, comment_id, text):
+        """Register a reader comment so the topic's portal page shows it"""
+        with self._lock:
+            self.comments[topic].append((str(comment_id), text))
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Help Portal / IXIA / OpenAI services on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler_class(self):
+        services = self
+
+        class Handler(_Handler):
+            pass
+
+        Handler.services = services
+        return Handler
+
+    # --- Pages ---
+
+    def portal_page(self, topic, comment_id):
+        self.count("portal_pages")
+        number = topic.split("-")[-1]
+        with self._lock:
+            comments = list(self.comments[topic])
+
+        comment_boxes = []
+        for cid, text in comments:
+            css = "comment comment-highlighted" if cid == comment_id else "comment"
+            comment_boxes.append(
+                f'<div class="{css}" data-id="{cid}"><span class="comment-span"><p>{escape(text)}</p></span></div>'
+            )
+        underline = "commented-text commented-text-hover" if comment_id else "commented-text"
+        return PORTAL_PAGE.format(
+            title=topic_title(number),
+            topic=topic,
+            comment_id=escape(comment_id or ""),
+            underline=underline,
+            comments="\n".join(comment_boxes),
+        )
+
+    def ixia_page(self, topic, authenticated):
+        if not authenticated:
+            self.count("login_pages")
+            return IXIA_LOGIN_PAGE.format(cookie=AUTH_COOKIE)
+        self.count("editor_opens")
+        return IXIA_DOCUMENT_PAGE.format(topic=topic, title=topic_title(topic.split("-")[-1]))
+
+    def author_frame(self, topic):
+        with self._lock:
+            xml = self.xml[topic]
+        # Keep the document from closing the <script> element it is embedded in
+        return AUTHOR_FRAME_PAGE.format(xml_json=json.dumps(xml).replace("</", "<\\/"))
+
+    def check_in(self, topic, xml):
+        time.sleep(self.checkin_latency)
+        with self._lock:
+            self.xml[topic] = xml
+        self.count("check_ins")
+
+    def chat_completion(self, payload):
+        """Echo the ORIGINAL XML from the prompt back with a marker comment added"""
+        self.count("llm_calls")
+        time.sleep(self.llm_latency)
+        prompt = payload["messages"][-1]["content"]
+        match = re.search(r"ORIGINAL XML:\n(.*?)\n\nUNDERLINED TEXT:", prompt, re.S)
+        xml = match.group(1) if match else ""
+        close = xml.rfind("</")
+        if close != -1:
+            xml = xml[:close] + f"<!-- benchmark edit {self.stats()['llm_calls']} -->\n" + xml[close:]
+        return {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": xml}, "finish_reason": "stop"}],
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    services = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send(self, body, content_type="text/html; charset=utf-8", status=200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode("utf-8")
+
+    def _topic(self, path):
+        parts = path.strip("/").split("/")
+        topic = parts[1] if len(parts) > 1 else None
+        return topic if topic in self.services.xml else None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        topic = self._topic(url.path)
+        if topic is None:
+            return self._send("Not found", "text/plain", 404)
+        if self.services.page_latency:
+            time.sleep(self.services.page_latency)
+
+        if url.path.startswith("/docs/"):
+            return self._send(self.services.portal_page(topic, query.get("comment_id", [None])[0]))
+        if url.path.endswith("/author"):
+            return self._send(self.services.author_frame(topic))
+        if url.path.startswith("/ixia/"):
+            authenticated = AUTH_COOKIE in (self.headers.get("Cookie") or "")
+            return self._send(self.services.ixia_page(topic, authenticated))
+        return self._send("Not found", "text/plain", 404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self._read_body()
+        if url.path == "/v1/chat/completions":
+            response = self.services.chat_completion(json.loads(body))
+            return self._send(json.dumps(response), "application/json")
+        topic = self._topic(url.path)
+        if topic and url.path.endswith("/checkin"):
+            self.services.check_in(topic, body)
+            return self._send("{}", "application/json")
+        return self._send("Not found", "text/plain", 404)
+
+
+PORTAL_PAGE = """<!DOCTYPE html>
+<html><head><title>SAP Help Portal: {title}</title>
+<style>
+  .commented-text {{ border-bottom: 2px solid orange; }}
+  .dropdown {{ display: none; }}
+  .dropdown.open {{ display: block; }}
+</style></head>
+<body>
+<div class="left-content">
+  <h1>{title}</h1>
+  <button id="more-actions" type="button" onclick="document.getElementById('actions').classList.toggle('open')">More</button>
+  <div id="actions" class="dropdown"><a href="/ixia/{topic}" target="_blank">Edit in IXIA CCMS Web</a></div>
+  <div id="content">
+    <p>Before you start, make sure the <span class="{underline}" data-id="{comment_id}">sample service</span> is activated in your system.</p>
+    <p>Paragraph 2 describes step details for the sample feature configuration.</p>
+  </div>
+</div>
+<div class="comments-pane">
+{comments}
+</div>
+</body></html>
+"""
+
+IXIA_LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>IXIA CCMS Web - Sign in</title></head>
+<body>
+<button type="button" onclick="document.cookie='{cookie}; path=/'; location.reload();">Sign in with YOUR AUTHENTICATION SERVER</button>
+</body></html>
+"""
+
+# The Edit and Check In buttons are created and removed (not just hidden)
+# because check_in_completed() looks for their presence.
+IXIA_DOCUMENT_PAGE = """<!DOCTYPE html>
+<html><head><title>IXIA CCMS Web - {title}</title>
+<style>
+  #WebAuthor-frame {{ width: 100%; height: 600px; border: 0; }}
+  .MuiDialog {{ position: fixed; top: 30%; left: 30%; background: #fff; border: 1px solid #888; padding: 16px; }}
+</style></head>
+<body>
+<div id="toolbar"></div>
+<div id="editor-host"></div>
+<div id="dialog-host"></div>
+<script>
+  const topic = "{topic}";
+  function showEditButton() {{
+    document.getElementById('toolbar').innerHTML = '<button id="btn-btn-edit-1" type="button">Edit</button>';
+    document.getElementById('btn-btn-edit-1').onclick = startEditing;
+  }}
+  function startEditing() {{
+    document.getElementById('toolbar').innerHTML = '<button id="btn-btn-chkin-1" type="button">Check In</button>';
+    document.getElementById('btn-btn-chkin-1').onclick = showCheckInDialog;
+    document.getElementById('editor-host').innerHTML =
+      '<iframe id="WebAuthor-frame" src="/ixia/' + topic + '/author"></iframe>';
+  }}
+  function showCheckInDialog() {{
+    document.getElementById('dialog-host').innerHTML =
+      '<div class="MuiDialog"><p>Check in this document?</p>' +
+      '<div class="MuiDialogActions-root"><button id="check-in-confirm-button" type="button">Check In</button></div></div>';
+    document.getElementById('check-in-confirm-button').onclick = confirmCheckIn;
+  }}
+  function confirmCheckIn() {{
+    const frame = document.getElementById('WebAuthor-frame');
+    const editor = frame.contentDocument.querySelector('.CodeMirror');
+    fetch('/ixia/' + topic + '/checkin', {{method: 'POST', body: editor.CodeMirror.getValue()}})
+      .then(function () {{
+        document.getElementById('dialog-host').innerHTML = '';
+        document.getElementById('editor-host').innerHTML = '';
+        showEditButton();
+      }});
+  }}
+  showEditButton();
+</script>
+</body></html>
+"""
+
+AUTHOR_FRAME_PAGE = """<!DOCTYPE html>
+<html><head><title>Web Author</title>
+<style>
+  .goog-menu {{ display: none; border: 1px solid #888; }}
+  .goog-menu.open {{ display: block; }}
+  .CodeMirror-code pre {{ margin: 0; }}
+</style></head>
+<body>
+<div class="goog-toolbar">
+  <div class="goog-toolbar-menu-button" role="button" aria-label="More..." onclick="toggleMenu()">&#8942;</div>
+</div>
+<div class="goog-menu goog-toolbar-menu-button-dropdown" role="menu">
+  <div class="goog-menuitem" role="menuitem" onclick="editAsXml()">Edit as XML</div>
+</div>
+<div id="author-host"><p>Author mode</p></div>
+<script>
+  const initialXml = {xml_json};
+  function toggleMenu() {{
+    document.querySelector('.goog-menu').classList.toggle('open');
+  }}
+  function editAsXml() {{
+    document.querySelector('.goog-menu').classList.remove('open');
+    const host = document.getElementById('author-host');
+    host.innerHTML = '<div class="CodeMirror"><div class="CodeMirror-code"></div><textarea hidden></textarea></div>';
+    const root = host.querySelector('.CodeMirror');
+    let value = initialXml;
+    function render() {{
+      const code = root.querySelector('.CodeMirror-code');
+      code.innerHTML = '';
+      value.split('\\n').forEach(function (line) {{
+        const pre = document.createElement('pre');
+        pre.className = 'CodeMirror-line';
+        pre.textContent = line;
+        code.appendChild(pre);
+      }});
+    }}
+    // Minimal stand-in for the CodeMirror 5 API the automation uses
+    function indexOf(pos) {{
+      const lines = value.split('\\n');
+      let index = 0;
+      for (let i = 0; i < pos.line; i++) index += lines[i].length + 1;
+      return index + pos.ch;
+    }}
+    root.CodeMirror = {{
+      getValue: function () {{ return value; }},
+      setValue: function (v) {{ value = v; render(); }},
+      replaceRange: function (text, from, to) {{
+        value = value.slice(0, indexOf(from)) + text + value.slice(indexOf(to || from));
+        render();
+      }},
+      operation: function (f) {{ return f(); }},
+      refresh: render,
+    }};
+    render();
+  }}
+</script>
+</body></html>
+"""
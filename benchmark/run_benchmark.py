@@ -0,0 +1,144 @@
+# benchmark/run_benchmark.py
+"""
+Offline end-to-end benchmark: runs the real automation against local
+stand-ins for Outlook, the SAP Help Portal, IXIA CCMS Web and OpenAI and
+reports emails per hour.
+
+Needs only Edge and msedgedriver (found by Selenium if EDGE_DRIVER_PATH is
+empty or unset on Linux). Without a display, run Edge headless:
+
+    EDGE_HEADLESS=1 python -m benchmark.run_benchmark --emails 20 --topics 5
+    EDGE_HEADLESS=1 python -m benchmark.run_benchmark --mode pipeline --workers 2 --llm-latency 5
+"""
+
+import os
+
+# Let Selenium locate msedgedriver unless a path was given explicitly; must
+# happen before config.settings is imported.
+if os.name != "nt":
+    os.environ.setdefault("EDGE_DRIVER_PATH", "")
+# The fake pages need no images or fonts; measure with the lean launch profile
+os.environ.setdefault("EDGE_LEAN_PROFILE", "1")
+
+import argparse
+import logging
+import time
+from datetime import date
+
+from automation.pipeline import BrowserSession, EmailJob, EmailPipeline, create_worker_sessions, ordinal
+from automation.readiness import wait_report
+from automation.tracing import latency_report, start_trace, stop_trace
+from benchmark.fake_mail import make_notification_emails
+from benchmark.fake_services import FakeServices
+from main import process_single_email
+
+logger = logging.getLogger(__name__)
+
+
+def run_sequential(emails, target_date):
+    """Process the emails one at a time through main.process_single_email, reusing one browser"""
+    # Throwaway profile like the pipeline's workers: no production profile
+    # is touched and no sign-in carries over from an earlier run
+    session = BrowserSession(profile_dir=None)
+    try:
+        for i, email in enumerate(emails, 1):
+            position_info = f"{ordinal(i)} email from bottom ({i}/{len(emails)})"
+            process_single_email(email, target_date, position_info, session=session)
+    finally:
+        session.quit()
+    return []
+
+
+def run_pipeline(emails, target_date, workers):
+    """Process the emails through the EmailPipeline with a pool of browser workers"""
+    jobs = [
+        EmailJob(email, i, f"{ordinal(i)} email from bottom ({i}/{len(emails)})", target_date)
+        for i, email in enumerate(emails, 1)
+    ]
+    sessions = create_worker_sessions(workers, profile_root=None)
+    pipeline = EmailPipeline(sessions)
+    try:
+        pipeline.run(jobs)
+    finally:
+        for session in sessions:
+            session.quit()
+    return pipeline.worker_report()
+
+
+def run_benchmark(args):
+    """
+    Start the fake services, generate the emails, process them and report.
+
+    Returns:
+        bool: True if every email was processed and every edit was checked in
+    """
+    services = FakeServices(
+        topics=args.topics,
+        llm_latency=args.llm_latency,
+        page_latency=args.page_latency,
+        checkin_latency=args.checkin_latency,
+        paragraphs=args.paragraphs,
+    ).start()
+    os.environ["OPENAI_API_URL"] = f"{services.base_url}/v1/chat/completions"
+    if args.trace:
+        start_trace(args.trace)
+
+    target_date = date.today()
+    emails = make_notification_emails(services, args.emails, target_date)
+    emails.reverse()  # Oldest first, like main()
+
+    start = time.monotonic()
+    try:
+        if args.mode == "pipeline":
+            worker_lines = run_pipeline(emails, target_date, args.workers)
+        else:
+            worker_lines = run_sequential(emails, target_date)
+    finally:
+        elapsed = time.monotonic() - start
+        stop_trace()
+        services.stop()
+
+    processed = sum(1 for email in emails if not email.Unread)
+    # Every processed email adds one marker comment to its topic's checked-in XML
+    landed = sum(xml.count("<!-- benchmark edit") for xml in services.xml.values())
+    per_hour = processed / elapsed * 3600 if elapsed else 0.0
+
+    logger.info("\n" + "=" * 80)
+    logger.info("BENCHMARK SUMMARY")
+    logger.info("=" * 80)
+    logger.info(f"Mode: {args.mode}" + (f" ({args.workers} workers)" if args.mode == "pipeline" else ""))
+    logger.info(f"Emails: {len(emails)} over {args.topics} topics, LLM latency {args.llm_latency:.1f}s")
+    logger.info(f"Processed (marked read): {processed}/{len(emails)}")
+    logger.info(f"Edits present in checked-in XML: {landed}")
+    logger.info(f"Elapsed: {elapsed:.1f}s")
+    logger.info(f"Throughput: {per_hour:.1f} emails/hour")
+    logger.info(f"Fake service requests: {services.stats()}")
+    for title, lines in (("WORKER THROUGHPUT", worker_lines),
+                         ("READINESS WAITS", wait_report()),
+                         ("STAGE LATENCY (p50/p95/max)", latency_report())):
+        if lines:
+            logger.info(f"\n{title}:")
+            for line in lines:
+                logger.info(f"- {line}")
+
+    return processed == len(emails) and landed == len(emails)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end throughput benchmark")
+    parser.add_argument("--emails", type=int, default=20, help="Notification emails to process")
+    parser.add_argument("--topics", type=int, default=5, help="Distinct Help Portal topics")
+    parser.add_argument("--mode", choices=["sequential", "pipeline"], default="sequential",
+                        help="process_single_email per email, or the EmailPipeline")
+    parser.add_argument("--workers", type=int, default=2, help="Browser workers in pipeline mode")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Seconds per mock LLM call")
+    parser.add_argument("--page-latency", type=float, default=0.0, help="Seconds added to every page load")
+    parser.add_argument("--checkin-latency", type=float, default=0.5, help="Seconds per check-in")
+    parser.add_argument("--paragraphs", type=int, default=40, help="Paragraphs per topic XML")
+    parser.add_argument("--trace", help="Write stage spans to this JSONL file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    ok = run_benchmark(parse_args())
+    raise SystemExit(0 if ok else 1)
@@ -3,13 +3,21 @@
 import os
 import time
 import logging
+import argparse
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from automation.outlook_email_reader import connect_outlook, get_unread_sap_notification_emails, extract_breadcrumb_link
-from automation.browser_automation import apply_modified_xml, clean_title, click_check_in_button, get_annotation_offsets, get_page_title, launch_edge, open_help_portal_page, capture_comment_text, capture_underlined_text, switch_to_new_tab, click_edit_button, click_edit_as_xml, capture_full_xml_source, click_authentication_server, titles_match, verify_page_and_enable_comments, wait_for_homepage_load, close_current_tab, click_more_button, click_edit_in_IXIA_dropdown
-from xml_parser.extract_fragment import extract_snippet
-from ai.ai_processor import process_dita_comment
+from automation.outlook_email_reader import received_time
+from automation.mail_source import LocalMailSource, open_mail_source
+from automation.notification_parser import parse_notification
+from automation.browser_automation import launch_edge
+from automation.job_journal import JobJournal
+from automation.mail_state_writer import MailStateWriter
+from automation.readiness import wait_report
+from automation.tracing import latency_report, start_trace, stop_trace
+from config.settings import DAEMON_LOOKBACK_HOURS, DAEMON_MAX_ATTEMPTS, DAEMON_POLL_SECONDS
+from automation.network_trace import network_report
+from automation.pipeline import BrowserSession, EmailJob, EmailPipeline, check_in_report, create_worker_sessions, ordinal, process_job_sequentially, worker_profile_dir
 
 # Import OpenAI API key from settings or set in environment
 from config.settings import OPENAI_API_KEY
@@ -27,19 +35,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def is_driver_responsive(driver):
-    """Check if the WebDriver is still responsive"""
-    try:
-        # Try a simple command to check if driver is responsive
-        driver.current_url
-        return True
-    except Exception:
-        logger.error("WebDriver is no longer responsive")
-        return False
-
-def process_single_email(email, target_date, position_info, driver=None, authentication_done=False):
+# Per-stage timing spans for this run, one JSON object per line
+trace_filename = f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+
+def _format_time(received_time):
+    """Format an email's received time for the summary (None when ingestion failed early)"""
+    return received_time.strftime('%H:%M:%S') if received_time else "unknown time"
+
+def process_single_email(email, target_date, position_info, driver=None, authentication_done=False, journal=None, mail_writer=None, session=None):
     """
-    Process a single email notification and make the necessary changes
+    Process a single email notification and make the necessary changes.
+    Runs every pipeline stage back to back on the calling thread.
     
     Args:
         email: The email object to process
@@ -47,196 +53,38 @@ def process_single_email(email, target_date, position_info, driver=None, authent
         position_info: String describing position of email (e.g. "3rd from bottom") 
         driver: Existing WebDriver instance or None to create a new one
         authentication_done: Whether authentication has been done in this session
+        journal: Optional JobJournal to checkpoint stages in and resume from
+        mail_writer: Optional MailStateWriter that marks the email read in the background
+        session: BrowserSession to run in, kept by callers processing several
+                 emails so its idle editor tab is reused; driver and
+                 authentication_done are ignored when given
         
     Returns:
         tuple: (success, driver, authentication_done)
     """
-    # Track if we created our own driver
-    should_quit_driver = False
-    
-    try:
-        # Extract email subject and sender for better identification
-        email_subject = email.Subject
-        email_sender = email.SenderName
-        email_time = email.ReceivedTime.strftime("%H:%M:%S")
-        
-        logger.info(f"\nProcessing email: {position_info}")
-        logger.info(f"Subject: {email_subject}")
-        logger.info(f"From: {email_sender}")
-        logger.info(f"Time: {email_time}")
-        
-        # Step 1: Extract breadcrumb link, link text, and comment text
-        breadcrumb_url, link_text, email_comment_text = extract_breadcrumb_link(email)
-        if not breadcrumb_url:
-            logger.warning(f"⚠️ Could not extract breadcrumb URL. Skipping email {position_info}.")
-            return False, driver, authentication_done
-        
-        # Create new driver if needed
-        if driver is None or not is_driver_responsive(driver):
-            if driver is not None:
-                logger.warning("⚠️ Browser appears to be unresponsive. Restarting browser...")
-                try:
-                    driver.quit()
-                except:
-                    pass
-            
-            driver = launch_edge()
-            should_quit_driver = True
-            authentication_done = False  # Reset authentication flag
-            logger.info("✅ Launched new browser instance")
-            
-        # Step 2: Open SAP Help Portal page
-        open_help_portal_page(driver, breadcrumb_url)
-
-# Step 3: Verify we're on the correct page, handle filters if needed, and search if necessary
-        verify_page_and_enable_comments(driver, 
-                               expected_title=link_text,  # For title comparison
-                               breadcrumb_text=link_text)  # For search functionality
-        
-        # Step 3: Wait for dynamic comment highlighting
-        logger.info("⏳ Waiting 3 seconds for full dynamic comment loading...")
-        time.sleep(3)
-        
-        # Generate expected date string
-        expected_date_string = f"{target_date.month}/{target_date.day}/{str(target_date.year)[-2:]}"
-        
-
-        # Step 4: Capture comment text with HTML
-        comment_data = capture_comment_text(driver, email_comment_text)
-        if not comment_data:
-            logger.warning(f"⚠️ Could not capture comment text. Skipping email {position_info}.")
-            return False, driver, authentication_done
-
-        # Print captured information
-        logger.info("\n✅ Captured Comment Text:\n" + str(comment_data['text']))
-        logger.info("\n✅ Captured Comment HTML:\n" + str(comment_data['html']))
-        
-        # Step 5: Capture highlighted underlined text
-        underlined_text = capture_underlined_text(driver)
-        if not underlined_text:
-            logger.info("ℹ️ No underlined text found - this might be a new content request")
-            # Create a minimal structure for underlined_text to prevent crashes
-            underlined_text = {
-                "visible_text": "",
-                "comment_id": None,
-                "context": "",
-                "element_type": "unknown",
-                "parent_path": "",
-                "has_conkeyref": False,
-                "comment_type": "new_content"  # Special flag to indicate this is a new content request
-            }
-        
-        # Print captured information
-        logger.info("\n✅ Captured Underlined Text:\n" + str(underlined_text))
-        
-
-        
-        # Step 6: Navigate to XML editor
-        click_more_button(driver)
-        click_edit_in_IXIA_dropdown(driver)
-        switch_to_new_tab(driver)
-        
-        # Only authenticate if not done already in this session
-        if not authentication_done:
-            logger.info("First email in session - performing authentication...")
-            click_authentication_server(driver)
-            authentication_done = True
-        else:
-            logger.info("Authentication already done - skipping...")
-        
-        click_edit_button(driver)
-        click_edit_as_xml(driver)
-        
-        # Step 7: Capture full XML source
-        full_xml = capture_full_xml_source(driver)
-        if not full_xml:
-            logger.warning(f"⚠️ Could not capture full XML source. Skipping email {position_info}.")
-            return False, driver, authentication_done
-        
-        logger.info("\n✅ Captured full XML source")
-        
-        # Step 8: Use AI to process the XML with the comment
-        logger.info("\n🤖 Processing XML with AI...")
-        modified_xml, explanation = process_dita_comment(
-            full_xml, 
-            underlined_text, 
-            comment_data
-        )
-        
-        if not modified_xml:
-            logger.warning(f"⚠️ AI processing failed: {explanation}. Skipping email {position_info}.")
-            return False, driver, authentication_done
-        
-        logger.info("\n✅ AI processing successful")
-        logger.info(f"✅ AI explanation: {explanation}")
-        
-        # Step 9: Apply the modified XML to the document
-        if not apply_modified_xml(driver, modified_xml):
-            logger.warning(f"⚠️ Failed to apply modified XML. Skipping email {position_info}.")
-            return False, driver, authentication_done
-        
-                # Check if the XML was actually modified or if AI determined no changes needed
-        if "already implemented" in explanation.lower() or "already exists" in explanation.lower():
-            logger.info(f"✅ AI determined change already implemented: {explanation}")
-            # Mark email as read since the change is already in place
-            email.Unread = False
-            email.Save()
-            logger.info("✅ Marked email as Read after determining change was already implemented.")
-            return True, driver, authentication_done  # Return success even though no XML was changed
-        
-        # Add a small delay to ensure changes are registered
-        time.sleep(2)
-        
-        # Step 10: Check in the document
-        if not click_check_in_button(driver):
-            logger.warning(f"⚠️ Failed to check in document. Skipping email {position_info}.")
-            return False, driver, authentication_done
-        
-        logger.info("✅ Document successfully checked in")
+    temporary = session is None
+    if temporary:
+        session = BrowserSession(driver, authentication_done, profile_dir=worker_profile_dir(1))
+    job = EmailJob(email, 1, position_info, target_date)
 
-        time.sleep(3)  # Wait for check-in to complete
+    success = process_job_sequentially(session, job, journal, mail_writer)
+    if temporary:
+        # Nothing will reuse the idle editor tab of a throwaway session
+        session.close_idle_editor_tab()
+    return success, session.driver, session.authentication_done
 
-        # Mark email as read
-        email.Unread = False
-        email.Save()
-        logger.info("✅ Marked email as Read after processing.")
-        
-        return True, driver, authentication_done
-    
-    except Exception as e:
-        # Log the full stack trace for better debugging
-        logger.error(f"⚠️ Error processing email {position_info}: {e}")
-        logger.error(traceback.format_exc())
-        
-        # Take screenshot if driver is available
-        if driver:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshot_file = f"error_{timestamp}.png"
-            try:
-                driver.save_screenshot(screenshot_file)
-                logger.info(f"✅ Error screenshot saved as {screenshot_file}")
-            except:
-                logger.error("⚠️ Failed to save error screenshot")
-        
-        return False, driver, authentication_done
-    finally:
-        # Only quit the driver if we created it in this function
-        if should_quit_driver and driver:
-            try:
-                driver.quit()
-                driver = None
-                logger.info("✅ Closed browser instance created for this email")
-            except:
-                logger.error("⚠️ Error closing browser instance")
-
-def test_single_email():
+def test_single_email(mail_source=None):
     """
     Test function that processes just the first email for a given date
     using the same strategy as the main email processing flow.
+
+    Args:
+        mail_source: MailSource to read from (default: the configured one)
     """
     logger.info("=" * 80)
     logger.info("DITA COMMENT AUTOMATION TEST - SINGLE EMAIL")
     logger.info("=" * 80)
+    start_trace(trace_filename)
     
     try:
         # Ask user for input date
@@ -244,34 +92,28 @@ def test_single_email():
         target_date = datetime.strptime(date_input, "%Y-%m-%d").date()
         logger.info(f"Processing comments for date: {target_date}")
         
-        # Connect to Outlook
-        logger.info("Connecting to Outlook...")
-        outlook = connect_outlook()
+        # Connect to the mail source (Outlook unless configured otherwise)
+        mail_source = mail_source or open_mail_source()
         
         # Find unread SAP Help Portal emails for the specified date
         logger.info(f"Finding unread SAP notification emails for {target_date}...")
-        unread_emails = get_unread_sap_notification_emails(outlook, target_date)
         
-        if not unread_emails:
+        # Take only the first (oldest) email
+        test_email = next(iter(mail_source.unread_notifications(target_date)), None)
+        
+        if test_email is None:
             logger.info("ℹ️ No unread SAP Help Portal emails found for this date. Exiting.")
             return
-        
-        total_emails = len(unread_emails)
-        logger.info(f"✅ Found {total_emails} unread SAP notification emails on {target_date}.")
-        
-        # Reverse the list to process oldest emails first (same as main function)
-        unread_emails.reverse()
-        
-        # Take only the first email
-        test_email = unread_emails[0]
         logger.info("=" * 60)
         logger.info(f"TEST MODE: Processing only the first email")
         logger.info("=" * 60)
         
         # Initialize driver
         logger.info("Launching web browser...")
-        driver = launch_edge()
+        driver = launch_edge(profile_dir=worker_profile_dir(1))
         authentication_done = False
+        journal = JobJournal()
+        mail_writer = MailStateWriter(mail_source).start()
         
         try:
             # Process just the first email
@@ -281,7 +123,9 @@ def test_single_email():
                 target_date, 
                 position_info, 
                 driver, 
-                authentication_done
+                authentication_done,
+                journal,
+                mail_writer
             )
             
             if success:
@@ -297,173 +141,326 @@ def test_single_email():
                     logger.info("✅ Closed browser instance")
                 except:
                     logger.error("⚠️ Error closing browser instance")
+            mail_writer.close()
+            journal.close()
         
         # Write test summary
         logger.info("\n" + "="*80)
         logger.info("TEST SUMMARY")
         logger.info("="*80)
         logger.info(f"Date: {target_date}")
-        logger.info(f"Email Subject: {test_email.Subject}")
-        logger.info(f"Sender: {test_email.SenderName}")
+        record = parse_notification(test_email)
+        logger.info(f"Email Subject: {record.subject}")
+        logger.info(f"Sender: {record.sender}")
         logger.info(f"Result: {'SUCCESS' if success else 'FAILURE'}")
+        for line in latency_report():
+            logger.info(f"- {line}")
         
     except Exception as e:
         logger.error(f"⚠️ Critical error in test process: {e}")
         logger.error(traceback.format_exc())
     
+    stop_trace()
     logger.info("=" * 80)
     logger.info("DITA COMMENT AUTOMATION TEST COMPLETED")
     logger.info("=" * 80)
 
-if __name__ == "__main__":
-    # Change this to test_single_email() for testing one email
-    test_single_email()
-    # main()  # Comment this out during testing
+def write_summary(jobs, target_label, worker_report, extra_sections=()):
+    """
+    Log the processing summary and save it to a summary_<timestamp>.txt file.
+
+    Args:
+        jobs: Every EmailJob of the run
+        target_label: Line describing what was processed (e.g. "Target date: ...")
+        worker_report: Lines from EmailPipeline.worker_report()
+        extra_sections: Additional (title, lines) pairs to append
+    """
+    successful_emails = [job for job in jobs if job.success]
+    superseded_emails = [job for job in jobs if job.superseded_by]
+    failed_emails = [job for job in jobs if not job.success and not job.superseded_by]
+
+    sections = []
+    if failed_emails:
+        sections.append(("FAILED EMAILS (Require manual attention)", [
+            f"{job.position_info}: '{job.subject}' received at {_format_time(job.received_time)}"
+            for job in failed_emails
+        ]))
+    if superseded_emails:
+        sections.append(("SUPERSEDED EMAILS (Handled by a newer notification)", [
+            f"{job.position_info}: superseded by {job.superseded_by.position_info}"
+            for job in superseded_emails
+        ]))
+    sections.append(("WORKER THROUGHPUT", worker_report))
+    sections.append(("CHECK-IN CONFIRMATION", check_in_report(jobs)))
+    sections.append(("READINESS WAITS", wait_report()))
+    sections.append(("STAGE LATENCY (p50/p95/max)", latency_report()))
+    network_lines = network_report()
+    if network_lines:
+        sections.append(("NETWORK (heaviest and slowest resources per page type)", network_lines))
+    sections.extend(extra_sections)
 
+    # Print summary report
+    logger.info("\n" + "="*80)
+    logger.info("PROCESSING SUMMARY")
+    logger.info("="*80)
+    logger.info(target_label)
+    logger.info(f"Total emails processed: {len(jobs)}")
+    logger.info(f"Successfully processed: {len(successful_emails)}")
+    logger.info(f"Superseded (skipped): {len(superseded_emails)}")
+    logger.info(f"Failed to process: {len(failed_emails)}")
+    for title, lines in sections:
+        logger.info(f"\n{title}:")
+        for line in lines:
+            logger.info(f"- {line}")
+
+    # Write summary to separate file for quick reference
+    summary_file = f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    with open(summary_file, 'w') as f:
+        f.write("DITA COMMENT AUTOMATION SUMMARY\n")
+        f.write("=" * 50 + "\n")
+        f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"{target_label}\n")
+        f.write(f"Total emails processed: {len(jobs)}\n")
+        f.write(f"Successfully processed: {len(successful_emails)}\n")
+        f.write(f"Superseded (skipped): {len(superseded_emails)}\n")
+        f.write(f"Failed to process: {len(failed_emails)}\n")
+        for title, lines in sections:
+            f.write(f"\n{title}:\n")
+            for line in lines:
+                f.write(f"- {line}\n")
+        f.write(f"\nTrace file: {trace_filename}\n")
+
+    logger.info(f"Summary saved to {summary_file}")
+
+def parse_date_range(text):
+    """
+    Parse the dates to process: "YYYY-MM-DD", "YYYY-MM-DD..YYYY-MM-DD"
+    (inclusive, either side may be left empty) or "all" for every unread
+    notification.
+
+    Returns:
+        tuple: (start_date, end_date, label); None for an open bound
+    """
+    text = text.strip()
+    if text.lower() == "all":
+        return None, None, "All unread notifications"
+    if ".." not in text:
+        day = datetime.strptime(text, "%Y-%m-%d").date()
+        return day, day, f"Target date: {day}"
+    first, last = (part.strip() for part in text.split("..", 1))
+    start_date = datetime.strptime(first, "%Y-%m-%d").date() if first else None
+    end_date = datetime.strptime(last, "%Y-%m-%d").date() if last else None
+    if start_date and end_date and start_date > end_date:
+        raise ValueError(f"Date range starts after it ends: {text}")
+    return start_date, end_date, f"Date range: {start_date or 'beginning'} to {end_date or 'today'}"
 
-def main():
+def main(mail_source=None, dates=None):
+    """
+    Process every unread notification for a date, a date range or the whole
+    inbox. The range is scanned once and the backlog is worked through
+    oldest-first in one session, so browsers and authentication stay warm
+    across days.
+
+    Args:
+        mail_source: MailSource to read from (default: the configured one)
+        dates: Date selection as accepted by parse_date_range; asked for if None
+    """
     logger.info("=" * 80)
     logger.info("DITA COMMENT AUTOMATION STARTED")
     logger.info("=" * 80)
     logger.info(f"Log file: {log_filename}")
+    start_trace(trace_filename)
     
     try:
-        # Ask user for input date
-        date_input = input("Enter target date (YYYY-MM-DD): ")
-        target_date = datetime.strptime(date_input, "%Y-%m-%d").date()
-        logger.info(f"Processing comments for date: {target_date}")
+        # Ask user for input date(s)
+        date_input = dates or input("Enter target date (YYYY-MM-DD), range (YYYY-MM-DD..YYYY-MM-DD) or 'all': ")
+        start_date, end_date, target_label = parse_date_range(date_input)
+        logger.info(f"Processing comments for {target_label}")
         
-        # Connect to Outlook
-        logger.info("Connecting to Outlook...")
-        outlook = connect_outlook()
+        # Connect to the mail source (Outlook unless configured otherwise)
+        mail_source = mail_source or open_mail_source()
         
-        # Find unread SAP Help Portal emails
-        logger.info(f"Finding unread SAP notification emails for {target_date}...")
-        unread_emails = get_unread_sap_notification_emails(outlook, target_date)
-        
-        if not unread_emails:
+        # Find unread SAP Help Portal emails across the whole range in one scan, oldest first
+        # This ensures the newest comments on the same topics are processed last
+        logger.info("Finding unread SAP notification emails...")
+        # Emails are streamed from the source straight into jobs
+        jobs = [
+            EmailJob(email, i, None, start_date)
+            for i, email in enumerate(mail_source.unread_notifications_in_range(start_date, end_date), 1)
+        ]
+        
+        if not jobs:
             logger.info("ℹ️ No unread SAP Help Portal emails found. Exiting.")
             return
         
-        total_emails = len(unread_emails)
-        logger.info(f"✅ Found {total_emails} unread SAP notification emails on {target_date}.")
-        
-        # Reverse the list to process oldest emails first
-        # This ensures the newest comments on the same topics are processed last
-        unread_emails.reverse()
-        
-        # Track successfully and failed emails
-        successful_emails = []
-        failed_emails = []
+        total_emails = len(jobs)
+        logger.info(f"✅ Found {total_emails} unread SAP notification emails ({target_label}).")
         
-        # Initialize driver outside the loop to reuse it
-        logger.info("Launching web browser...")
-        driver = launch_edge()
+        for job in jobs:
+            # Position from bottom (1-based indexing)
+            job.position_info = f"{ordinal(job.position)} email from bottom ({job.position}/{total_emails})"
         
-        # Flag to track if authentication has been done in this session
-        authentication_done = False
+        # One session per browser worker; each launches its browser on first use
+        sessions = create_worker_sessions()
+        logger.info(f"Starting {len(sessions)} browser worker(s)...")
         
-        # Process each email
-        max_consecutive_failures = 3
-        consecutive_failures = 0
+        # Stages already completed by an earlier (crashed) run are skipped
+        journal = JobJournal()
+        # Mark-as-read updates are applied in the background, off the browser path
+        mail_writer = MailStateWriter(mail_source).start()
+        pipeline = EmailPipeline(sessions, journal=journal, mail_writer=mail_writer)
         
         try:
-            for i, email in enumerate(unread_emails, 1):
-                # Calculate position from bottom (1-based indexing)
-                position_from_bottom = i
-                ordinal = lambda n: "%d%s" % (n,"tsnrhtdd"[(n//10%10!=1)*(n%10<4)*n%10::4])
-                position_info = f"{ordinal(position_from_bottom)} email from bottom ({i}/{total_emails})"
-                
-                logger.info("=" * 60)
-                logger.info(f"Starting to process {position_info}")
-                logger.info("=" * 60)
-                
-                # Check if we need to restart the browser due to too many consecutive failures
-                if consecutive_failures >= max_consecutive_failures and driver:
-                    logger.warning(f"⚠️ {max_consecutive_failures} consecutive failures. Restarting browser...")
-                    try:
-                        driver.quit()
-                    except:
-                        pass
-                    driver = launch_edge()
-                    authentication_done = False  # Reset authentication flag for new browser
-                    consecutive_failures = 0
-                
-                try:
-                    success, driver, authentication_done = process_single_email(
-                        email, target_date, position_info, driver, authentication_done
-                    )
-                    
-                    if success:
-                        logger.info(f"✅ Successfully processed {position_info}")
-                        successful_emails.append((position_from_bottom, email.Subject, email.ReceivedTime))
-                        consecutive_failures = 0  # Reset consecutive failures counter
-                    else:
-                        logger.warning(f"⚠️ Failed to process {position_info}")
-                        failed_emails.append((position_from_bottom, email.Subject, email.ReceivedTime))
-                        consecutive_failures += 1
-                    
-                    # Add a delay between emails to ensure browser is stable
-                    if i < total_emails:
-                        delay = 5  # seconds between emails
-                        logger.info(f"Waiting {delay} seconds before processing next email...")
-                        time.sleep(delay)
-                
-                except Exception as e:
-                    logger.error(f"⚠️ Catastrophic error processing {position_info}: {e}")
-                    logger.error(traceback.format_exc())
-                    failed_emails.append((position_from_bottom, email.Subject, email.ReceivedTime))
-                    consecutive_failures += 1
-                    authentication_done = False  # Reset on catastrophic error
-        
+            # Overlap browser work for the next emails with the AI call of earlier ones
+            pipeline.run(jobs)
         finally:
-            # Always quit the driver when done
-            if driver:
-                try:
-                    driver.quit()
-                    logger.info("✅ Closed browser instance")
-                except:
-                    logger.error("⚠️ Error closing browser instance")
-        
-        # Print summary report
-        logger.info("\n" + "="*80)
-        logger.info("PROCESSING SUMMARY")
-        logger.info("="*80)
-        logger.info(f"Total emails processed: {total_emails}")
-        logger.info(f"Successfully processed: {len(successful_emails)}")
-        logger.info(f"Failed to process: {len(failed_emails)}")
-        
-        if failed_emails:
-            logger.info("\nFAILED EMAILS (Require manual attention):")
-            for pos, subject, time in failed_emails:
-                logger.info(f"- {ordinal(pos)} from bottom: '{subject}' received at {time.strftime('%H:%M:%S')}")
-        
-        # Write summary to separate file for quick reference
-        summary_file = f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        with open(summary_file, 'w') as f:
-            f.write("DITA COMMENT AUTOMATION SUMMARY\n")
-            f.write("=" * 50 + "\n")
-            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Target date: {target_date}\n")
-            f.write(f"Total emails processed: {total_emails}\n")
-            f.write(f"Successfully processed: {len(successful_emails)}\n")
-            f.write(f"Failed to process: {len(failed_emails)}\n\n")
-            
-            if failed_emails:
-                f.write("FAILED EMAILS (Require manual attention):\n")
-                for pos, subject, time in failed_emails:
-                    f.write(f"- {ordinal(pos)} from bottom: '{subject}' received at {time.strftime('%H:%M:%S')}\n")
-        
-        logger.info(f"Summary saved to {summary_file}")
+            # Always quit the drivers when done
+            for session in sessions:
+                session.quit()
+            mail_writer.close()
+            journal.close()
+        write_summary(jobs, target_label, pipeline.worker_report())
     
     except Exception as e:
         logger.error(f"⚠️ Critical error in main process: {e}")
         logger.error(traceback.format_exc())
     
+    stop_trace()
     logger.info("=" * 80)
     logger.info("DITA COMMENT AUTOMATION COMPLETED")
     logger.info("=" * 80)
 
 
+def run_daemon(poll_seconds=DAEMON_POLL_SECONDS, lookback_hours=DAEMON_LOOKBACK_HOURS, mail_source=None):
+    """
+    Long-running service mode: watch the inbox for new notifications and
+    process each batch of arrivals as soon as it is seen.
+
+    Only mail received after a high-water mark is scanned on each poll, and
+    the browser workers, their IXIA authentication and the OpenAI connection
+    stay warm between arrivals. Emails that failed or whose check-in was not
+    confirmed stay unread and are queued again on later polls, up to
+    DAEMON_MAX_ATTEMPTS times. Stop with Ctrl+C; the summary is written on
+    exit.
+
+    Args:
+        poll_seconds: Seconds between inbox checks
+        lookback_hours: How far back unread notifications are picked up at start
+        mail_source: MailSource to watch (default: the configured one)
+    """
+    logger.info("=" * 80)
+    logger.info("DITA COMMENT AUTOMATION DAEMON STARTED")
+    logger.info("=" * 80)
+    logger.info(f"Log file: {log_filename}")
+    start_trace(trace_filename)
+
+    jobs = []
+    worker_report = []
+    worker_totals = {}    # Throughput per worker, summed over every poll
+    arrival_delays = []   # Minutes from email arrival to check-in
+    retries = {}          # EntryID -> (received time, attempts, last job) of emails to try again
+    sessions = create_worker_sessions()
+    journal = JobJournal()
+    mail_writer = None
+
+    try:
+        mail_source = mail_source or open_mail_source()
+        mail_writer = MailStateWriter(mail_source).start()
+        high_water = datetime.now() - timedelta(hours=lookback_hours)
+        logger.info(f"Watching for SAP notification emails received after {high_water:%Y-%m-%d %H:%M} "
+                    f"(checking every {poll_seconds}s, Ctrl+C to stop)")
+
+        while True:
+            # Look back far enough to see the unfinished emails again
+            since = min([high_water] + [received - timedelta(seconds=1) for received, _, _ in retries.values()])
+            batch_jobs = []
+            listed = set()
+            for email in mail_source.new_notifications(since):
+                email_time = received_time(email)
+                entry_id = getattr(email, "EntryID", None)
+                listed.add(entry_id)
+                if entry_id in retries:
+                    # Same place in the summary; the last attempt's outcome counts
+                    previous = retries[entry_id][2]
+                    job = EmailJob(email, previous.position, previous.position_info, email_time.date())
+                    jobs[jobs.index(previous)] = job
+                elif email_time > high_water:
+                    i = len(jobs) + 1
+                    job = EmailJob(email, i, f"{ordinal(i)} email since start", email_time.date())
+                    jobs.append(job)
+                else:
+                    continue  # Already done; its read state may still be queued
+                batch_jobs.append(job)
+                high_water = max(high_water, email_time)
+            for entry_id in set(retries) - listed:
+                # Read or moved since (e.g. by hand): nothing left to retry
+                del retries[entry_id]
+
+            if batch_jobs:
+                logger.info(f"✅ {len(batch_jobs)} new SAP notification email(s)")
+
+                # The workers' browsers were launched by an earlier run and are reused
+                pipeline = EmailPipeline(sessions, journal=journal, mail_writer=mail_writer)
+                pipeline.run(batch_jobs)
+                worker_report = pipeline.worker_report(worker_totals)
+
+                for job in batch_jobs:
+                    entry_id = getattr(job.email, "EntryID", None)
+                    _, attempts, _ = retries.pop(entry_id, (None, 0, None))
+                    if job.success:
+                        delay = (datetime.now() - job.received_time).total_seconds() / 60
+                        arrival_delays.append(delay)
+                        logger.info(f"⏱️ {job.position_info} done {delay:.1f} min after arrival")
+                    elif entry_id and attempts + 1 < DAEMON_MAX_ATTEMPTS:
+                        retries[entry_id] = (received_time(job.email), attempts + 1, job)
+                        logger.info(f"🔁 {job.position_info} will be tried again on the next poll")
+                    else:
+                        logger.warning(f"⚠️ {job.position_info} failed {attempts + 1} time(s); left unread for a later run")
+                logger.info(f"Processed {sum(job.success for job in jobs)}/{len(jobs)} emails since start")
+
+            time.sleep(poll_seconds)
+
+    except KeyboardInterrupt:
+        logger.info("Daemon stopped by user")
+    except Exception as e:
+        logger.error(f"⚠️ Critical error in daemon: {e}")
+        logger.error(traceback.format_exc())
+    finally:
+        for session in sessions:
+            session.quit()
+        if mail_writer:
+            mail_writer.close()
+        journal.close()
+
+    arrival_lines = []
+    if arrival_delays:
+        arrival_lines.append(f"average {sum(arrival_delays) / len(arrival_delays):.1f} min, "
+                             f"max {max(arrival_delays):.1f} min")
+    write_summary(jobs, f"Daemon mode: {len(jobs)} notification(s) seen", worker_report,
+                  [("ARRIVAL TO CHECK-IN", arrival_lines)])
+
+    stop_trace()
+    logger.info("=" * 80)
+    logger.info("DITA COMMENT AUTOMATION DAEMON STOPPED")
+    logger.info("=" * 80)
+
+
 if __name__ == "__main__":
-    test_single_email()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Apply SAP Help Portal comments to DITA topics")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Watch for new notifications and process them as they arrive")
+    parser.add_argument("--dates",
+                        help="Process every unread notification for a date (YYYY-MM-DD), "
+                             "range (YYYY-MM-DD..YYYY-MM-DD) or 'all' in one session")
+    parser.add_argument("--mail-path",
+                        help="Read saved notifications from this folder of .eml/.msg files or mbox file instead of Outlook")
+    args = parser.parse_args()
+    mail_source = LocalMailSource(args.mail_path) if args.mail_path else None
+
+    if args.daemon:
+        run_daemon(mail_source=mail_source)
+    elif args.dates:
+        main(mail_source, args.dates)
+    else:
+        # Change this to main(mail_source) to process every email for a date
+        test_single_email(mail_source)
\ No newline at end of file
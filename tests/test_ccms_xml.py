@@ -0,0 +1,45 @@
+import pytest
+
+from automation import browser_automation
+from automation.browser_automation import save_ccms_xml
+
+
+class FakeBackend:
+    """CCMS backend that stores what is saved, unless told to drop it"""
+
+    def __init__(self, stored="<topic/>", keep=True, status=200):
+        self.stored = stored
+        self.keep = keep
+        self.status = status
+
+    def request(self, driver, url, method="GET", body=None, timeout=60):
+        if body is None:
+            return {"status": 200, "text": self.stored}
+        if self.keep:
+            self.stored = body
+        return {"status": self.status, "text": ""}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(browser_automation, "_ccms_url", lambda driver, template: "https://ixia/doc/1")
+    monkeypatch.setattr(browser_automation, "_ccms_request", backend.request)
+    return backend
+
+
+def test_save_is_confirmed_by_reading_the_document_back(backend):
+    assert save_ccms_xml(None, "<topic>\r\n<p>new</p>\r\n</topic>")
+    assert backend.stored == "<topic>\r\n<p>new</p>\r\n</topic>"
+
+
+def test_accepted_save_the_document_does_not_hold_fails(backend):
+    backend.keep = False
+
+    assert not save_ccms_xml(None, "<topic><p>new</p></topic>")
+
+
+def test_rejected_save_fails(backend):
+    backend.status = 409
+
+    assert not save_ccms_xml(None, "<topic><p>new</p></topic>")
@@ -0,0 +1,98 @@
+import importlib
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+NOW = datetime.now()
+
+
+@pytest.fixture(scope="module")
+def main_module(tmp_path_factory):
+    # Importing main sets up a log file in the working directory
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp("logs"))
+        return importlib.import_module("main")
+
+
+class FakeEmail:
+    def __init__(self, entry_id, minutes_ago):
+        self.EntryID = entry_id
+        self.ReceivedTime = NOW - timedelta(minutes=minutes_ago)
+
+
+class FakeSource:
+    """Inbox whose emails arrive at a given poll; read emails are not listed"""
+
+    def __init__(self, arrivals):
+        self.arrivals = arrivals   # poll number -> emails arriving before it
+        self.inbox = []
+        self.read = set()
+        self.poll = 0
+
+    def new_notifications(self, since):
+        self.poll += 1
+        self.inbox += self.arrivals.get(self.poll, [])
+        unread = [e for e in self.inbox if e.EntryID not in self.read and e.ReceivedTime > since]
+        return sorted(unread, key=lambda e: e.ReceivedTime)
+
+    def open_writer(self):
+        return self
+
+    def mark_read(self, entry_id):
+        self.read.add(entry_id)
+
+    def close(self):
+        pass
+
+
+def run_daemon(main_module, monkeypatch, tmp_path, source, outcomes, polls):
+    """Run the daemon for the given number of polls; returns the entry ids processed on each"""
+    processed = []
+
+    class FakePipeline:
+        def __init__(self, sessions, journal=None, mail_writer=None):
+            pass
+
+        def run(self, jobs):
+            processed.append([job.email.EntryID for job in jobs])
+            for job in jobs:
+                job.received_time = job.email.ReceivedTime
+                job.success = outcomes[job.email.EntryID].pop(0)
+                if job.success:
+                    source.mark_read(job.email.EntryID)
+
+        def worker_report(self, totals=None):
+            return []
+
+    def sleep(seconds):
+        if source.poll >= polls:
+            raise KeyboardInterrupt
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main_module, "EmailPipeline", FakePipeline)
+    monkeypatch.setattr(main_module, "time", SimpleNamespace(sleep=sleep))
+    monkeypatch.setattr(main_module, "DAEMON_MAX_ATTEMPTS", 3)
+    main_module.run_daemon(poll_seconds=0, mail_source=source)
+    return processed
+
+
+def test_failed_emails_are_retried_on_later_polls(main_module, monkeypatch, tmp_path):
+    source = FakeSource({1: [FakeEmail("old", 30), FakeEmail("ok", 20)], 2: [FakeEmail("new", 5)]})
+    outcomes = {"old": [False, True], "ok": [True], "new": [True]}
+
+    processed = run_daemon(main_module, monkeypatch, tmp_path, source, outcomes, polls=3)
+
+    # "old" is older than the high-water mark set by "ok" but still comes back
+    assert processed == [["old", "ok"], ["old", "new"]]
+    assert source.read == {"old", "ok", "new"}
+
+
+def test_retries_stop_after_max_attempts(main_module, monkeypatch, tmp_path):
+    source = FakeSource({1: [FakeEmail("broken", 10)]})
+    outcomes = {"broken": [False, False, False]}
+
+    processed = run_daemon(main_module, monkeypatch, tmp_path, source, outcomes, polls=5)
+
+    assert processed == [["broken"]] * 3
+    assert source.read == set()
@@ -0,0 +1,43 @@
+import importlib
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def main_module(tmp_path_factory):
+    # Importing main sets up a log file in the working directory
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp("logs"))
+        return importlib.import_module("main")
+
+
+def test_single_day(main_module):
+    assert main_module.parse_date_range(" 2025-05-03 ") == (
+        date(2025, 5, 3), date(2025, 5, 3), "Target date: 2025-05-03")
+
+
+def test_inclusive_range(main_module):
+    start, end, label = main_module.parse_date_range("2025-05-01..2025-05-03")
+
+    assert (start, end) == (date(2025, 5, 1), date(2025, 5, 3))
+    assert label == "Date range: 2025-05-01 to 2025-05-03"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-05-01..", (date(2025, 5, 1), None)),
+    ("..2025-05-03", (None, date(2025, 5, 3))),
+    ("2025-05-01 .. 2025-05-03", (date(2025, 5, 1), date(2025, 5, 3))),
+])
+def test_open_bounds(main_module, text, expected):
+    assert main_module.parse_date_range(text)[:2] == expected
+
+
+def test_all(main_module):
+    assert main_module.parse_date_range("ALL") == (None, None, "All unread notifications")
+
+
+@pytest.mark.parametrize("text", ["2025-05-03..2025-05-01", "05/03/2025", "2025-05-01..tomorrow"])
+def test_invalid(main_module, text):
+    with pytest.raises(ValueError):
+        main_module.parse_date_range(text)
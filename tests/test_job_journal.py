@@ -0,0 +1,109 @@
+import hashlib
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from automation import notification_parser, pipeline
+from automation.job_journal import (STAGE_AI_OUTPUT, STAGE_CHECKED_IN, STAGE_COMMENT_CAPTURED, STAGE_EXTRACTED,
+                                    JobJournal)
+from benchmark.fake_mail import FakeMailItem, notification_html
+
+XML = "<topic><p>Old text</p></topic>"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    notification_parser._cache.clear()
+    yield
+    notification_parser._cache.clear()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.sqlite3"))
+    yield journal
+    journal.close()
+
+
+def make_email():
+    body = notification_html("https://help.sap.com/docs/p/t/page?comment_id=42", "Setting Up Sales", "Fix step 3")
+    return FakeMailItem(body, datetime(2025, 5, 3, 9, 0))
+
+
+def ingest(email, journal):
+    job = pipeline.EmailJob(email, 1, "#1", None)
+    return job, pipeline.ingest_email(job, journal)
+
+
+def test_stages_survive_reopening(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    journal = JobJournal(path)
+    journal.record("e1", "42", STAGE_EXTRACTED, {"link_text": "Setting Up Sales"})
+    journal.record("e1", "42", STAGE_COMMENT_CAPTURED, {"comment_data": {"text": "Fix"}})
+    journal.record(None, "42", STAGE_CHECKED_IN)   # No EntryID: nothing to key on
+    journal.close()
+
+    journal = JobJournal(path)
+    assert journal.load("e1") == {
+        STAGE_EXTRACTED: {"link_text": "Setting Up Sales"},
+        STAGE_COMMENT_CAPTURED: {"comment_data": {"text": "Fix"}},
+    }
+    assert journal.last_stage("e1") == STAGE_COMMENT_CAPTURED
+    assert journal.load("unknown") == {} and journal.last_stage("unknown") is None
+    journal.close()
+
+
+def test_ingest_records_the_extracted_email(journal):
+    email = make_email()
+
+    job, ready = ingest(email, journal)
+
+    assert ready
+    assert journal.last_stage(email.EntryID) == STAGE_EXTRACTED
+    assert journal.load(email.EntryID)[STAGE_EXTRACTED]["comment_id"] == "42"
+
+
+def test_checked_in_email_is_skipped(journal):
+    email = make_email()
+    ingest(email, journal)
+    journal.record(email.EntryID, "42", STAGE_CHECKED_IN, {"already_implemented": True})
+    notification_parser._cache.clear()
+
+    job, ready = ingest(email, journal)
+
+    assert not ready
+    assert job.success and job.already_implemented
+
+
+def test_resumed_email_skips_the_stages_it_completed(journal, monkeypatch):
+    email = make_email()
+    first, _ = ingest(email, journal)
+    captured = {"comment_data": {"text": "Fix step 3"}, "underlined_text": {"visible_text": "step 3"}}
+    journal.record(email.EntryID, "42", STAGE_COMMENT_CAPTURED, captured)
+    journal.record(email.EntryID, "42", STAGE_AI_OUTPUT, {
+        "input_sha": hashlib.sha256(XML.encode("utf-8")).hexdigest(),
+        "modified_xml": "<topic><p>New text</p></topic>",
+        "explanation": "Fixed step 3",
+    })
+    calls = []
+    monkeypatch.setattr(pipeline, "open_topic_page", lambda driver, job: True)
+    monkeypatch.setattr(pipeline, "capture_comment_text", lambda driver, text: calls.append("capture"))
+    monkeypatch.setattr(pipeline, "process_dita_comment",
+                        lambda xml, underlined, comment: calls.append(xml) or (xml + "<!-- AI -->", "Redone"))
+
+    # Restart: the email body is gone, the journal still has what was extracted
+    email.HTMLBody = ""
+    notification_parser._cache.clear()
+    job, ready = ingest(email, journal)
+
+    assert ready and job.breadcrumb_url == first.breadcrumb_url
+    driver = SimpleNamespace(switch_to=SimpleNamespace(window=lambda handle: None))
+    assert pipeline.capture_portal(SimpleNamespace(driver=driver, portal_handle="portal"), job)
+    assert job.comment_data == captured["comment_data"] and job.underlined_text == captured["underlined_text"]
+    assert pipeline.run_ai(job, XML)
+    assert job.modified_xml == "<topic><p>New text</p></topic>" and calls == []
+
+    # The stored output only applies to the XML it was made from
+    assert pipeline.run_ai(job, XML.replace("Old", "Changed"))
+    assert job.explanation == "Redone" and len(calls) == 1
@@ -0,0 +1,117 @@
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+import pytest
+
+from automation.mail_source import LocalMailSource, MailSource
+from config.settings import OUTLOOK_EMAIL_SUBJECT_FILTER
+
+
+def write_eml(folder, name, received, subject=OUTLOOK_EMAIL_SUBJECT_FILTER):
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = "SAP Help Portal <noreply@sap.com>"
+    message["Date"] = format_datetime(received.astimezone())
+    message["Message-ID"] = f"<{name}@example.com>"
+    message.set_content("<html><body><a href='x'>x</a></body></html>", subtype="html")
+    (folder / f"{name}.eml").write_bytes(bytes(message))
+    return f"<{name}@example.com>"
+
+
+@pytest.fixture
+def mail_dir(tmp_path):
+    folder = tmp_path / "mail"
+    folder.mkdir()
+    return folder
+
+
+def ids(items):
+    return [item.EntryID for item in items]
+
+
+def test_mail_source_is_abstract():
+    with pytest.raises(TypeError):
+        MailSource()
+
+    class Incomplete(MailSource):
+        def unread_notifications(self, target_date):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_filters_by_day_and_subject_oldest_first(mail_dir):
+    late = write_eml(mail_dir, "a", datetime(2025, 5, 3, 18, 0))
+    early = write_eml(mail_dir, "b", datetime(2025, 5, 3, 9, 0))
+    write_eml(mail_dir, "c", datetime(2025, 5, 4, 9, 0))
+    write_eml(mail_dir, "d", datetime(2025, 5, 3, 10, 0), subject="Something else")
+
+    source = LocalMailSource(str(mail_dir))
+
+    assert ids(source.unread_notifications(date(2025, 5, 3))) == [early, late]
+
+
+def test_range_bounds_are_inclusive_and_optional(mail_dir):
+    first = write_eml(mail_dir, "a", datetime(2025, 5, 1, 12, 0))
+    second = write_eml(mail_dir, "b", datetime(2025, 5, 2, 23, 59))
+    third = write_eml(mail_dir, "c", datetime(2025, 5, 3, 0, 0))
+
+    source = LocalMailSource(str(mail_dir))
+
+    assert ids(source.unread_notifications_in_range(date(2025, 5, 1), date(2025, 5, 2))) == [first, second]
+    assert ids(source.unread_notifications_in_range(date(2025, 5, 2), None)) == [second, third]
+    assert ids(source.unread_notifications_in_range()) == [first, second, third]
+
+
+def test_new_notifications_excludes_since(mail_dir):
+    since = datetime(2025, 5, 3, 12, 0)
+    write_eml(mail_dir, "a", since)
+    later = write_eml(mail_dir, "b", since + timedelta(seconds=1))
+
+    source = LocalMailSource(str(mail_dir))
+
+    assert ids(source.new_notifications(since)) == [later]
+
+
+def test_read_emails_are_skipped_and_remembered(mail_dir):
+    read = write_eml(mail_dir, "a", datetime(2025, 5, 3, 9, 0))
+    unread = write_eml(mail_dir, "b", datetime(2025, 5, 3, 10, 0))
+
+    source = LocalMailSource(str(mail_dir))
+    item = next(iter(source.unread_notifications(date(2025, 5, 3))))
+    item.Unread = False
+    item.Save()
+
+    assert ids(source.unread_notifications(date(2025, 5, 3))) == [unread]
+    # Read state persists in the sidecar file
+    assert ids(LocalMailSource(str(mail_dir)).unread_notifications(date(2025, 5, 3))) == [unread]
+    assert read in (mail_dir.parent / "mail.read").read_text()
+
+
+def test_index_picks_up_new_and_removed_files(mail_dir):
+    first = write_eml(mail_dir, "a", datetime(2025, 5, 3, 9, 0))
+    source = LocalMailSource(str(mail_dir))
+    assert ids(source.unread_notifications_in_range()) == [first]
+
+    earlier = write_eml(mail_dir, "b", datetime(2025, 5, 2, 9, 0))
+    assert ids(source.unread_notifications_in_range()) == [earlier, first]
+
+    (mail_dir / "a.eml").unlink()
+    assert ids(source.unread_notifications_in_range()) == [earlier]
+
+
+def test_items_are_yielded_lazily(mail_dir):
+    write_eml(mail_dir, "a", datetime(2025, 5, 3, 9, 0))
+    write_eml(mail_dir, "b", datetime(2025, 5, 3, 10, 0))
+    source = LocalMailSource(str(mail_dir))
+
+    items = source.unread_notifications_in_range()
+    first = next(items)
+    first.Unread = False
+    first.Save()
+
+    # The second item is only produced when asked for
+    assert ids(items) == ["<b@example.com>"]
+    assert "href='x'" in first.HTMLBody   # Body read from disk on access
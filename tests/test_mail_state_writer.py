@@ -0,0 +1,83 @@
+import threading
+
+from automation.mail_state_writer import MailStateWriter
+
+
+class FakeSource:
+    """Mail source whose writer records applied updates; failing ids raise"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.applied = []
+        self.lock = threading.Lock()
+
+    def open_writer(self):
+        return self
+
+    def mark_read(self, entry_id):
+        if entry_id in self.failing:
+            raise RuntimeError("Outlook is busy")
+        with self.lock:
+            self.applied.append(entry_id)
+
+    def close(self):
+        pass
+
+
+def test_queued_updates_are_applied_on_close(tmp_path):
+    source = FakeSource()
+    writer = MailStateWriter(source, path=str(tmp_path / "queue.sqlite3"), flush_seconds=60).start()
+    writer.mark_read("a")
+    writer.mark_read("b")
+    writer.mark_read("a")   # Queued once
+
+    writer.close()
+
+    assert source.applied == ["a", "b"]
+
+
+def test_unapplied_updates_are_replayed_by_the_next_writer(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+
+    # First run: Outlook rejects "b", then the process goes away
+    first = FakeSource(failing={"b"})
+    writer = MailStateWriter(first, path=path, flush_seconds=60, max_attempts=5).start()
+    writer.mark_read("a")
+    writer.mark_read("b")
+    writer.close()
+    assert first.applied == ["a"]
+
+    # Next run: the leftover update is applied without being queued again
+    second = FakeSource()
+    writer = MailStateWriter(second, path=path, flush_seconds=60)
+    assert writer.pending_count() == 1
+    writer.start().close()
+
+    assert second.applied == ["b"]
+
+
+def test_updates_are_given_up_after_max_attempts(tmp_path):
+    source = FakeSource(failing={"a"})
+    path = str(tmp_path / "queue.sqlite3")
+    writer = MailStateWriter(source, path=path, flush_seconds=60, max_attempts=1).start()
+    writer.mark_read("a")
+    writer.close()
+
+    writer = MailStateWriter(FakeSource(), path=path)
+    assert writer.pending_count() == 0
+    writer.close()
+
+
+def test_full_batch_flushes_without_waiting(tmp_path):
+    source = FakeSource()
+    writer = MailStateWriter(source, path=str(tmp_path / "queue.sqlite3"),
+                             batch_size=2, flush_seconds=60).start()
+    writer.mark_read("a")
+    writer.mark_read("b")
+
+    for _ in range(100):
+        if len(source.applied) == 2:
+            break
+        threading.Event().wait(0.05)
+    assert source.applied == ["a", "b"]
+    writer.close()
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from automation import notification_parser
+from automation.notification_parser import NotificationRecord, parse_notification
+
+BODY = """<html><body>
+<a href="https://help.sap.com/">SAP Help Portal</a>
+<a href="https://help.sap.com/docs/product/topic/page?comment_id=42&amp;show_comments=true">Setting Up Sales</a>
+<table><tr>
+<td style="padding: 16px"><p>Status: Open</p></td>
+<td style="padding: 16px">
+  <p>Please fix the typo in step 3.</p>
+  <p>It should read "billing".</p>
+  <p>2025-05-03 09:12 UTC</p>
+</td>
+</tr></table>
+</body></html>"""
+
+
+class FakeEmail:
+    def __init__(self, entry_id, body):
+        self.EntryID = entry_id
+        self.Subject = "SAP Help Portal: Comment Notification"
+        self.SenderName = "SAP Help Portal"
+        self.ReceivedTime = datetime(2025, 5, 3, 11, 0)
+        self.HTMLBody = body
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    notification_parser._cache.clear()
+    yield
+    notification_parser._cache.clear()
+
+
+def test_parses_link_comment_and_metadata():
+    record = parse_notification(FakeEmail("e1", BODY))
+
+    assert record.breadcrumb_url.endswith("page?comment_id=42&show_comments=true")
+    assert record.link_text == "Setting Up Sales"
+    assert record.comment_id == "42"
+    assert record.comment_text == 'Please fix the typo in step 3. It should read "billing".'
+    assert record.status == "Open"
+    assert record.comment_timestamp == "2025-05-03 09:12 UTC"
+
+
+def test_body_with_encoding_declaration():
+    body = '<?xml version="1.0" encoding="utf-8"?>\n' + BODY
+
+    record = parse_notification(FakeEmail("e2", body))
+
+    assert record.comment_id == "42"
+    assert record.link_text == "Setting Up Sales"
+
+
+def test_falls_back_to_beautifulsoup_when_lxml_fails(monkeypatch):
+    def fail(text):
+        raise ValueError("unparseable")
+
+    monkeypatch.setattr(notification_parser.lxml_html, "fromstring", fail)
+
+    record = parse_notification(FakeEmail("e3", BODY))
+
+    assert record.comment_id == "42"
+    assert record.comment_text == 'Please fix the typo in step 3. It should read "billing".'
+
+
+def test_records_are_cached_and_round_trip():
+    email = FakeEmail("e4", BODY)
+    record = parse_notification(email)
+    email.HTMLBody = ""
+
+    assert parse_notification(email) is record
+    assert NotificationRecord.from_dict(record.to_dict()).to_dict() == record.to_dict()
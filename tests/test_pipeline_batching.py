@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from automation.pipeline import EmailJob, coalesce_jobs, group_into_batches, topic_key
+
+START = datetime(2025, 5, 3, 9, 0)
+
+
+def make_job(position, url, comment_id=None, text=None, minutes=0):
+    job = EmailJob(email=None, position=position, position_info=f"#{position}", target_date=START.date())
+    job.breadcrumb_url = url
+    job.topic = topic_key(url)
+    job.comment_id = comment_id
+    job.email_comment_text = text
+    job.received_time = START + timedelta(minutes=minutes)
+    return job
+
+
+def test_topic_key_ignores_comment_parameters():
+    assert (topic_key("https://help.sap.com/docs/p/t/page?comment_id=1&show_comments=true")
+            == topic_key("https://help.sap.com/docs/p/t/page/?comment_id=2"))
+    assert topic_key("https://help.sap.com/docs/p/t/page") != topic_key("https://help.sap.com/docs/p/t/other")
+
+
+def test_latest_notification_of_a_comment_wins():
+    old = make_job(1, "https://h/a?comment_id=7", comment_id="7", minutes=0)
+    other = make_job(2, "https://h/a?comment_id=8", comment_id="8", minutes=1)
+    modified = make_job(3, "https://h/a?comment_id=7", comment_id="7", minutes=2)
+
+    keep, superseded = coalesce_jobs([old, other, modified])
+
+    assert keep == [other, modified]
+    assert superseded == [old]
+    assert old.superseded_by is modified
+    assert modified.superseded_by is None
+
+
+def test_same_comment_id_on_another_topic_is_not_coalesced():
+    first = make_job(1, "https://h/a?comment_id=7", comment_id="7")
+    second = make_job(2, "https://h/b?comment_id=7", comment_id="7", minutes=1)
+
+    assert coalesce_jobs([first, second]) == ([first, second], [])
+
+
+def test_comments_without_id_are_matched_on_normalized_text():
+    first = make_job(1, "https://h/a", text="Fix  the\ntypo", minutes=0)
+    repeat = make_job(2, "https://h/a", text="Fix the typo", minutes=5)
+    unknown = make_job(3, "https://h/a")   # No id, no text: always kept
+
+    keep, superseded = coalesce_jobs([first, repeat, unknown])
+
+    assert keep == [repeat, unknown]
+    assert superseded == [first]
+
+
+def test_batches_group_by_topic_in_received_order():
+    a1 = make_job(1, "https://h/a?comment_id=1", comment_id="1")
+    b1 = make_job(2, "https://h/b?comment_id=2", comment_id="2")
+    a2 = make_job(3, "https://h/a/?comment_id=3", comment_id="3")
+
+    batches = group_into_batches([a1, b1, a2])
+
+    assert [batch.topic for batch in batches] == ["https://h/a", "https://h/b"]
+    assert batches[0].jobs == [a1, a2]
+    assert batches[1].jobs == [b1]
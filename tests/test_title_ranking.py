@@ -0,0 +1,31 @@
+from automation.browser_automation import rank_titles, title_tokens
+
+
+def test_title_tokens_are_normalized():
+    assert title_tokens("SAP Help Portal: Setting Up Sales-Order Types.") == [
+        "setting", "up", "sales", "order", "types"]
+    assert title_tokens(None) == []
+
+
+def test_exact_title_ranks_first_with_full_score():
+    candidates = ["Configuring Sales Documents", "SAP: Setting Up  Sales Order Types", "Sales Order Types"]
+
+    ranked = rank_titles("Setting Up Sales Order Types", candidates)
+
+    assert ranked[0] == (1.0, 1, candidates[1])
+    assert [index for _, index, _ in ranked] == [1, 2, 0]
+
+
+def test_rarer_shared_words_count_more():
+    ranked = rank_titles("Sales Order Types", ["Sales Pricing", "Sales Billing", "Order Pricing"])
+
+    # Each shares one word with the expected title, but "order" is the rarer one
+    assert [title for _, _, title in ranked] == ["Order Pricing", "Sales Pricing", "Sales Billing"]
+    assert ranked[0][0] > ranked[1][0]
+
+
+def test_ties_keep_the_portal_order_and_empty_titles_score_zero():
+    ranked = rank_titles("Sales Order Types", ["Billing", "", "Pricing"])
+
+    assert ranked == [(0.0, 0, "Billing"), (0.0, 1, ""), (0.0, 2, "Pricing")]
+    assert rank_titles("Sales Order Types", []) == []
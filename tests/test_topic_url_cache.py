@@ -0,0 +1,66 @@
+from automation.topic_url_cache import TopicUrlCache
+
+BREADCRUMB = "https://help.sap.com/docs/product/topic/page?comment_id=42&show_comments=true"
+VERIFIED = "https://help.sap.com/docs/product/abc123/page.html?locale=en-US&version=2025.1&comment_id=1#top"
+
+
+def test_lookup_keeps_the_verified_query_with_the_breadcrumb_comment(tmp_path):
+    cache = TopicUrlCache(str(tmp_path / "cache.json"))
+    cache.remember(BREADCRUMB, "Setting Up Sales", VERIFIED)
+
+    other_email = "https://help.sap.com/docs/product/topic/page/?comment_id=43&locale=de-DE"
+    assert cache.lookup(other_email, "  setting up   SALES ") == (
+        "https://help.sap.com/docs/product/abc123/page.html?locale=en-US&version=2025.1&comment_id=43")
+    assert cache.lookup(BREADCRUMB, "Another Title") is None
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.json")
+    TopicUrlCache(path).remember(BREADCRUMB, "Setting Up Sales", VERIFIED)
+
+    assert TopicUrlCache(path).lookup(BREADCRUMB, "Setting Up Sales") == (
+        "https://help.sap.com/docs/product/abc123/page.html"
+        "?locale=en-US&version=2025.1&comment_id=42&show_comments=true")
+
+
+def test_invalidate_drops_the_entry_on_disk(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TopicUrlCache(path)
+    cache.remember(BREADCRUMB, "Setting Up Sales", VERIFIED)
+
+    cache.invalidate(BREADCRUMB, "Setting Up Sales")
+
+    assert cache.lookup(BREADCRUMB, "Setting Up Sales") is None
+    assert TopicUrlCache(path).lookup(BREADCRUMB, "Setting Up Sales") is None
+    cache.invalidate(BREADCRUMB, "Setting Up Sales")   # Unknown entries are ignored
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json", encoding="utf-8")
+    cache = TopicUrlCache(str(path))
+
+    assert cache.lookup(BREADCRUMB, "Setting Up Sales") is None
+    cache.remember(BREADCRUMB, "Setting Up Sales", VERIFIED)
+    assert TopicUrlCache(str(path)).lookup(BREADCRUMB, "Setting Up Sales") is not None
+
+
+def test_stale_cached_page_is_left_before_verifying(tmp_path, monkeypatch):
+    from automation import pipeline
+
+    cache = TopicUrlCache(str(tmp_path / "cache.json"))
+    cache.remember(BREADCRUMB, "Setting Up Sales", VERIFIED)
+    opened = []
+    monkeypatch.setattr(pipeline, "topic_url_cache", cache)
+    monkeypatch.setattr(pipeline, "open_help_portal_page", lambda driver, url: opened.append(url))
+    monkeypatch.setattr(pipeline, "get_page_title", lambda driver: "Pricing Overview")
+    monkeypatch.setattr(pipeline, "verify_page_and_enable_comments",
+                        lambda driver, **kwargs: opened.append("verify") or False)
+    job = pipeline.EmailJob(email=None, position=1, position_info="#1", target_date=None)
+    job.breadcrumb_url = BREADCRUMB
+    job.link_text = "Setting Up Sales"
+
+    assert not pipeline.open_topic_page(None, job)
+
+    assert opened[1:] == [BREADCRUMB, "verify"]
+    assert cache.lookup(BREADCRUMB, "Setting Up Sales") is None
@@ -0,0 +1,90 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from automation.browser_automation import CONTENT_HASH_JS, content_hash, xml_edits
+
+ORIGINAL = """<?xml version="1.0" encoding="UTF-8"?>
+<topic id="sales">
+  <title>Setting Up Sales</title>
+  <body>
+    <p>Create the sales order type first.</p>
+    <p>Then maintain the billing type.</p>
+  </body>
+</topic>
+"""
+
+
+def to_units(text):
+    data = text.encode("utf-16-le")
+    return [data[i] | (data[i + 1] << 8) for i in range(0, len(data), 2)]
+
+
+def from_units(units):
+    return b"".join(unit.to_bytes(2, "little") for unit in units).decode("utf-16-le")
+
+
+def apply_edits(text, edits):
+    """Applies the edits in order like CodeMirror's replaceRange, on UTF-16 code units"""
+    units = to_units(text.replace("\r\n", "\n"))
+    for edit in edits:
+        line_starts = [0] + [i + 1 for i, unit in enumerate(units) if unit == 0x0A]
+        start = line_starts[edit["from"]["line"]] + edit["from"]["ch"]
+        end = line_starts[edit["to"]["line"]] + edit["to"]["ch"]
+        units[start:end] = to_units(edit["text"])
+    return from_units(units)
+
+
+@pytest.mark.parametrize("modified", [
+    ORIGINAL.replace("sales order type", "sales document type"),
+    ORIGINAL.replace("Setting Up", "Configuring").replace("billing type", "billing document type"),
+    ORIGINAL.replace("    <p>Then maintain the billing type.</p>\n", ""),
+    ORIGINAL.replace("</body>", "  <note>Check the pricing too.</note>\n  </body>"),
+    ORIGINAL.replace("\n", "\r\n").replace("first.", "first!"),
+    "",
+])
+def test_edits_reproduce_the_modified_xml(modified):
+    edits = xml_edits(ORIGINAL, modified)
+
+    assert apply_edits(ORIGINAL, edits) == modified.replace("\r\n", "\n")
+
+
+def test_only_the_changed_characters_are_sent():
+    edits = xml_edits(ORIGINAL, ORIGINAL.replace("sales order type", "sales document type"))
+
+    assert edits == [{"from": {"line": 4, "ch": 24}, "to": {"line": 4, "ch": 29}, "text": "document"}]
+    assert xml_edits(ORIGINAL, ORIGINAL) == []
+
+
+def test_positions_count_utf16_code_units():
+    original = ORIGINAL.replace("Setting Up", "\U0001F4E6 Setting Up")   # Outside the BMP: two units
+    modified = original.replace("Sales<", "Sales é<")
+
+    edits = xml_edits(original, modified)
+
+    # 27 characters into the line, but the emoji is a surrogate pair
+    assert edits[0]["from"] == {"line": 2, "ch": 28}
+    assert apply_edits(original, edits) == modified
+
+
+def test_content_hash_covers_utf16_length():
+    assert content_hash("") == "811c9dc5:0"
+    assert content_hash("a").endswith(":1")
+    assert content_hash("\U0001F4E6").endswith(":2")
+    assert content_hash("ab") != content_hash("ba")
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_content_hash_matches_the_page_script():
+    texts = [ORIGINAL, "", "Café \U0001F4E6 中文", "line\nbreak\ttab"]
+    script = CONTENT_HASH_JS + """
+        var texts = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+        console.log(JSON.stringify(texts.map(contentHash)));
+    """
+
+    result = subprocess.run(["node", "-e", script], input=json.dumps(texts),
+                            capture_output=True, text=True, check=True)
+
+    assert json.loads(result.stdout) == [content_hash(text) for text in texts]